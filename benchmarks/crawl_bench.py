@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import requests
+from benchmarks.stub_server import StubGitLabServer, SyntheticGitLab
+from library.indexer import index_repositories
+from module_utils.GitLab.main import save_group_tree
+from module_utils.GitLab.multiroot import fetch_group_trees
+from module_utils.GitLab.pagination import with_params
+from module_utils.GitLab.profile import FULL, LEAN, FetchProfile
+from module_utils.GitLab.query import STRATEGIES, GitLabAPI
+from module_utils.serializer import get_serializer
+from settings.upload import GitLabUploader, upload_local_directory_structure
+
+UPLOAD_PROJECT_ID = 1000
+
+
+def upload_ok(stats) -> bool:
+    return stats is not None and stats["failed"] == 0
+
+
+def measure(name: str, items: int, fn) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "benchmark": name,
+        "seconds": round(elapsed, 3),
+        "items": items,
+        "items_per_second": round(items / elapsed, 1) if elapsed else None,
+        "peak_mib": round(peak / 1024 / 1024, 2),
+        "ok": bool(result),
+    }
+
+
+def measure_decode(base_url: str, group_id: int, profile: FetchProfile, repeat: int = 50) -> dict:
+    url = f"{base_url}/api/v4/groups/{group_id}/projects?include_subgroups=true&per_page=100"
+    params = profile.project_params()
+    body = requests.get(with_params(url, **params) if params else url).content
+    serializer = get_serializer()
+
+    def decode():
+        for _ in range(repeat):
+            page = [profile.project(p) for p in serializer.loads(body)]
+        return page
+
+    row = measure(f"decode_page[{profile.name}]", repeat * len(serializer.loads(body)), decode)
+    row["kib"] = round(len(body) / 1024, 1)
+    return row
+
+
+def run(depth: int = 3, fanout: int = 3, projects: int = 20, workers: int = 8, latency: float = 0.0,
+        throttle_every: int = 0) -> list:
+    gitlab = SyntheticGitLab(depth, fanout, projects)
+    total = gitlab.project_count
+    results = []
+
+    with StubGitLabServer(gitlab, latency=latency, throttle_every=throttle_every) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        # GraphQL vælger selv sine felter; profilen gælder kun REST
+        variants = [(strategy, FULL) for strategy in STRATEGIES] + [("recursive", LEAN), ("flat", LEAN)]
+        for strategy, profile in variants:
+            api = GitLabAPI(server.url, "token", max_workers=workers, profile=profile)
+            requests_before, bytes_before = server.requests, server.bytes_sent
+            suffix = "" if profile is FULL else f",{profile.name}"
+            row = measure(
+                f"get_group_tree[{strategy}{suffix}]", total,
+                lambda: api.fetch_group_tree(gitlab.root_id, strategy=strategy, max_depth=depth + 1),
+            )
+            row["requests"] = server.requests - requests_before
+            row["kib"] = round((server.bytes_sent - bytes_before) / 1024, 1)
+            results.append(row)
+
+        for profile in (FULL, LEAN):
+            results.append(measure_decode(server.url, gitlab.root_id, profile))
+
+        # Undergrupperne af roden som uafhængige rødder: sekventielt mod én proces pr. rod
+        roots = [str(gid) for gid in gitlab.children[gitlab.root_id]]
+        root_projects = total - len(gitlab.projects[gitlab.root_id])
+        for processes in (1, None):
+            results.append(measure(
+                f"multiroot[{'sequential' if processes == 1 else 'processes'}]", root_projects,
+                lambda: all(r["tree"] for r in fetch_group_trees(server.url, "token", roots, max_depth=depth,
+                                                                 max_workers=workers, processes=processes)),
+            ))
+
+        for stream in (False, True):
+            output = os.path.join(workdir, f"repos-{stream}.json")
+            results.append(measure(
+                f"index_repositories[{'stream' if stream else 'tree'}]", total,
+                lambda: index_repositories(server.url, "token", str(gitlab.root_id), output,
+                                           max_workers=workers, stream=stream),
+            ))
+
+        data_path = os.path.join(workdir, "data")
+        api = GitLabAPI(server.url, "token", max_workers=workers)
+        save_group_tree(api.fetch_group_tree(gitlab.root_id, max_depth=depth + 1), data_path)
+
+        for batch in (True, False):
+            gitlab.files.clear()
+            uploader = GitLabUploader(server.url, "token", UPLOAD_PROJECT_ID, "main")
+            results.append(measure(
+                f"upload[{'batch' if batch else 'file'}]", total,
+                lambda: upload_ok(upload_local_directory_structure(data_path, uploader, "data", batch=batch)),
+            ))
+
+        results.append({"benchmark": "server", "requests": server.requests, "throttled": server.throttled})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl, index and upload benchmarks against a local stand-in")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--projects", type=int, default=20, help="Projects per group")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.depth, args.fanout, args.projects, args.workers, args.latency, args.throttle_every)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'benchmark':<32} {'seconds':>8} {'items/s':>10} {'peak MiB':>9}  ok  {'requests':>8} {'KiB':>8}")
+    for row in results:
+        if row["benchmark"] == "server":
+            print(f"\n🔌 {row['requests']} requests, {row['throttled']} throttled")
+            continue
+        transfer = f"  {row.get('requests', ''):>8} {row['kib']:>8.1f}" if "kib" in row else ""
+        print(f"{row['benchmark']:<32} {row['seconds']:>8.3f} {row['items_per_second']:>10.1f} "
+              f"{row['peak_mib']:>9.2f}  {'✅' if row['ok'] else '❌'}{transfer}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import argparse
+import time
+from module_utils.serializer import Serializer, available_backends
+
+
+def sample_records(count: int) -> list:
+    return [{
+        "id": i,
+        "name": f"repo-{i}",
+        "description": "Terraform-moduler til platformsteamet, med æøå og 🚀" if i % 3 else None,
+        "visibility": ("private", "internal", "public")[i % 3],
+        "last_activity_at": "2025-11-18T10:00:00.123Z",
+        "web_url": f"https://gitlab.example.com/platform/team-{i % 50}/repo-{i}",
+    } for i in range(count)]
+
+
+def per_record_us(fn, records, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for record in records:
+            fn(record)
+        best = min(best, time.perf_counter() - started)
+    return best / len(records) * 1e6
+
+
+def run(count: int = 10000, repeat: int = 5) -> list:
+    records = sample_records(count)
+    results = []
+    for backend in available_backends():
+        for compact in (False, True):
+            serializer = Serializer(backend, compact=compact)
+            encoded = [serializer.dumps(record) for record in records]
+            results.append({
+                "backend": backend,
+                "mode": "compact" if compact else "pretty",
+                "dumps_us": per_record_us(serializer.dumps, records, repeat),
+                "loads_us": per_record_us(serializer.loads, encoded, repeat),
+                "bytes": sum(len(data) for data in encoded) / count,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-record cost of each JSON backend")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<8} {'mode':<8} {'dumps µs':>9} {'loads µs':>9} {'bytes':>7}")
+    for row in run(args.records, args.repeat):
+        print(f"{row['backend']:<8} {row['mode']:<8} {row['dumps_us']:>9.2f} {row['loads_us']:>9.2f} "
+              f"{row['bytes']:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,422 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, urlencode, unquote
+
+# GitLab udelader totaler over denne grænse
+MAX_COUNTED_RESULTS = 10000
+VISIBILITIES = ("private", "internal", "public")
+
+
+class SyntheticGitLab:
+    def __init__(self, depth: int = 3, fanout: int = 3, projects_per_group: int = 20, root_id: int = 1,
+                 root_name: str = "root"):
+        self.root_id = root_id
+        self.groups = {}
+        self.children = {}
+        self.projects = {}
+        self.files = {}
+        self.commits = 0
+        self._lock = threading.Lock()
+
+        next_group, next_project = root_id, 1
+        queue = [(None, root_name, 0)]
+        while queue:
+            parent_id, name, level = queue.pop(0)
+            gid = next_group
+            next_group += 1
+            parent = self.groups.get(parent_id)
+            full_path = f"{parent['full_path']}/{name}" if parent else name
+            self.groups[gid] = {"id": gid, "name": name, "path": name, "full_path": full_path,
+                                "parent_id": parent_id, "web_url": f"https://gitlab.example.com/groups/{full_path}"}
+            self.children.setdefault(gid, [])
+            if parent_id is not None:
+                self.children[parent_id].append(gid)
+
+            projects = []
+            for i in range(projects_per_group):
+                pid = next_project
+                next_project += 1
+                projects.append({
+                    "id": pid,
+                    "name": f"project-{pid}",
+                    "path": f"project-{pid}",
+                    "description": f"Synthetic project {i} in {full_path}" if pid % 4 else None,
+                    "visibility": VISIBILITIES[pid % len(VISIBILITIES)],
+                    "last_activity_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z",
+                                                      time.gmtime(1700000000 + pid * 3600)),
+                    "web_url": f"https://gitlab.example.com/{full_path}/project-{pid}",
+                    "path_with_namespace": f"{full_path}/project-{pid}",
+                    "namespace": {"id": gid, "name": name, "full_path": full_path, "kind": "group"},
+                })
+            self.projects[gid] = projects
+
+            if level < depth:
+                for i in range(fanout):
+                    queue.append((gid, f"{name}-{i + 1}", level + 1))
+
+    @property
+    def project_count(self) -> int:
+        return sum(len(projects) for projects in self.projects.values())
+
+    def descendants(self, group_id: int) -> list:
+        result, stack = [], list(reversed(self.children.get(group_id, [])))
+        while stack:
+            gid = stack.pop()
+            result.append(gid)
+            stack.extend(reversed(self.children.get(gid, [])))
+        return result
+
+
+class StubGitLabServer:
+    def __init__(self, gitlab: SyntheticGitLab, latency: float = 0.0, throttle_every: int = 0,
+                 retry_after: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.gitlab = gitlab
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubGitLabServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-gitlab", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'StubGitLabServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def should_throttle(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            if self.throttle_every and self.requests % self.throttle_every == 0:
+                self.throttled += 1
+                return True
+        return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def stub(self) -> StubGitLabServer:
+        return self.server.stub
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+
+        if self.stub.latency:
+            time.sleep(self.stub.latency)
+        if self.stub.should_throttle():
+            return self._send(429, {"message": "429 Too Many Requests"},
+                              {"Retry-After": str(self.stub.retry_after)})
+
+        parsed = urlparse(self.path)
+        query = dict(parse_qsl(parsed.query))
+        parts = [unquote(part) for part in parsed.path.split("/")[3:]]
+
+        try:
+            if parsed.path == "/api/graphql" and method == "POST":
+                return self._graphql(body.get("variables") or {})
+            if parts[:1] == ["groups"] and len(parts) >= 2 and method == "GET":
+                return self._groups(int(parts[1]), parts[2:], query, parsed.path)
+            if parts[:1] == ["projects"] and len(parts) >= 4 and parts[2] == "repository":
+                return self._repository(method, parts[3], parts[4:], query, body, parsed.path)
+        except (KeyError, ValueError):
+            pass
+        self._send(404, {"message": "404 Not Found"})
+
+    def _groups(self, gid: int, rest: list, query: dict, path: str):
+        gitlab = self.stub.gitlab
+        if gid not in gitlab.groups:
+            return self._send(404, {"message": "404 Group Not Found"})
+
+        if not rest:
+            return self._send(200, gitlab.groups[gid])
+        if rest == ["subgroups"]:
+            return self._paginate(path, query, [gitlab.groups[c] for c in gitlab.children[gid]])
+        if rest == ["descendant_groups"]:
+            return self._paginate(path, query, [gitlab.groups[c] for c in gitlab.descendants(gid)])
+        if rest == ["projects"]:
+            group_ids = [gid]
+            if query.get("include_subgroups") == "true":
+                group_ids += gitlab.descendants(gid)
+            projects = [p for g in group_ids for p in gitlab.projects[g]]
+            since = query.get("last_activity_after")
+            if since:
+                projects = [p for p in projects if p["last_activity_at"] > since]
+            if query.get("visibility"):
+                projects = [p for p in projects if p["visibility"] == query["visibility"]]
+            if query.get("archived") == "true":
+                projects = []
+            simple = query.get("simple") == "true"
+            return self._paginate(path, query, [_rest_project(p, simple) for p in projects])
+        self._send(404, {"message": "404 Not Found"})
+
+    def _graphql(self, variables: dict):
+        # Kun GroupTree-forespørgslen; feltudvalget i forespørgslen ignoreres
+        gitlab = self.stub.gitlab
+        group = next((g for g in gitlab.groups.values() if g["full_path"] == variables.get("fullPath")), None)
+        if group is None:
+            return self._send(200, {"data": {"group": None}})
+
+        node = _graphql_group(group)
+        first = min(int(variables.get("first", 100)), 100)
+        if variables.get("withGroups", True):
+            groups = [_graphql_group(gitlab.groups[c]) for c in gitlab.descendants(group["id"])]
+            node["descendantGroups"] = _connection(groups, variables.get("groupsAfter"), first)
+        if variables.get("withProjects", True):
+            projects = [_graphql_project(p) for g in [group["id"]] + gitlab.descendants(group["id"])
+                        for p in gitlab.projects[g]]
+            node["projects"] = _connection(projects, variables.get("projectsAfter"), first)
+        self._send(200, {"data": {"group": node}})
+
+    def _repository(self, method: str, kind: str, rest: list, query: dict, body: dict, path: str):
+        gitlab = self.stub.gitlab
+        with gitlab._lock:
+            if kind == "tree" and method == "GET":
+                prefix = query.get("path", "").strip("/")
+                blobs = [
+                    {"id": _blob_id(content), "name": name.rsplit("/", 1)[-1], "type": "blob", "path": name,
+                     "mode": "100644"}
+                    for name, content in sorted(gitlab.files.items())
+                    if not prefix or name.startswith(prefix + "/")
+                ]
+                if prefix and not blobs:
+                    return self._send(404, {"message": "404 Tree Not Found"})
+                return self._paginate(path, query, blobs)
+
+            if kind == "files" and rest:
+                file_path = "/".join(rest)
+                exists = file_path in gitlab.files
+                if method == "GET":
+                    if not exists:
+                        return self._send(404, {"message": "404 File Not Found"})
+                    return self._send(200, {"file_path": file_path,
+                                            "content": base64.b64encode(gitlab.files[file_path]).decode()})
+                if method == "POST":
+                    if exists:
+                        return self._send(400, {"message": "A file with this name already exists"})
+                    gitlab.files[file_path] = _decode(body)
+                    gitlab.commits += 1
+                    return self._send(201, {"file_path": file_path, "branch": body.get("branch")})
+                if method == "PUT":
+                    if not exists:
+                        return self._send(400, {"message": "A file with this name doesn't exist"})
+                    gitlab.files[file_path] = _decode(body)
+                    gitlab.commits += 1
+                    return self._send(200, {"file_path": file_path, "branch": body.get("branch")})
+                if method == "DELETE":
+                    if not exists:
+                        return self._send(400, {"message": "A file with this name doesn't exist"})
+                    del gitlab.files[file_path]
+                    gitlab.commits += 1
+                    return self._send(204, None)
+
+            if kind == "commits" and method == "POST":
+                actions = body.get("actions", [])
+                # Alt eller intet, som GitLab
+                for action in actions:
+                    exists = action["file_path"] in gitlab.files
+                    if action["action"] == "create" and exists:
+                        return self._send(400, {"message": "A file with this name already exists"})
+                    if action["action"] in ("update", "delete") and not exists:
+                        return self._send(400, {"message": "A file with this name doesn't exist"})
+                for action in actions:
+                    if action["action"] == "delete":
+                        del gitlab.files[action["file_path"]]
+                    else:
+                        gitlab.files[action["file_path"]] = _decode(action)
+                gitlab.commits += 1
+                return self._send(201, {"id": hashlib.sha1(str(gitlab.commits).encode()).hexdigest()})
+
+        self._send(404, {"message": "404 Not Found"})
+
+    def _paginate(self, path: str, query: dict, items: list):
+        per_page = min(int(query.get("per_page", 20)), 100)
+        headers = {"X-Per-Page": str(per_page)}
+
+        if query.get("pagination") == "keyset":
+            items = sorted(items, key=lambda item: item["id"])
+            id_after = int(query.get("id_after", 0))
+            remaining = [item for item in items if item["id"] > id_after]
+            page_items = remaining[:per_page]
+            if len(remaining) > per_page:
+                next_query = dict(query, id_after=page_items[-1]["id"])
+                headers["Link"] = f'<{self._link(path, next_query)}>; rel="next"'
+            return self._send(200, page_items, headers)
+
+        page = max(int(query.get("page", 1)), 1)
+        total = len(items)
+        total_pages = max((total + per_page - 1) // per_page, 1)
+        page_items = items[(page - 1) * per_page:page * per_page]
+
+        headers["X-Page"] = str(page)
+        headers["X-Next-Page"] = str(page + 1) if page < total_pages else ""
+        headers["X-Prev-Page"] = str(page - 1) if page > 1 else ""
+        if total <= MAX_COUNTED_RESULTS:
+            headers["X-Total"] = str(total)
+            headers["X-Total-Pages"] = str(total_pages)
+
+        links = []
+        if page < total_pages:
+            links.append(f'<{self._link(path, dict(query, page=page + 1))}>; rel="next"')
+        if page > 1:
+            links.append(f'<{self._link(path, dict(query, page=page - 1))}>; rel="prev"')
+        links.append(f'<{self._link(path, dict(query, page=1))}>; rel="first"')
+        if total <= MAX_COUNTED_RESULTS:
+            links.append(f'<{self._link(path, dict(query, page=total_pages))}>; rel="last"')
+        headers["Link"] = ", ".join(links)
+        self._send(200, page_items, headers)
+
+    def _link(self, path: str, query: dict) -> str:
+        return f"{self.stub.url}{path}?{urlencode(query)}"
+
+    def _send(self, status: int, payload, headers: dict = None):
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        with self.stub._lock:
+            self.stub.bytes_sent += len(data)
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _decode(body: dict) -> bytes:
+    content = body.get("content", "")
+    if body.get("encoding") == "base64":
+        return base64.b64decode(content)
+    return content.encode("utf-8")
+
+
+# Felter fra GitLabs fulde projektrepræsentation, som simple=true udelader
+FULL_PROJECT_FIELDS = {
+    "visibility": None, "owner": None, "container_registry_image_prefix": "", "issues_enabled": True,
+    "merge_requests_enabled": True, "wiki_enabled": True, "jobs_enabled": True, "snippets_enabled": True,
+    "container_registry_enabled": True, "service_desk_enabled": False, "can_create_merge_request_in": True,
+    "issues_access_level": "enabled", "repository_access_level": "enabled", "merge_requests_access_level": "enabled",
+    "forking_access_level": "enabled", "wiki_access_level": "enabled", "builds_access_level": "enabled",
+    "snippets_access_level": "enabled", "pages_access_level": "private", "analytics_access_level": "enabled",
+    "container_registry_access_level": "enabled", "security_and_compliance_access_level": "private",
+    "releases_access_level": "enabled", "environments_access_level": "enabled",
+    "feature_flags_access_level": "enabled", "infrastructure_access_level": "enabled",
+    "monitor_access_level": "enabled", "emails_disabled": False, "shared_runners_enabled": True,
+    "lfs_enabled": True, "creator_id": 1, "import_status": "none", "open_issues_count": 0,
+    "ci_default_git_depth": 20, "ci_forward_deployment_enabled": True, "ci_job_token_scope_enabled": False,
+    "public_jobs": True, "build_timeout": 3600, "auto_cancel_pending_pipelines": "enabled",
+    "ci_config_path": "", "shared_with_groups": [], "only_allow_merge_if_pipeline_succeeds": False,
+    "allow_merge_on_skipped_pipeline": None, "restrict_user_defined_variables": False,
+    "request_access_enabled": True, "only_allow_merge_if_all_discussions_are_resolved": False,
+    "remove_source_branch_after_merge": True, "printing_merge_request_link_enabled": True,
+    "merge_method": "merge", "squash_option": "default_off", "enforce_auth_checks_on_uploads": True,
+    "suggestion_commit_message": None, "merge_commit_template": None, "squash_commit_template": None,
+    "auto_devops_enabled": False, "auto_devops_deploy_strategy": "continuous", "autoclose_referenced_issues": True,
+    "keep_latest_artifact": True, "runner_token_expiration_interval": None, "archived": False,
+    "empty_repo": False, "compliance_frameworks": [], "permissions": {"project_access": None, "group_access": None},
+}
+
+
+def _rest_project(project: dict, simple: bool) -> dict:
+    data = dict(project, default_branch="main", topics=[], tag_list=[], forks_count=0, star_count=0,
+                avatar_url=None, created_at=project["last_activity_at"],
+                ssh_url_to_repo=f"git@gitlab.example.com:{project['path_with_namespace']}.git",
+                http_url_to_repo=f"{project['web_url']}.git", readme_url=f"{project['web_url']}/-/blob/main/README.md",
+                name_with_namespace=project["path_with_namespace"].replace("/", " / "))
+    if simple:
+        del data["visibility"]
+        return data
+    links = {key: f"https://gitlab.example.com/api/v4/projects/{project['id']}/{key}"
+             for key in ("issues", "merge_requests", "repo_branches", "labels", "events", "members")}
+    return dict(FULL_PROJECT_FIELDS, **data, _links=links)
+
+
+def _graphql_group(group: dict) -> dict:
+    parent = {"id": f"gid://gitlab/Group/{group['parent_id']}"} if group["parent_id"] else None
+    return {"id": f"gid://gitlab/Group/{group['id']}", "name": group["name"], "fullPath": group["full_path"],
+            "parent": parent}
+
+
+def _graphql_project(project: dict) -> dict:
+    return {"id": f"gid://gitlab/Project/{project['id']}", "name": project["name"],
+            "description": project["description"], "webUrl": project["web_url"],
+            "lastActivityAt": project["last_activity_at"], "visibility": project["visibility"],
+            "namespace": {"id": f"gid://gitlab/Group/{project['namespace']['id']}"}}
+
+
+def _connection(items: list, after, first: int) -> dict:
+    start = int(base64.b64decode(after)) if after else 0
+    end = start + first
+    return {
+        "pageInfo": {"hasNextPage": end < len(items),
+                     "endCursor": base64.b64encode(str(end).encode()).decode() if end < len(items) else None},
+        "nodes": items[start:end],
+    }
+
+
+def _blob_id(content: bytes) -> str:
+    return hashlib.sha1(f"blob {len(content)}\0".encode("ascii") + content).hexdigest()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a synthetic GitLab hierarchy on localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--throttle-every", type=int, default=0)
+    args = parser.parse_args()
+
+    gitlab = SyntheticGitLab(args.depth, args.fanout, args.projects)
+    server = StubGitLabServer(gitlab, latency=args.latency, throttle_every=args.throttle_every, port=args.port)
+    print(f"🧪 Serving {len(gitlab.groups)} groups and {gitlab.project_count} projects on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server._server.server_close()
\ No newline at end of file
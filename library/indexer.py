@@ -1,56 +1,125 @@
-import json
+import logging
+import os
+from typing import Optional
 from module_utils.GitLab.query import GitLabAPI
-from module_utils.GitLab.models import Repository
+from module_utils.GitLab.models import Repository, RepositoryTable
+from module_utils.GitLab.profile import FetchProfile
+from module_utils.GitLab.multiroot import fetch_group_trees, merge_trees, parse_group_ids
+from module_utils.GitLab.traversal import TreeVisitor, place_records, walk, walk_tree
+from module_utils.GitLab.incremental import IndexState, StateTracker, collect_changes, apply_to_records, utc_now
+from module_utils.jsonstream import AtomicJsonWriter, read_records
+from module_utils.metrics import get_metrics
+from module_utils.store import IndexStore
+
+log = logging.getLogger(__name__)
+
+
+class RepositoryCollector(TreeVisitor):
+    def __init__(self):
+        self.repositories = []
+
+    def visit_project(self, project, group, path):
+        self.repositories.append(project)
 
 
 def collect_all_repositories(tree):
-    if not tree:
-        return []
+    # Alle projekter fra hele gruppetræet, hvert projekt-ID én gang
+    collector = RepositoryCollector()
+    if tree:
+        walk_tree(tree, [collector])
+    return collector.repositories
+
 
-    repos = []
+def iter_streamed_repositories(api: GitLabAPI, group_id: str, state: IndexState):
+    for record in place_records(api.iter_group_projects(group_id)):
+        state.track(record.group_id, os.path.join(*record.group_path), record.project)
+        if record.project is not None:
+            yield Repository.from_api(record.project).to_dict()
 
-    # Tilføj projekterne fra denne gruppe
-    repos.extend(tree.get("projects", []))
 
-    # Gå gennem undergrupper
-    for subgroup in tree.get("subgroups", []):
-        if subgroup:  # Check for None
-            repos.extend(collect_all_repositories(subgroup))
+def write_index(output_path: str, output_format: str, repos, state: IndexState,
+                store: Optional[IndexStore] = None) -> int:
+    # Skrives til en midlertidig fil og omdøbes først når alt er skrevet
+    with AtomicJsonWriter(output_path, output_format) as writer:
+        for repo in repos:
+            writer.write(repo)
+            if store is not None:
+                gid = state.projects[str(repo["id"])]["group_id"]
+                store.add_project(repo, gid, state.groups[gid])
+        if not state.groups:
+            raise RuntimeError("Failed to fetch group tree")
 
-    return repos
+    if store is not None:
+        for gid, path in state.groups.items():
+            store.add_group(gid, path)
+    return writer.count
 
 
-def index_repositories(base_url: str, token: str, group_id: str, output_path: str):
+def index_repositories(base_url: str, token: str, group_id: str, output_path: str, max_workers: int = 8,
+                       strategy: str = "recursive", incremental: bool = False, state_path: Optional[str] = None,
+                       stream: bool = False, output_format: str = "json", store_path: Optional[str] = None,
+                       processes: Optional[int] = None, profile: Optional[FetchProfile] = None):
     try:
-        print("🔍 Indexing GitLab repositories...")
+        log.info("🔍 Indexing GitLab repositories...")
+
+        group_ids = parse_group_ids(group_id)
+        if len(group_ids) > 1 and (incremental or stream):
+            log.warning("⚠️  Incremental and streaming runs support a single root group; running a full crawl")
+            incremental = stream = False
+
+        api = GitLabAPI(base_url, token, max_workers=max_workers, profile=profile)
+        state_path = state_path or f"{output_path}.state"
+        state = IndexState.load(state_path) if incremental else IndexState()
+        started = utc_now()
+
+        if incremental and state.last_run and os.path.exists(output_path):
+            # Et stort index holdes kolonnevis i stedet for som en dict pr. projekt
+            table = RepositoryTable.from_api(read_records(output_path, output_format))
+
+            # Hent kun ændrede projekter og flet dem ind i det eksisterende index
+            changes = collect_changes(api, group_id, state, data_path="")
+            stats = apply_to_records(changes, state, table)
+            log.info(f"🔄 Updated: {stats['updated']}, 🗑️  Removed: {stats['removed']}")
 
-        api = GitLabAPI(base_url, token)
-        tree = api.get_group_tree(group_id)
+            repos = table.to_dicts()
+        elif stream:
+            # Projekterne skrives efterhånden som crawleren finder dem
+            state = IndexState(last_run=started)
+            repos = iter_streamed_repositories(api, group_id, state)
+        else:
+            with get_metrics().stage("crawl"):
+                if len(group_ids) > 1:
+                    results = fetch_group_trees(base_url, token, group_ids, strategy=strategy,
+                                                max_workers=max_workers, processes=processes, profile=profile)
+                    trees = [result["tree"] for result in results]
+                else:
+                    trees = [api.fetch_group_tree(group_id, strategy=strategy)]
 
-        if not tree:
-            print("❌ Failed to fetch group tree")
-            return False
+            if not all(trees):
+                log.error("❌ Failed to fetch group tree")
+                return False
 
-        # Saml ALLE projekter fra hele gruppetræet
-        all_repos = collect_all_repositories(tree)
+            # Saml ALLE projekter fra alle gruppetræer, hvert projekt-ID kun én gang, i ét gennemløb
+            trees, _ = merge_trees(trees)
+            collector = RepositoryCollector()
+            state = IndexState(last_run=started)
+            walk(trees, [collector, StateTracker(state, "")])
+            repos = (Repository.from_api(repo).to_dict() for repo in collector.repositories)
 
-        # Konverter til Repository-objekter
-        repo_data = [
-            Repository(
-                id=repo["id"],
-                name=repo["name"],
-                description=repo.get("description"),
-                visibility=repo.get("visibility"),
-                last_activity_at=repo["last_activity_at"]
-            ).__dict__
-            for repo in all_repos
-        ]
+        if store_path:
+            # JSON-filen og databasen skrives i samme gennemløb
+            with IndexStore(store_path) as store, store.bulk(replace=True):
+                count = write_index(output_path, output_format, repos, state, store)
+        else:
+            count = write_index(output_path, output_format, repos, state)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(repo_data, f, indent=2, ensure_ascii=False)
+        if incremental:
+            state.last_run = started
+            state.save(state_path)
 
-        print(f"✅ Saved {len(repo_data)} repositories to {output_path}")
+        log.info(f"✅ Saved {count} repositories to {output_path}")
+        return True
 
     except Exception as e:
-        print(f"❌ Indexing failed: {e}")
+        log.error(f"❌ Indexing failed: {e}")
         return False
\ No newline at end of file
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Headers som pagineringen har brug for, når et svar serveres fra cachen
+CACHED_HEADERS = ("Content-Type", "ETag", "Link", "X-Page", "X-Next-Page", "X-Total", "X-Total-Pages")
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: Optional[str]
+    headers: dict
+    stored_at: float
+
+    def to_response(self, url: str) -> requests.Response:
+        response = requests.Response()
+        response._content = self.body
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.url = url
+        response.encoding = "utf-8"
+        return response
+
+
+class ResponseCache:
+    def __init__(self, directory: str = ".cache/gitlab", max_bytes: int = 256 * 1024 * 1024,
+                 ttl: Optional[float] = None, clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        # LRU-indeks: nøgle -> (størrelse, sidste adgang), genopbygget fra mtime
+        self._index = {}
+        for name in os.listdir(directory):
+            if name.endswith(".entry"):
+                stat = os.stat(os.path.join(directory, name))
+                self._index[name[:-len(".entry")]] = (stat.st_size, stat.st_mtime)
+        self._size = sum(size for size, _ in self._index.values())
+
+    @staticmethod
+    def key(url: str, token: str) -> str:
+        scope = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        return hashlib.sha256(f"{scope} {url}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.entry")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        self._touch(key)
+        return CacheEntry(body=body, etag=meta.get("etag"), headers=meta.get("headers", {}),
+                          stored_at=meta.get("stored_at", 0.0))
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.ttl is not None and self._clock() - entry.stored_at < self.ttl
+
+    def put(self, key: str, body: bytes, etag: Optional[str], headers) -> CacheEntry:
+        entry = CacheEntry(
+            body=body,
+            etag=etag,
+            headers={name: headers[name] for name in CACHED_HEADERS if name in headers},
+            stored_at=self._clock(),
+        )
+        meta = json.dumps({"etag": entry.etag, "headers": entry.headers, "stored_at": entry.stored_at})
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(meta.encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            old_size, _ = self._index.get(key, (0, 0.0))
+            size = os.path.getsize(path)
+            self._index[key] = (size, self._clock())
+            self._size += size - old_size
+            self._evict()
+        return entry
+
+    def refresh(self, key: str, entry: CacheEntry, headers) -> CacheEntry:
+        # 304: samme body, men nye headers og nyt tidsstempel til TTL
+        merged = dict(entry.headers)
+        merged.update({name: headers[name] for name in CACHED_HEADERS if name in headers})
+        return self.put(key, entry.body, headers.get("ETag", entry.etag), merged)
+
+    def _touch(self, key: str):
+        now = self._clock()
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (self._index[key][0], now)
+        try:
+            os.utime(self._path(key), (now, now))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if self._size <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self._index[key]
+            self._size -= size
+
+    def record(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "entries": len(self._index),
+            "bytes": self._size,
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
\ No newline at end of file
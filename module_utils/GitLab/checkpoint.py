@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from module_utils.serializer import get_serializer
+
+VERSION = 1
+DEFAULT_INTERVAL = 30.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+log = logging.getLogger(__name__)
+
+
+class CrawlCheckpoint:
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL, clock=time.monotonic,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, keep_results: bool = True):
+        self.path = path
+        self.interval = interval
+        self.max_attempts = max_attempts
+        # Uden resultater gemmes kun strukturen; projekterne ligger på disken og listes igen ved --resume
+        self.keep_results = keep_results
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_save = clock()
+        self.root_id = None
+        self.pending = {}
+        self.completed = {}
+        self.failed = {}
+        self.cursors = {}
+
+    @classmethod
+    def load(cls, path: str, interval: float = DEFAULT_INTERVAL, clock=time.monotonic,
+             max_attempts: int = DEFAULT_MAX_ATTEMPTS, keep_results: bool = True) -> 'CrawlCheckpoint':
+        checkpoint = cls(path, interval, clock, max_attempts, keep_results)
+        if not os.path.exists(path):
+            return checkpoint
+
+        data = get_serializer().load_file(path)
+        if data.get("version") != VERSION:
+            log.warning(f"⚠️  Ignoring checkpoint {path} with unknown version {data.get('version')}")
+            return checkpoint
+
+        checkpoint.root_id = data["root_id"]
+        checkpoint.pending = {gid: (depth, parent_id) for gid, depth, parent_id in data["pending"]}
+        checkpoint.completed = {entry["id"]: entry for entry in data["completed"]}
+        checkpoint.failed = {gid: attempts for gid, attempts in data["failed"]}
+        checkpoint.cursors = data["cursors"]
+        return checkpoint
+
+    def start(self, root_id) -> bool:
+        # En checkpoint fra en anden rod kan ikke genoptages
+        with self._lock:
+            if self.root_id is not None and str(self.root_id) == str(root_id):
+                return bool(self.completed or self.pending or self.cursors)
+            if self.root_id is not None:
+                log.warning(f"⚠️  Checkpoint is for group {self.root_id}, starting group {root_id} from scratch")
+            self.root_id = root_id
+            self.pending.clear()
+            self.completed.clear()
+            self.failed.clear()
+            self.cursors.clear()
+            return False
+
+    def schedule(self, gid, depth: int, parent_id):
+        with self._lock:
+            self.pending[gid] = (depth, parent_id)
+
+    def complete(self, gid, depth: int, parent_id, node: dict, children: list):
+        with self._lock:
+            self.pending.pop(gid, None)
+            self.failed.pop(gid, None)
+            entry = {"id": gid, "depth": depth, "parent_id": parent_id, "children": list(children)}
+            if self.keep_results:
+                entry["node"] = dict(node, subgroups=[])
+            self.completed[gid] = entry
+        self.maybe_save()
+
+    def fail(self, gid, permanent: bool = False):
+        # Gruppen bliver i pending, så --resume prøver den igen, indtil forsøgene er brugt op
+        with self._lock:
+            self.failed[gid] = self.max_attempts if permanent else self.failed.get(gid, 0) + 1
+
+    def abandoned(self) -> list:
+        with self._lock:
+            return [gid for gid, attempts in self.failed.items() if attempts >= self.max_attempts]
+
+    def retryable(self) -> list:
+        with self._lock:
+            return [gid for gid, attempts in self.failed.items() if attempts < self.max_attempts]
+
+    def frontier(self) -> dict:
+        with self._lock:
+            given_up = {gid for gid, attempts in self.failed.items() if attempts >= self.max_attempts}
+            frontier = {gid: item for gid, item in self.pending.items()
+                        if gid not in given_up and gid not in self.completed}
+            for entry in self.completed.values():
+                for child_id in entry["children"]:
+                    if child_id not in self.completed and child_id not in frontier and child_id not in given_up:
+                        frontier[child_id] = (entry["depth"] + 1, entry["id"])
+            return frontier
+
+    def cursor(self, url: str) -> tuple:
+        with self._lock:
+            entry = self.cursors.get(url)
+            if entry is None:
+                return url, []
+            return entry["next"], [item for page in entry["pages"] for item in page]
+
+    def advance(self, url: str, next_url: Optional[str], page: list):
+        # En halvt hentet liste uden sidernes indhold kan ikke genoptages; den hentes forfra
+        if not self.keep_results:
+            return
+        with self._lock:
+            entry = self.cursors.setdefault(url, {"next": url, "pages": []})
+            entry["next"] = next_url
+            entry["pages"].append(page)
+        self.maybe_save()
+
+    def finish(self, url: str):
+        with self._lock:
+            self.cursors.pop(url, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"completed": len(self.completed), "pending": len(self.pending), "failed": len(self.failed),
+                    "cursors": len(self.cursors)}
+
+    def maybe_save(self):
+        if self._clock() - self._last_save >= self.interval:
+            self.save()
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                data = get_serializer().dumps({
+                    "version": VERSION,
+                    "root_id": self.root_id,
+                    "pending": [[gid, depth, parent_id] for gid, (depth, parent_id) in self.pending.items()],
+                    "completed": list(self.completed.values()),
+                    "failed": [[gid, attempts] for gid, attempts in self.failed.items()],
+                    "cursors": self.cursors,
+                }, compact=True)
+                self._last_save = self._clock()
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
\ No newline at end of file
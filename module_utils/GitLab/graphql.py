@@ -0,0 +1,107 @@
+from typing import Optional
+from module_utils.GitLab.session import GitLabSession
+from module_utils.serializer import get_serializer
+
+# GitLab tillader højst 100 noder pr. side
+PAGE_SIZE = 100
+
+# Kun de felter, Repository.from_api og træet bruger
+GROUP_FIELDS = "id name fullPath parent { id }"
+PROJECT_FIELDS = "id name description webUrl lastActivityAt visibility namespace { id }"
+
+# Begge connections pagineres i samme kald, så antallet af kald er max(grupper, projekter) / 100
+TREE_QUERY = f"""
+query GroupTree($fullPath: ID!, $first: Int!, $groupsAfter: String, $projectsAfter: String,
+                $withGroups: Boolean!, $withProjects: Boolean!) {{
+  group(fullPath: $fullPath) {{
+    {GROUP_FIELDS}
+    descendantGroups(first: $first, after: $groupsAfter) @include(if: $withGroups) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ {GROUP_FIELDS} }}
+    }}
+    projects(includeSubgroups: true, first: $first, after: $projectsAfter) @include(if: $withProjects) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ {PROJECT_FIELDS} }}
+    }}
+  }}
+}}
+"""
+
+class GraphQLError(Exception):
+    pass
+
+
+def gid_to_id(gid) -> Optional[int]:
+    # "gid://gitlab/Group/123" -> 123
+    if gid is None:
+        return None
+    return int(str(gid).rsplit("/", 1)[-1])
+
+
+def to_rest_group(node: dict) -> dict:
+    return {
+        "id": gid_to_id(node["id"]),
+        "name": node["name"],
+        "full_path": node.get("fullPath"),
+        "parent_id": gid_to_id((node.get("parent") or {}).get("id")),
+    }
+
+
+def to_rest_project(node: dict) -> dict:
+    return {
+        "id": gid_to_id(node["id"]),
+        "name": node["name"],
+        "description": node.get("description"),
+        "web_url": node["webUrl"],
+        "last_activity_at": node["lastActivityAt"],
+        "visibility": node.get("visibility"),
+        "namespace": {"id": gid_to_id((node.get("namespace") or {}).get("id"))},
+    }
+
+
+class GitLabGraphQL:
+    def __init__(self, base_url: str, token: str, session: Optional[GitLabSession] = None,
+                 page_size: int = PAGE_SIZE):
+        self.url = f"{base_url.rstrip('/')}/api/graphql"
+        self.headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self.session = session or GitLabSession()
+        self.page_size = page_size
+
+    def execute(self, query: str, variables: Optional[dict] = None, retryable: bool = False) -> dict:
+        serializer = get_serializer()
+        body = serializer.dumps({"query": query, "variables": variables or {}}, compact=True)
+        r = self.session.post(self.url, data=body, headers=self.headers, retryable=retryable)
+        r.raise_for_status()
+
+        payload = serializer.loads(r.content)
+        # GraphQL svarer 200 selv når forespørgslen fejler
+        if payload.get("errors"):
+            raise GraphQLError("; ".join(e.get("message", str(e)) for e in payload["errors"]))
+        return payload["data"]
+
+    def fetch_group(self, full_path: str) -> tuple:
+        variables = {"fullPath": full_path, "first": self.page_size, "groupsAfter": None, "projectsAfter": None,
+                     "withGroups": True, "withProjects": True}
+        root, groups, projects = None, [], []
+
+        while variables["withGroups"] or variables["withProjects"]:
+            # Træ-queryen læser kun, så en 5xx eller tabt forbindelse kan trygt prøves igen
+            group = self.execute(TREE_QUERY, variables, retryable=True)["group"]
+            if group is None:
+                raise GraphQLError(f"Group '{full_path}' not found")
+            root = root or to_rest_group(group)
+
+            for key, cursor, flag, items, convert in (
+                ("descendantGroups", "groupsAfter", "withGroups", groups, to_rest_group),
+                ("projects", "projectsAfter", "withProjects", projects, to_rest_project),
+            ):
+                connection = group.get(key)
+                if connection is None:
+                    variables[flag] = False
+                    continue
+                items.extend(convert(node) for node in connection["nodes"])
+                page_info = connection["pageInfo"]
+                variables[flag] = bool(page_info["hasNextPage"] and page_info["endCursor"])
+                variables[cursor] = page_info["endCursor"]
+
+        return root, groups, projects
\ No newline at end of file
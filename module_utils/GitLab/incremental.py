@@ -0,0 +1,208 @@
+import json
+import os
+import shutil
+import requests
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from module_utils.GitLab.models import Repository, RepositoryTable
+from module_utils.GitLab.traversal import TreeVisitor, walk
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# GitLab opdaterer last_activity_at højst én gang i timen pr. projekt
+DEFAULT_OVERLAP = timedelta(hours=1)
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+@dataclass
+class IndexState:
+    last_run: Optional[str] = None
+    groups: dict = field(default_factory=dict)
+    projects: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> 'IndexState':
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            last_run=data.get("last_run"),
+            groups=data.get("groups", {}),
+            projects=data.get("projects", {}),
+        )
+
+    @classmethod
+    def from_tree(cls, tree: dict, data_path: str, last_run: str) -> 'IndexState':
+        return cls.from_trees([tree], data_path, last_run)
+
+    @classmethod
+    def from_trees(cls, trees: list, data_path: str, last_run: str) -> 'IndexState':
+        state = cls(last_run=last_run)
+        walk(trees, [StateTracker(state, data_path)])
+        return state
+
+    def track(self, group_id, folder: str, project: Optional[dict] = None):
+        self.groups[str(group_id)] = folder
+        if project is not None:
+            self.projects[str(project["id"])] = {"group_id": str(group_id), "name": project["name"]}
+
+    def project_path(self, project_id: str) -> Optional[str]:
+        entry = self.projects.get(project_id)
+        if not entry or entry["group_id"] not in self.groups:
+            return None
+        return os.path.join(self.groups[entry["group_id"]], f"{entry['name']}.json")
+
+    def since(self, overlap: timedelta = DEFAULT_OVERLAP) -> Optional[str]:
+        if not self.last_run:
+            return None
+        last_run = datetime.strptime(self.last_run, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        return (last_run - overlap).strftime(TIMESTAMP_FORMAT)
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class StateTracker(TreeVisitor):
+    def __init__(self, state: IndexState, data_path: str = "data"):
+        self.state = state
+        self.data_path = data_path
+
+    def enter_group(self, group: dict, path: tuple):
+        self.state.track(group["id"], os.path.join(self.data_path, *path))
+
+    def visit_project(self, project: dict, group: dict, path: tuple):
+        self.state.track(group["id"], os.path.join(self.data_path, *path), project)
+
+
+class IncompleteListingError(Exception):
+    pass
+
+
+@dataclass
+class ChangeSet:
+    groups: dict
+    updated: dict = field(default_factory=dict)
+    removed_groups: dict = field(default_factory=dict)
+    removed_projects: set = field(default_factory=set)
+
+
+def group_folders(root: dict, groups: list, data_path: str) -> dict:
+    folders = {str(root["id"]): os.path.join(data_path, root["name"])}
+    children = {}
+    for g in groups:
+        children.setdefault(str(g.get("parent_id")), []).append(g)
+
+    stack = [str(root["id"])]
+    while stack:
+        parent_id = stack.pop()
+        for g in children.get(parent_id, []):
+            folders[str(g["id"])] = os.path.join(folders[parent_id], g["name"])
+            stack.append(str(g["id"]))
+    return folders
+
+
+def confirm_removed(api, gid, root: dict) -> bool:
+    # En gruppe, der mangler i listen, er kun fjernet hvis GitLab bekræfter det; ellers var listen ufuldstændig
+    try:
+        group = api.get_group(gid)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return True
+        raise
+
+    root_path = root.get("full_path")
+    full_path = group.get("full_path") or ""
+    if root_path and full_path != root_path and not full_path.startswith(f"{root_path}/"):
+        return True
+    raise IncompleteListingError(f"Group {gid} ({full_path}) still exists but was missing from the group listing")
+
+
+def collect_changes(api, group_id, state: IndexState, data_path: str = "data",
+                    overlap: timedelta = DEFAULT_OVERLAP) -> ChangeSet:
+    # Grupper er billige at liste; de bruges kun til at finde tilføjelser og fjernelser
+    root = api.get_group(group_id)
+    folders = group_folders(root, api.get_descendant_groups(group_id), data_path)
+    changes = ChangeSet(groups=folders)
+
+    # Flyttede eller omdøbte grupper behandles som fjernet + tilføjet
+    for gid, folder in state.groups.items():
+        if gid in folders:
+            if folders[gid] != folder:
+                changes.removed_groups[gid] = folder
+        elif confirm_removed(api, gid, root):
+            changes.removed_groups[gid] = folder
+
+    for gid, folder in folders.items():
+        if state.groups.get(gid) != folder:
+            for project in api.get_repositories(gid):
+                changes.updated[str(project["id"])] = (project, gid)
+
+    for project in api.get_changed_repositories(group_id, state.since(overlap)):
+        gid = str(project.get("namespace", {}).get("id"))
+        if gid in folders:
+            changes.updated[str(project["id"])] = (project, gid)
+
+    for pid, entry in state.projects.items():
+        if entry["group_id"] in changes.removed_groups and pid not in changes.updated:
+            changes.removed_projects.add(pid)
+
+    return changes
+
+
+def apply_to_tree(changes: ChangeSet, state: IndexState, save_project) -> dict:
+    stats = {"updated": 0, "removed": 0, "failed": 0}
+
+    for pid in changes.removed_projects:
+        path = state.project_path(pid)
+        if path and os.path.exists(path):
+            os.remove(path)
+        state.projects.pop(pid, None)
+        stats["removed"] += 1
+
+    for gid, folder in changes.removed_groups.items():
+        shutil.rmtree(folder, ignore_errors=True)
+
+    for gid, folder in changes.groups.items():
+        if gid not in state.groups or state.groups[gid] != folder:
+            os.makedirs(folder, exist_ok=True)
+
+    old_paths = {pid: state.project_path(pid) for pid in changes.updated}
+    state.groups = dict(changes.groups)
+
+    for pid, (project, gid) in changes.updated.items():
+        folder = changes.groups[gid]
+        if save_project(project, folder):
+            state.projects[pid] = {"group_id": gid, "name": project["name"]}
+            new_path = state.project_path(pid)
+            if old_paths[pid] and old_paths[pid] != new_path and os.path.exists(old_paths[pid]):
+                os.remove(old_paths[pid])
+            stats["updated"] += 1
+        else:
+            stats["failed"] += 1
+
+    return stats
+
+
+def apply_to_records(changes: ChangeSet, state: IndexState, table: RepositoryTable) -> dict:
+    stats = {"updated": 0, "removed": 0}
+
+    for pid in changes.removed_projects:
+        table.remove(int(pid))
+        state.projects.pop(pid, None)
+        stats["removed"] += 1
+
+    state.groups = dict(changes.groups)
+    for pid, (project, gid) in changes.updated.items():
+        table.append(Repository.from_api(project))
+        state.projects[pid] = {"group_id": gid, "name": project["name"]}
+        stats["updated"] += 1
+
+    return stats
\ No newline at end of file
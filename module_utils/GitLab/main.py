@@ -1,101 +1,406 @@
-import json
+import argparse
+import logging
 import os
 import sys
+import requests
 from dotenv import load_dotenv
 from module_utils.GitLab.query import GitLabAPI
 from module_utils.GitLab.models import Repository
+from module_utils.GitLab.session import GitLabSession
+from module_utils.GitLab.cache import ResponseCache
+from module_utils.GitLab.checkpoint import CrawlCheckpoint
+from module_utils.GitLab.incremental import (IncompleteListingError, IndexState, StateTracker, apply_to_tree,
+                                             collect_changes, utc_now)
+from module_utils.GitLab.pipeline import run_pipeline
+from module_utils.GitLab.traversal import TreeVisitor, place_records, walk, walk_tree
+from module_utils.GitLab.profile import get_profile
+from module_utils.GitLab.multiroot import fetch_group_trees, merge_trees, parse_group_ids
+from module_utils.snapshot import SnapshotReader, iter_tree_records, write_snapshot
+from module_utils.store import IndexStore, StoreRows
+from module_utils.serializer import configure, get_serializer
+from module_utils.metrics import get_metrics
+from module_utils.writer import configure_writer, get_writer
+from module_utils.logger import LOG_FORMATS, LOG_LEVELS, configure_logging
+from settings.reports import GroupReport
 from settings.upload import GitLabUploader, upload_local_directory_structure
 
-def save_repository(repo, folder_path):
+log = logging.getLogger(__name__)
+
+
+def save_repository(repo, folder_path, writer=None):
+    writer = writer or get_writer()
     try:
-        os.makedirs(folder_path, exist_ok=True)
+        writer.makedirs(folder_path)
 
         repo_object = Repository.from_api(repo)
-        repo_data = repo_object.__dict__
-
-        print(json.dumps(repo, indent=2, ensure_ascii=False))
+        repo_data = repo_object.to_dict()
+        writer.dump_payload(repo)
 
         file_path = os.path.join(folder_path, f"{repo_object.name}.json")
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(repo_data, f, indent=2, ensure_ascii=False)
+        metrics = get_metrics()
+        with metrics.stage("serialize"):
+            data = get_serializer().dumps(repo_data)
+        # Med en trådpulje køes skrivningen; fejl logges og tælles af writeren
+        if not writer.submit(file_path, data):
+            metrics.inc("repositories_failed")
+            return False
+        metrics.inc("repositories_saved")
 
-        print(f"💾 Saved {repo_object.name} → {file_path}")
+        log.debug(f"💾 Saved {repo_object.name} → {file_path}")
         return True
 
     except Exception as e:
-        print(f"  ❌ Failed to save {repo.get('name', 'unknown')}: {e}")
+        log.error(f"  ❌ Failed to save {repo.get('name', 'unknown')}: {e}")
+        get_metrics().inc("repositories_failed")
         return False
 
 
-def save_group_tree(group_data, parent_path="data"):
-    group_folder = os.path.join(parent_path, group_data["name"])
+class TreeSaver(TreeVisitor):
+    def __init__(self, data_path="data", store=None):
+        self.data_path = data_path
+        self.store = store
+        self.failed_groups = set()
 
-    try:
-        os.makedirs(group_folder, exist_ok=True)
+    def enter_group(self, group, path):
+        folder = os.path.join(self.data_path, *path)
+        try:
+            get_writer().makedirs(folder)
+            if self.store is not None:
+                self.store.add_group(group["id"], folder)
+        except Exception as e:
+            log.error(f"❌ Failed to process group {group.get('name', 'unknown')}: {e}")
+            self.failed_groups.add(group["id"])
 
-        # Gem alle repositories i denne gruppe
-        for repo in group_data["projects"]:
-            save_repository(repo, group_folder)
+    def visit_project(self, project, group, path):
+        if group["id"] in self.failed_groups:
+            return
+        folder = os.path.join(self.data_path, *path)
+        if save_repository(project, folder) and self.store is not None:
+            self.store.add_project(project, group["id"], folder)
+
+
+def save_group_tree(group_data, parent_path="data", store=None, visitors=()):
+    stats = walk_tree(group_data, [TreeSaver(parent_path, store), *visitors])
+    get_writer().flush()
+    return stats
+
+
+def stream_group_tree_to_disk(api, group_id, data_path="data", state=None, max_depth=None, queue_size=1000,
+                              store=None, checkpoint=None):
+    stats = {"groups": 0, "saved": 0, "failed": 0}
+
+    def write(record):
+        folder = os.path.join(data_path, *record.group_path)
+        if state is not None:
+            state.track(record.group_id, folder, record.project)
+
+        if record.project is None:
+            get_writer().makedirs(folder)
+            if store is not None:
+                store.add_group(record.group_id, folder)
+            stats["groups"] += 1
+        elif save_repository(record.project, folder):
+            if store is not None:
+                store.add_project(record.project, record.group_id, folder)
+            stats["saved"] += 1
+        else:
+            stats["failed"] += 1
+
+    # Delte projekter gemmes én gang, under ejergruppen, uanset hvilken gruppe der blev færdig først
+    records = place_records(api.iter_group_projects(group_id, max_depth=max_depth, checkpoint=checkpoint))
+    run_pipeline(records, write, queue_size=queue_size)
+    get_writer().flush()
+    return stats
+
+
+def sync_incremental(api, group_id, state, data_path="data", store=None):
+    log.info(f"⏳ Fetching changes since {state.last_run}...")
+    changes = collect_changes(api, group_id, state, data_path)
+    stats = apply_to_tree(changes, state, save_repository)
+
+    if store is not None:
+        with store.bulk():
+            store.remove_groups(changes.removed_groups)
+            store.remove_projects(changes.removed_projects)
+            for gid, folder in changes.groups.items():
+                store.add_group(gid, folder)
+            for project, gid in changes.updated.values():
+                store.add_project(project, gid, changes.groups[gid])
+
+    log.log(logging.WARNING if stats["failed"] else logging.INFO,
+            f"🔄 Updated: {stats['updated']}, 🗑️  Removed: {stats['removed']}, ❌ Failed: {stats['failed']}",
+            extra={"incremental": stats})
+    return stats["failed"] == 0
+
+
+def exit_if_incomplete(checkpoint) -> bool:
+    # Fejlede grupper ligger i checkpointen og hentes igen med --resume, indtil forsøgene er brugt op
+    retryable = checkpoint.retryable()
+    if retryable:
+        log.error(f"❌ {len(retryable)} groups failed; progress saved to {checkpoint.path}, rerun with --resume")
+        sys.exit(1)
+
+    abandoned = checkpoint.abandoned()
+    if abandoned:
+        log.warning(f"⚠️  Giving up on groups {', '.join(map(str, abandoned))} after {checkpoint.max_attempts} "
+                    f"attempts; saving the partial tree")
+    return bool(abandoned)
+
+
+def env_flag(name):
+    value = os.getenv(name)
+    if not value:
+        return None
+    return value.lower() in ("1", "true", "yes")
 
-        # Gå igennem undergrupper
-        for subgroup in group_data.get("subgroups", []):
-            save_group_tree(subgroup, group_folder)
-    
-    except Exception as e:
-        print(f"❌ Failed to process group {group_data.get('name', 'unknown')}: {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Index a GitLab group hierarchy and upload it")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch projects changed since the previous run")
+    parser.add_argument("--delete-stale", action="store_true",
+                        help="Delete remote index files that no longer exist locally")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write repositories to disk while the crawl is still running")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted crawl from the checkpoint file")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="Write the full index to a compressed snapshot and export data/ from it")
+    parser.add_argument("--dump-payloads", action="store_true", default=os.getenv("GITLAB_DUMP_PAYLOADS") == "1",
+                        help="Log the raw API payload of every saved project")
+    parser.add_argument("--quiet", action="store_true", default=os.getenv("GITLAB_LOG_QUIET") == "1",
+                        help="Only log warnings and errors (for cron runs)")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=os.getenv("GITLAB_LOG_LEVEL", "info"))
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default=os.getenv("GITLAB_LOG_FORMAT", "text"))
+    parser.add_argument("--metrics-json", metavar="PATH", default=os.getenv("GITLAB_METRICS_JSON"),
+                        help="Write a JSON run report with all metrics")
+    parser.add_argument("--metrics-prom", metavar="PATH", default=os.getenv("GITLAB_METRICS_PROM"),
+                        help="Write metrics in Prometheus text format")
+    return parser.parse_args(argv)
 
-def main():
+
+def write_run_report(args, metrics, started, session, cache=None):
+    report = {"started": started, "finished": utc_now(), "http": session.stats()}
+    if cache is not None:
+        report["cache"] = cache.stats()
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, extra=report)
+        log.info(f"📈 Wrote run report to {args.metrics_json}")
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+        log.info(f"📈 Wrote Prometheus metrics to {args.metrics_prom}")
+
+
+def main(argv=None):
     load_dotenv()
+    args = parse_args(argv)
+    configure_logging(args.log_level, args.log_format, quiet=args.quiet)
+    metrics = get_metrics()
     token = os.getenv("GITLAB_TOKEN")
     base_url = os.getenv("GITLAB_BASE_URL")
-    group_id = os.getenv("GITLAB_GROUP_ID")
+    # Flere rødder angives kommasepareret: GITLAB_GROUP_ID=123,456
+    group_ids = parse_group_ids(os.getenv("GITLAB_GROUP_ID"))
+    group_id = group_ids[0] if group_ids else None
+    root_processes = int(os.getenv("GITLAB_ROOT_PROCESSES", "0")) or None
     gitlab_indexer_project_id = os.getenv("GITLAB_UPLOAD_PROJECT_ID")
     branch = os.getenv("GITLAB_UPLOAD_BRANCH", "main")
+    max_workers = int(os.getenv("GITLAB_MAX_WORKERS", "8"))
+    strategy = os.getenv("GITLAB_FETCH_STRATEGY", "recursive")
+    # Tom betyder ubegrænset dybde
+    max_depth = int(os.getenv("GITLAB_MAX_DEPTH") or 0) or None
+    pagination = os.getenv("GITLAB_PAGINATION", "auto")
+    pool_size = int(os.getenv("GITLAB_POOL_SIZE", str(max(max_workers, 10))))
+    state_path = os.getenv("GITLAB_STATE_FILE", ".index_state.json")
+    local_data_path = "data"
+    upload_mode = os.getenv("GITLAB_UPLOAD_MODE", "batch")
+    cache_dir = os.getenv("GITLAB_CACHE_DIR")
+    cache_ttl = os.getenv("GITLAB_CACHE_TTL")
+    cache_max_mb = int(os.getenv("GITLAB_CACHE_MAX_MB", "256"))
+    index_db = os.getenv("GITLAB_INDEX_DB")
+    checkpoint_path = os.getenv("GITLAB_CHECKPOINT_FILE", ".crawl_checkpoint.json")
+    max_group_attempts = int(os.getenv("GITLAB_MAX_GROUP_ATTEMPTS", "3"))
+    report_path = os.getenv("GITLAB_REPORT_FILE")
+    # Trådpuljen hjælper på langsomme eller netværksdiske; lokalt er synkron skrivning hurtigst
+    write_workers = int(os.getenv("GITLAB_WRITE_WORKERS", "0"))
+    profile = get_profile(os.getenv("GITLAB_FETCH_PROFILE", "full"), archived=env_flag("GITLAB_FILTER_ARCHIVED"),
+                          visibility=os.getenv("GITLAB_FILTER_VISIBILITY") or None,
+                          with_shared=env_flag("GITLAB_WITH_SHARED"))
+    configure(os.getenv("GITLAB_JSON_BACKEND") or None,
+              os.getenv("GITLAB_JSON_COMPACT", "").lower() in ("1", "true", "yes"))
+    writer = configure_writer(write_workers, args.dump_payloads)
     
     # Validering
     if not all([token, base_url, group_id, gitlab_indexer_project_id, branch]):
-        print("❌ Missing required environment variables:")
-        print("   - GITLAB_TOKEN")
-        print("   - GITLAB_BASE_URL")
-        print("   - GITLAB_GROUP_ID")
-        print("   - GITLAB_UPLOAD_PROJECT_ID")
-        print("   - GITLAB_UPLOAD_BRANCH")
+        log.error("❌ Missing required environment variables:\n"
+                  "   - GITLAB_TOKEN\n"
+                  "   - GITLAB_BASE_URL\n"
+                  "   - GITLAB_GROUP_ID\n"
+                  "   - GITLAB_UPLOAD_PROJECT_ID\n"
+                  "   - GITLAB_UPLOAD_BRANCH")
 
-    api = GitLabAPI(base_url, token)
+    # Én fælles connection pool til både crawl og upload
+    session = GitLabSession(pool_size=pool_size)
+    cache = None
+    if cache_dir:
+        cache = ResponseCache(cache_dir, max_bytes=cache_max_mb * 1024 * 1024,
+                              ttl=float(cache_ttl) if cache_ttl else None)
+    api = GitLabAPI(base_url, token, max_workers=max_workers, session=session, pagination=pagination,
+                    cache=cache, profile=profile)
 
-    print("⏳ Fetching full GitLab group tree...")
-    tree = api.get_group_tree(group_id, max_depth=3)
+    state = IndexState.load(state_path)
+    started = utc_now()
 
-    if not tree:
-        print("❌ Failed to fetch group tree")
-        sys.exit(1)
+    if args.resume and not os.path.exists(checkpoint_path):
+        log.warning(f"⚠️  No checkpoint found at {checkpoint_path}, starting from scratch")
+    # Ved streaming ligger projekterne på disken; checkpointen holder kun hierarkiet, så hukommelsen forbliver flad
+    keep_results = not (args.stream and len(group_ids) == 1)
+    if args.resume:
+        checkpoint = CrawlCheckpoint.load(checkpoint_path, max_attempts=max_group_attempts, keep_results=keep_results)
+    else:
+        checkpoint = CrawlCheckpoint(checkpoint_path, max_attempts=max_group_attempts, keep_results=keep_results)
+    partial = False
 
-    print("📁 Saving repositories as individual JSON files...")
-    save_group_tree(tree)
+    # Rapporten skrives også når kørslen fejler eller afbrydes
+    try:
+        store = IndexStore(index_db) if index_db else None
 
-    print("\n✅ All repositories saved under the 'data/' folder.")
+        if len(group_ids) > 1 and (args.incremental or args.stream):
+            log.warning("⚠️  --incremental and --stream support a single root group; running a full crawl")
 
-    print("🚀 Starting GitLab Upload...\n")
-    
-    uploader = GitLabUploader(base_url, token, gitlab_indexer_project_id, branch)
+        if args.incremental and state.last_run and len(group_ids) == 1 and not args.resume:
+            try:
+                with metrics.stage("incremental"):
+                    synced = sync_incremental(api, group_id, state, local_data_path, store)
+            except (requests.RequestException, IncompleteListingError) as e:
+                # Intet er ændret lokalt endnu; afbryd før state, upload og delete-stale
+                log.error(f"❌ Incremental sync aborted, nothing was changed: {e}")
+                sys.exit(1)
+            if synced:
+                state.last_run = started
+        elif args.stream and len(group_ids) == 1:
+            log.info("⏳ Streaming GitLab group tree to disk...")
+            state = IndexState(last_run=started)
+            with metrics.stage("crawl"):
+                if store is not None:
+                    with store.bulk(replace=True):
+                        stats = stream_group_tree_to_disk(api, group_id, local_data_path, state, max_depth,
+                                                          store=store, checkpoint=checkpoint)
+                else:
+                    stats = stream_group_tree_to_disk(api, group_id, local_data_path, state, max_depth,
+                                                      checkpoint=checkpoint)
 
-    local_data_path = "data"
+            if stats["groups"] == 0:
+                log.error("❌ Failed to fetch group tree")
+                sys.exit(1)
+            partial = exit_if_incomplete(checkpoint)
+        else:
+            with metrics.stage("crawl"):
+                if len(group_ids) > 1:
+                    log.info(f"⏳ Fetching {len(group_ids)} GitLab group trees in parallel processes...")
+                    results = fetch_group_trees(base_url, token, group_ids, strategy=strategy, max_depth=max_depth,
+                                                max_workers=max_workers, pagination=pagination,
+                                                processes=root_processes, profile=profile)
+                    trees = [result["tree"] for result in results]
+                else:
+                    log.info("⏳ Fetching full GitLab group tree...")
+                    trees = [api.fetch_group_tree(group_id, strategy=strategy, max_depth=max_depth,
+                                                  checkpoint=checkpoint)]
 
-    if not os.path.exists(local_data_path):
-        print(f"❌ Local data directory not found: {local_data_path}")
-        print("   Run main.py first to download data from GitLab")
-        return
-    
-    upload_local_directory_structure(local_data_path, uploader, gitlab_base_path=local_data_path)
-    print("\n✅ Upload complete!")
+            if not all(trees):
+                log.error("❌ Failed to fetch group tree")
+                sys.exit(1)
+            partial = exit_if_incomplete(checkpoint)
+
+            trees, merge_stats = merge_trees(trees)
+            if merge_stats["duplicate_projects"] or merge_stats["duplicate_groups"]:
+                log.info(f"🔀 Merged {merge_stats['roots']} roots: skipped {merge_stats['duplicate_projects']} "
+                         f"duplicate projects and {merge_stats['duplicate_groups']} duplicate groups")
+
+            # Ét gennemløb af træet: filer, SQLite-rækker, tilstand og rapport
+            state = IndexState(last_run=started)
+            visitors = [StateTracker(state, local_data_path)]
+            report = GroupReport() if report_path else None
+            if report is not None:
+                visitors.append(report)
+
+            if args.snapshot:
+                count = write_snapshot(args.snapshot, iter_tree_records(trees))
+                log.info(f"🗜️  Wrote {count} repositories to snapshot {args.snapshot}")
+
+                log.info("📁 Exporting snapshot as individual JSON files...")
+                with SnapshotReader(args.snapshot) as reader:
+                    reader.export_tree(local_data_path, save_repository)
+
+                if store is not None:
+                    with store.bulk(replace=True):
+                        walk(trees, [StoreRows(store, local_data_path), *visitors])
+                else:
+                    walk(trees, visitors)
+            elif store is not None:
+                log.info("📁 Saving repositories as individual JSON files and SQLite rows...")
+                with store.bulk(replace=True):
+                    walk(trees, [TreeSaver(local_data_path, store), *visitors])
+            else:
+                log.info("📁 Saving repositories as individual JSON files...")
+                walk(trees, [TreeSaver(local_data_path), *visitors])
+
+            if report is not None:
+                report.write_csv(report_path)
+                totals = report.totals()
+                log.info(f"📋 Wrote report for {totals['groups']} groups and {totals['projects']} projects "
+                         f"to {report_path}")
+
+        # Alle køede filer skal ligge på disken før tilstanden gemmes og upload starter
+        write_stats = writer.flush()
+        log.log(logging.WARNING if write_stats["failed"] else logging.INFO,
+                f"💾 Files: {write_stats['written']} written, {write_stats['unchanged']} unchanged, "
+                f"{write_stats['failed']} failed", extra={"files": write_stats})
+
+        state.save(state_path)
+        checkpoint.remove()
+        log.info("✅ All repositories saved under the 'data/' folder.")
+        if store is not None:
+            log.info(f"🗃️  Indexed {store.count()} repositories in {index_db}")
+            store.close()
+
+        log.info("🚀 Starting GitLab Upload...")
+
+        uploader = GitLabUploader(base_url, token, gitlab_indexer_project_id, branch, session=session)
+
+        if not os.path.exists(local_data_path):
+            log.error(f"❌ Local data directory not found: {local_data_path}\n"
+                      "   Run main.py first to download data from GitLab")
+            return
+
+        # Et delvist træ mangler de opgivne grupper; deres filer må ikke slettes i repoet
+        delete_stale = args.delete_stale and not partial
+        if args.delete_stale and partial:
+            log.warning("⚠️  Skipping --delete-stale because the crawl is incomplete")
+
+        with metrics.stage("upload"):
+            upload_local_directory_structure(local_data_path, uploader, gitlab_base_path=local_data_path,
+                                             batch=upload_mode == "batch", delete_stale=delete_stale)
+        log.info("✅ Upload complete!")
 
+        stats = session.stats()
+        log.info(f"🔌 HTTP: {stats['requests']} requests, {stats['retries']} retries, "
+                 f"{stats['connections_opened']} connections opened, {stats['connections_reused']} reused")
+        if cache is not None:
+            cache_stats = cache.stats()
+            log.info(f"🗄️  Cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, "
+                     f"{cache_stats['misses']} misses")
 
+        if partial:
+            log.warning("⚠️  Finished with an incomplete group tree")
+            sys.exit(2)
+    finally:
+        writer.close()
+        write_run_report(args, metrics, started, session, cache)
 
 
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
-        print(f"\n❌ Unexpected error: {e}")
\ No newline at end of file
+        log.error(f"❌ Unexpected error: {e}")
\ No newline at end of file
@@ -1,7 +1,11 @@
+import calendar
+import sys
+from array import array
 from dataclasses import dataclass, asdict
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Optional, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class Repository:
     id: int
     name: str
@@ -25,7 +29,7 @@ class Repository:
         return asdict(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Group:
     id: int
     name: str
@@ -44,4 +48,165 @@ class Group:
         )
     
     def to_dict(self) -> dict:
-        return asdict(self)
\ No newline at end of file
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class CrawlRecord:
+    group_id: int
+    group_path: Tuple[str, ...]
+    project: Optional[dict]
+
+
+def parse_timestamp(value: str) -> int:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return calendar.timegm(parsed.utctimetuple()) * 1000 + parsed.microsecond // 1000
+
+
+def format_timestamp(millis: int, with_millis: bool = False) -> str:
+    seconds, fraction = divmod(millis, 1000)
+    text = datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    return f"{text}.{fraction:03d}Z" if with_millis else f"{text}Z"
+
+
+class RepositoryTable:
+    # Kendte synligheder har faste koder; ukendte får nye koder efter behov
+    VISIBILITIES = (None, "private", "internal", "public")
+    SECONDS, MILLIS, RAW = 0, 1, 2
+
+    def __init__(self):
+        self.ids = array("q")
+        self.activity = array("q")
+        self.activity_format = array("b")
+        self.visibility_codes = array("b")
+        self.visibilities = list(self.VISIBILITIES)
+        self.names = []
+        self.descriptions = []
+        self.web_urls = []
+        self._row_by_id = {}
+        # Tidsstempler der ikke kan genskabes præcist fra millisekunder
+        self._raw_activity = {}
+        self._pool = {}
+
+    @classmethod
+    def from_api(cls, projects) -> 'RepositoryTable':
+        table = cls()
+        for data in projects:
+            table.append(Repository.from_api(data))
+        return table
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def __contains__(self, repo_id: int) -> bool:
+        return repo_id in self._row_by_id
+
+    def _pooled(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        return self._pool.setdefault(value, value)
+
+    def _visibility_code(self, visibility: Optional[str]) -> int:
+        try:
+            return self.visibilities.index(visibility)
+        except ValueError:
+            self.visibilities.append(visibility)
+            return len(self.visibilities) - 1
+
+    def append(self, repo: Repository) -> int:
+        if repo.id in self._row_by_id:
+            row = self._row_by_id[repo.id]
+            self._set(row, repo)
+            return row
+
+        row = len(self.ids)
+        self.ids.append(repo.id)
+        self.activity.append(0)
+        self.activity_format.append(self.SECONDS)
+        self.visibility_codes.append(0)
+        self.names.append(None)
+        self.descriptions.append(None)
+        self.web_urls.append(None)
+        self._row_by_id[repo.id] = row
+        self._set(row, repo)
+        return row
+
+    def remove(self, repo_id: int) -> bool:
+        # Rækken efterlades som et hul, så de øvrige rækkenumre ikke flytter sig
+        row = self._row_by_id.pop(repo_id, None)
+        if row is None:
+            return False
+        self._raw_activity.pop(row, None)
+        self.names[row] = self.descriptions[row] = self.web_urls[row] = None
+        return True
+
+    def _live(self, row: int) -> bool:
+        return self._row_by_id.get(self.ids[row]) == row
+
+    def _set(self, row: int, repo: Repository):
+        self._raw_activity.pop(row, None)
+        try:
+            millis = parse_timestamp(repo.last_activity_at)
+        except (AttributeError, ValueError):
+            millis = 0
+        self.activity[row] = millis
+
+        if format_timestamp(millis) == repo.last_activity_at:
+            self.activity_format[row] = self.SECONDS
+        elif format_timestamp(millis, with_millis=True) == repo.last_activity_at:
+            self.activity_format[row] = self.MILLIS
+        else:
+            self.activity_format[row] = self.RAW
+            self._raw_activity[row] = repo.last_activity_at
+
+        self.visibility_codes[row] = self._visibility_code(repo.visibility)
+        self.names[row] = sys.intern(repo.name)
+        self.descriptions[row] = self._pooled(repo.description)
+        self.web_urls[row] = repo.web_url
+
+    def last_activity_at(self, row: int) -> str:
+        fmt = self.activity_format[row]
+        if fmt == self.RAW:
+            return self._raw_activity[row]
+        return format_timestamp(self.activity[row], with_millis=fmt == self.MILLIS)
+
+    def row(self, repo_id: int) -> int:
+        return self._row_by_id[repo_id]
+
+    def get(self, repo_id: int) -> Optional[Repository]:
+        row = self._row_by_id.get(repo_id)
+        return None if row is None else self[row]
+
+    def __getitem__(self, row: int) -> Repository:
+        return Repository(
+            id=self.ids[row],
+            name=self.names[row],
+            description=self.descriptions[row],
+            visibility=self.visibilities[self.visibility_codes[row]],
+            last_activity_at=self.last_activity_at(row),
+            web_url=self.web_urls[row],
+        )
+
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            if self._live(row):
+                yield self[row]
+
+    def to_dicts(self):
+        for repo in self:
+            yield repo.to_dict()
+
+    def active_since(self, since) -> list:
+        # Sammenligning på heltal i stedet for strenge
+        cutoff = parse_timestamp(since) if isinstance(since, str) else int(since)
+        activity = self.activity
+        return [row for row in range(len(activity)) if activity[row] >= cutoff and self._live(row)]
+
+    def with_visibility(self, visibility: Optional[str]) -> list:
+        if visibility not in self.visibilities:
+            return []
+        code = self.visibilities.index(visibility)
+        codes = self.visibility_codes
+        return [row for row in range(len(codes)) if codes[row] == code and self._live(row)]
\ No newline at end of file
@@ -0,0 +1,94 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from module_utils.GitLab.profile import FetchProfile
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.session import GitLabSession
+from module_utils.GitLab.traversal import TreeVisitor, walk
+from module_utils.metrics import Metrics, get_metrics
+
+log = logging.getLogger(__name__)
+
+
+def parse_group_ids(value) -> list:
+    # "123, 456,123" -> ["123", "456"]
+    if value is None:
+        return []
+    items = value.split(",") if isinstance(value, str) else value
+    group_ids = []
+    for item in items:
+        item = str(item).strip()
+        if item and item not in group_ids:
+            group_ids.append(item)
+    return group_ids
+
+
+def crawl_root(base_url: str, token: str, group_id: str, strategy: str = "recursive",
+               max_depth: Optional[int] = None, max_workers: int = 8, pagination: str = "offset",
+               profile: Optional[FetchProfile] = None) -> dict:
+    # Kører i sin egen proces med sin egen connection pool og egne metrics, som forælderen lægger sammen
+    started = time.perf_counter()
+    metrics = Metrics()
+    session = GitLabSession(pool_size=max(max_workers, 10), metrics=metrics)
+    api = GitLabAPI(base_url, token, max_workers=max_workers, session=session, pagination=pagination,
+                    profile=profile)
+    try:
+        tree = api.fetch_group_tree(group_id, strategy=strategy, max_depth=max_depth)
+    except Exception as e:
+        log.error(f"❌ Failed to crawl root group {group_id}: {e}")
+        tree = None
+    return {"group_id": group_id, "tree": tree, "seconds": time.perf_counter() - started,
+            "http": session.stats(), "metrics": metrics.snapshot()}
+
+
+def fetch_group_trees(base_url: str, token: str, group_ids: list, strategy: str = "recursive",
+                      max_depth: Optional[int] = None, max_workers: int = 8, pagination: str = "offset",
+                      processes: Optional[int] = None, profile: Optional[FetchProfile] = None) -> list:
+    args = [(base_url, token, gid, strategy, max_depth, max_workers, pagination, profile) for gid in group_ids]
+    metrics = get_metrics()
+
+    if len(group_ids) <= 1 or processes == 1:
+        results = [crawl_root(*a) for a in args]
+    else:
+        # spawn, så børneprocesserne ikke arver låse og sockets fra forælderens tråde
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes or len(group_ids), mp_context=context) as executor:
+            futures = [executor.submit(crawl_root, *a) for a in args]
+            results = [future.result() for future in futures]
+
+    for result in results:
+        metrics.merge(result["metrics"])
+        metrics.observe("root_crawl_seconds", result["seconds"], root=result["group_id"])
+        metrics.inc("root_http_requests", result["http"]["requests"], root=result["group_id"])
+        status = "✅" if result["tree"] else "❌"
+        log.info(f"{status} Root {result['group_id']}: {result['http']['requests']} requests "
+                 f"in {result['seconds']:.1f}s")
+    return results
+
+
+class TreeCopier(TreeVisitor):
+    def __init__(self):
+        self.roots = []
+        self._open = []
+
+    def enter_group(self, group, path):
+        node = dict(group, projects=[], subgroups=[])
+        (self._open[-1]["subgroups"] if self._open else self.roots).append(node)
+        self._open.append(node)
+
+    def visit_project(self, project, group, path):
+        self._open[-1]["projects"].append(project)
+
+    def leave_group(self, group, path):
+        self._open.pop()
+
+
+def merge_trees(trees: list) -> tuple:
+    # Første rod vinder; walk() springer grupper og projekter over, der allerede er set
+    copier = TreeCopier()
+    stats = walk(trees, [copier])
+    return copier.roots, {"roots": len(copier.roots), "projects": stats["projects"],
+                          "duplicate_projects": stats["duplicate_projects"],
+                          "duplicate_groups": stats["duplicate_groups"]}
\ No newline at end of file
@@ -0,0 +1,111 @@
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from module_utils.serializer import get_serializer
+
+PAGINATION_MODES = ("offset", "keyset", "auto")
+# GitLab understøtter kun keyset med order_by=id på enkelte endpoints; resten følger Link-headeren
+KEYSET_ENDPOINTS = (re.compile(r"/api/v4/projects$"), re.compile(r"/api/v4/users$"))
+
+
+def with_params(url: str, **params) -> str:
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def supports_keyset(url: str) -> bool:
+    path = urlparse(url).path.rstrip("/")
+    return any(pattern.search(path) for pattern in KEYSET_ENDPOINTS)
+
+
+def _is_keyset(url: str) -> bool:
+    # En gemt cursor fra auto mode er allerede en keyset-URL
+    return dict(parse_qsl(urlparse(url).query)).get("pagination") == "keyset"
+
+
+class Paginator:
+    def __init__(self, fetch, max_workers: int = 1, mode: str = "offset"):
+        if mode not in PAGINATION_MODES:
+            raise ValueError(f"Unknown pagination mode '{mode}', expected one of {PAGINATION_MODES}")
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.mode = mode
+
+    def iter_items(self, url: str):
+        for page in self.iter_pages(url):
+            yield from page
+
+    def iter_pages(self, url: str):
+        for page, _ in self.iter_cursor_pages(url):
+            yield page
+
+    def iter_cursor_pages(self, url: str):
+        # Hver side kommer med URL'en til næste side, så en checkpoint kan genoptage derfra
+        if supports_keyset(url) and (self.mode == "keyset" or _is_keyset(url)):
+            yield from self._follow_links(self._keyset_url(url))
+            return
+
+        first = self.fetch(url)
+        first_page = self._decode(first)
+        next_url = first.links.get("next", {}).get("url")
+        total_pages = first.headers.get("X-Total-Pages")
+        if not next_url:
+            yield first_page, None
+            return
+
+        if total_pages:
+            current = int(first.headers.get("X-Page", 1))
+            last = int(total_pages)
+            yield first_page, with_params(url, page=current + 1)
+            pages = range(current + 1, last + 1)
+            for number, page in zip(pages, self._fetch_pages_parallel(url, pages)):
+                yield page, with_params(url, page=number + 1) if number < last else None
+        elif self.mode == "auto" and supports_keyset(url):
+            # Uden X-Total-Pages (over 10.000 resultater) er keyset hurtigst
+            seen = {item.get("id") for item in first_page}
+            keyset_url = self._keyset_url(url)
+            yield first_page, keyset_url
+            for page, cursor in self._follow_links(keyset_url):
+                yield [item for item in page if item.get("id") not in seen], cursor
+        else:
+            yield first_page, next_url
+            yield from self._follow_links(next_url)
+
+    def _follow_links(self, url: str):
+        while url:
+            response = self.fetch(url)
+            url = response.links.get("next", {}).get("url")
+            yield self._decode(response), url
+
+    def _fetch_pages_parallel(self, url: str, pages):
+        urls = [with_params(url, page=page) for page in pages]
+        if self.max_workers <= 1:
+            for page_url in urls:
+                yield self._fetch_json(page_url)
+            return
+
+        # Begrænset vindue, så siderne kan behandles mens resten hentes
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for page_url in urls:
+                pending.append(executor.submit(self._fetch_json, page_url))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _fetch_json(self, url: str):
+        return self._decode(self.fetch(url))
+
+    @staticmethod
+    def _decode(response):
+        # Direkte fra bytes, uden requests' tekst-dekodning
+        return get_serializer().loads(response.content)
+
+    @staticmethod
+    def _keyset_url(url: str) -> str:
+        return with_params(url, pagination="keyset", order_by="id", sort="asc")
\ No newline at end of file
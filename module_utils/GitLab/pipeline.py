@@ -0,0 +1,48 @@
+import queue
+import threading
+
+_DONE = object()
+
+
+def run_pipeline(records, consume, queue_size: int = 1000) -> int:
+    # Crawleren kører i sin egen tråd; køen er begrænset, så hukommelsen holdes flad
+    buffer = queue.Queue(maxsize=queue_size)
+    errors = []
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for record in records:
+                if stop.is_set():
+                    break
+                buffer.put(record)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            buffer.put(_DONE)
+
+    producer = threading.Thread(target=produce, name="crawl-producer", daemon=True)
+    producer.start()
+
+    consumed = 0
+    try:
+        while True:
+            record = buffer.get()
+            if record is _DONE:
+                break
+            consume(record)
+            consumed += 1
+    finally:
+        if producer.is_alive():
+            stop.set()
+            # Tøm køen så produceren ikke hænger på en fuld kø
+            while producer.is_alive():
+                try:
+                    buffer.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        producer.join()
+
+    if errors:
+        raise errors[0]
+    return consumed
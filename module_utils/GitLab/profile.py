@@ -0,0 +1,72 @@
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+PROFILES = ("full", "lean")
+VISIBILITIES = ("private", "internal", "public")
+
+# De felter træet, modellerne og den inkrementelle sync læser
+PROJECT_FIELDS = ("id", "name", "description", "visibility", "last_activity_at", "web_url", "namespace")
+GROUP_FIELDS = ("id", "name", "full_path", "parent_id")
+
+
+@dataclass(frozen=True)
+class FetchProfile:
+    name: str = "full"
+    simple: bool = False
+    statistics: Optional[bool] = None
+    with_custom_attributes: Optional[bool] = None
+    archived: Optional[bool] = None
+    visibility: Optional[str] = None
+    with_shared: Optional[bool] = None
+    project_fields: Optional[Tuple[str, ...]] = None
+    group_fields: Optional[Tuple[str, ...]] = None
+
+    def project_params(self) -> dict:
+        params = self.group_params()
+        # simple=true udelader visibility; uden filter hentes den fulde form og projiceres her i stedet
+        if self.simple and self.visibility is not None:
+            params["simple"] = "true"
+        for key in ("archived", "visibility", "with_shared"):
+            value = getattr(self, key)
+            if value is not None:
+                params[key] = str(value).lower()
+        return params
+
+    def group_params(self) -> dict:
+        params = {}
+        for key in ("statistics", "with_custom_attributes"):
+            value = getattr(self, key)
+            if value is not None:
+                params[key] = str(value).lower()
+        return params
+
+    def project(self, data: dict) -> dict:
+        if self.project_fields is None:
+            return data
+        projected = {key: data.get(key) for key in self.project_fields}
+        if "namespace" in projected:
+            projected["namespace"] = {"id": (data.get("namespace") or {}).get("id")}
+        # simple=true udelader visibility; med et visibility-filter kender vi den alligevel
+        if projected.get("visibility") is None and self.visibility is not None:
+            projected["visibility"] = self.visibility
+        return projected
+
+    def group(self, data: dict) -> dict:
+        if self.group_fields is None:
+            return data
+        return {key: data.get(key) for key in self.group_fields}
+
+
+FULL = FetchProfile()
+LEAN = FetchProfile(name="lean", simple=True, statistics=False, with_custom_attributes=False,
+                    project_fields=PROJECT_FIELDS, group_fields=GROUP_FIELDS)
+
+
+def get_profile(name: str = "full", archived: Optional[bool] = None, visibility: Optional[str] = None,
+                with_shared: Optional[bool] = None) -> FetchProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown fetch profile '{name}', expected one of {PROFILES}")
+    if visibility is not None and visibility not in VISIBILITIES:
+        raise ValueError(f"Unknown visibility '{visibility}', expected one of {VISIBILITIES}")
+    profile = LEAN if name == "lean" else FULL
+    return replace(profile, archived=archived, visibility=visibility, with_shared=with_shared)
\ No newline at end of file
@@ -1,88 +1,366 @@
+import logging
 import requests
 import os
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from module_utils.GitLab.session import GitLabSession
+from module_utils.GitLab.pagination import Paginator, with_params
+from module_utils.GitLab.cache import ResponseCache
+from module_utils.GitLab.graphql import GitLabGraphQL, GraphQLError
+from module_utils.GitLab.profile import FULL, FetchProfile
+from module_utils.GitLab.models import CrawlRecord
+from module_utils.serializer import get_serializer
+
+STRATEGIES = ("recursive", "flat", "graphql")
+
+log = logging.getLogger(__name__)
 
 class GitLabAPI:
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, max_workers: int = 1, session: Optional[GitLabSession] = None,
+                 pagination: str = "offset", cache: Optional[ResponseCache] = None,
+                 profile: Optional[FetchProfile] = None):
         self.base_url = base_url.rstrip('/')
         self.headers = {"PRIVATE-TOKEN": token}
+        self.max_workers = max_workers
+        self.session = session or GitLabSession(pool_size=max(max_workers, 10))
+        self.paginator = Paginator(self._get_page, max_workers=max_workers, mode=pagination)
+        self.cache = cache
+        self.profile = profile or FULL
+        self.graphql = GitLabGraphQL(base_url, token, session=self.session)
 
-    def get_repositories(self, group_id):
+    def get_group(self, group_id):
+        url = f"{self.base_url}/api/v4/groups/{group_id}"
+        return get_serializer().loads(self._get_page(url).content)
+
+    def get_repositories(self, group_id, checkpoint = None):
         url = f"{self.base_url}/api/v4/groups/{group_id}/projects?per_page=100"
-        return self._get_paginated(url)
+        return self._get_projects(url, checkpoint)
+
+    def get_all_repositories(self, group_id, checkpoint = None):
+        url = f"{self.base_url}/api/v4/groups/{group_id}/projects?include_subgroups=true&with_shared=false&per_page=100"
+        return self._get_projects(url, checkpoint)
+
+    def get_changed_repositories(self, group_id, since = None):
+        url = f"{self.base_url}/api/v4/groups/{group_id}/projects?include_subgroups=true&with_shared=false&per_page=100"
+        if since:
+            url += f"&last_activity_after={since}"
+        return self._get_projects(url)
+
+    def get_descendant_groups(self, group_id, checkpoint = None):
+        url = f"{self.base_url}/api/v4/groups/{group_id}/descendant_groups?per_page=100"
+        return self._get_groups(url, checkpoint)
+
+    def _get_projects(self, url, checkpoint = None):
+        params = self.profile.project_params()
+        if params:
+            url = with_params(url, **params)
+        return [self.profile.project(p) for p in self._get_paginated(url, checkpoint)]
+
+    def _get_groups(self, url, checkpoint = None):
+        params = self.profile.group_params()
+        if params:
+            url = with_params(url, **params)
+        return [self.profile.group(g) for g in self._get_paginated(url, checkpoint)]
+
+    def _get_page(self, url):
+        if self.cache is None:
+            r = self.session.get(url, headers=self.headers)
+            r.raise_for_status()
+            return r
+
+        key = self.cache.key(url, self.headers["PRIVATE-TOKEN"])
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.record("hits")
+            return entry.to_response(url)
+
+        headers = dict(self.headers)
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        r = self.session.get(url, headers=headers)
+        if r.status_code == 304 and entry is not None:
+            # Uændret side: genbrug body fra cachen
+            self.cache.record("revalidated")
+            return self.cache.refresh(key, entry, r.headers).to_response(url)
 
-    def _get_paginated(self, url):
+        r.raise_for_status()
+        self.cache.record("misses")
+        if r.headers.get("ETag") or self.cache.ttl is not None:
+            self.cache.put(key, r.content, r.headers.get("ETag"), r.headers)
+        return r
+
+    def iter_paginated(self, url):
+        return self.paginator.iter_items(url)
+
+    def _get_paginated(self, url, checkpoint = None):
+        if checkpoint is not None:
+            return self._get_paginated_resumable(url, checkpoint)
+        # En fejl midt i listen propageres; en afkortet liste ville ligne slettede grupper og projekter
         items = []
+        for page in self.paginator.iter_pages(url):
+            items.extend(page)
+        return items
 
-        while url:
-            try:    
-                r = requests.get(url, headers=self.headers)
-                r.raise_for_status()
-                items.extend(r.json())
-                url = r.links.get("next", {}).get("url")
-            except requests.RequestException as e:
-                print(f"❌ API request failed: {e}")
-                break
+    def _get_paginated_resumable(self, url, checkpoint):
+        # Fortsætter fra den gemte cursor; en fejl propageres, så gruppen kan prøves igen
+        next_url, items = checkpoint.cursor(url)
+        for page, next_url in self.paginator.iter_cursor_pages(next_url):
+            items.extend(page)
+            if next_url:
+                checkpoint.advance(url, next_url, page)
+        checkpoint.finish(url)
         return items
 
-    def get_subgroups(self, group_id):
+    def get_subgroups(self, group_id, checkpoint = None):
         url = f"{self.base_url}/api/v4/groups/{group_id}/subgroups?per_page=100"
-        subgroups = []
-        while url:
-            r = requests.get(url, headers=self.headers)
-            r.raise_for_status()
-            subgroups.extend(r.json())
-            url = r.links.get("next", {}).get("url")
-        return subgroups
+        params = self.profile.group_params()
+        if params:
+            url = with_params(url, **params)
+        if checkpoint is not None:
+            return [self.profile.group(g) for g in self._get_paginated_resumable(url, checkpoint)]
+        return [self.profile.group(g) for g in self.iter_paginated(url)]
 
-    def get_group_tree(self, group_id, current_depth = 0, max_depth = 3):
-        if current_depth >= max_depth:
-            print(f"⚠️  Max depth {max_depth} reached at group {group_id}")
-            return None
+    def fetch_group_tree(self, group_id, strategy = "recursive", max_depth = None, max_workers = None,
+                         checkpoint = None):
+        if strategy == "flat":
+            return self.get_group_tree_flat(group_id, max_workers=max_workers, checkpoint=checkpoint)
+        if strategy == "recursive":
+            return self.get_group_tree(group_id, max_depth=max_depth, max_workers=max_workers, checkpoint=checkpoint)
+        if strategy == "graphql":
+            return self.get_group_tree_graphql(group_id)
+        raise ValueError(f"Unknown fetch strategy '{strategy}', expected one of {STRATEGIES}")
+
+    def get_group_tree_flat(self, group_id, max_workers = None, checkpoint = None):
+        workers = max_workers or self.max_workers
+        if checkpoint is not None:
+            checkpoint.start(group_id)
         try:
-            # Henter gruppens basisdata
-            group_url = f"{self.base_url}/api/v4/groups/{group_id}"
-            group_res = requests.get(group_url, headers=self.headers)
-            group_res.raise_for_status()
-            group_data = group_res.json()
-
-            # Henter gruppens projekter
-            projects = self.get_repositories(group_id)
-
-            # Henter undergrupper
-            subgroups = self.get_subgroups(group_id)
-            
-            # Rekursivt hent undergruppe-træer
-            subgroup_trees = []
-            for sg in subgroups:
-                tree = self.get_group_tree(
-                    sg["id"], 
-                    max_depth=max_depth, 
-                    current_depth=current_depth + 1
-                )
-                if tree:
-                    subgroup_trees.append(tree)
-
-            # Returnerer som hierarkisk struktur
-            return {
-                "id": group_data["id"],
-                "name": group_data["name"],
-                "full_path": group_data.get("full_path"),
-                "projects": [
-                    {
-                        "id": p["id"],
-                        "name": p["name"],
-                        "web_url": p["web_url"],
-                        "last_activity_at": p["last_activity_at"],
-                        "description": p.get("description"),
-                        "visibility": p.get("visibility"),
-                    }
-                    for p in projects
-                ],
-                "subgroups": subgroup_trees,
-            }
+            # Tre paginerede streams i stedet for tre kald pr. gruppe
+            with ThreadPoolExecutor(max_workers=min(workers, 3)) as executor:
+                group_future = executor.submit(self.get_group, group_id)
+                groups_future = executor.submit(self.get_descendant_groups, group_id, checkpoint)
+                projects_future = executor.submit(self.get_all_repositories, group_id, checkpoint)
+                group_data = group_future.result()
+                groups = groups_future.result()
+                projects = projects_future.result()
+
+            return self._build_tree_from_flat(group_data, groups, projects)
         except requests.RequestException as e:
-            print(f"❌ Failed to fetch group {group_id}: {e}")
+            log.error(f"❌ Failed to fetch group {group_id}: {e}")
+            if checkpoint is not None:
+                checkpoint.fail(group_id)
+                checkpoint.save()
+            return None
+        except KeyError as e:
+            log.error(f"❌ Missing expected field in API response: {e}")
+            return None
+
+    def get_group_tree_graphql(self, group_id):
+        try:
+            # GraphQL slår grupper op på sti; et numerisk ID koster ét REST-kald
+            full_path = str(group_id)
+            if full_path.isdigit():
+                full_path = self.get_group(group_id)["full_path"]
+
+            root, groups, projects = self.graphql.fetch_group(full_path)
+            return self._build_tree_from_flat(root, groups, projects)
+        except (requests.RequestException, GraphQLError) as e:
+            log.error(f"❌ Failed to fetch group {group_id}: {e}")
             return None
         except KeyError as e:
-            print(f"❌ Missing expected field in API response: {e}")
-            return None
\ No newline at end of file
+            log.error(f"❌ Missing expected field in API response: {e}")
+            return None
+
+    def get_group_tree(self, group_id, current_depth = 0, max_depth = None, max_workers = None, checkpoint = None):
+        if max_depth is not None and current_depth >= max_depth:
+            log.warning(f"⚠️  Max depth {max_depth} reached at group {group_id}")
+            return None
+
+        # Én iterativ crawler for alle tilfælde; med én worker hentes grupperne sekventielt
+        workers = max_workers or self.max_workers
+        return self._get_group_tree_concurrent(group_id, current_depth, max_depth, workers, checkpoint)
+
+    def _get_group_tree_concurrent(self, group_id, current_depth, max_depth, max_workers, checkpoint = None):
+        nodes = {}
+        children = {}
+        for gid, _, node, child_ids in self._crawl_groups(group_id, current_depth, max_depth, max_workers,
+                                                          checkpoint):
+            nodes[gid] = node
+            children[gid] = child_ids
+
+        for gid, node in nodes.items():
+            node["subgroups"] = [nodes[c] for c in children.get(gid, []) if c in nodes]
+
+        return nodes.get(group_id)
+
+    def iter_group_projects(self, group_id, max_depth = None, max_workers = None, checkpoint = None):
+        workers = max_workers or self.max_workers
+        paths = {}
+        waiting = {}
+
+        for gid, parent_id, node, _ in self._crawl_groups(group_id, 0, max_depth, workers, checkpoint):
+            ready = [(gid, parent_id, node)]
+            while ready:
+                gid, parent_id, node = ready.pop()
+
+                # En undergruppe kan blive færdig før sin forælder; vent på forælderens sti
+                if parent_id is None:
+                    path = (node["name"],)
+                elif parent_id in paths:
+                    path = paths[parent_id] + (node["name"],)
+                else:
+                    waiting.setdefault(parent_id, []).append((gid, parent_id, node))
+                    continue
+
+                paths[gid] = path
+                yield CrawlRecord(node["id"], path, None)
+                for project in node["projects"]:
+                    yield CrawlRecord(node["id"], path, project)
+                ready.extend(waiting.pop(gid, []))
+
+    def _crawl_groups(self, group_id, current_depth, max_depth, max_workers, checkpoint = None):
+        endpoints = {
+            "group": self.get_group,
+            "projects": self.get_repositories,
+            "subgroups": self.get_subgroups,
+        }
+        if checkpoint is not None:
+            endpoints["projects"] = partial(self.get_repositories, checkpoint=checkpoint)
+            endpoints["subgroups"] = partial(self.get_subgroups, checkpoint=checkpoint)
+        pending = {}
+        results = {}
+        parents = {}
+        depths = {}
+        children = {}
+        failed = set()
+
+        def schedule(gid, depth, parent_id, known_children = None):
+            results[gid] = {}
+            parents[gid] = parent_id
+            depths[gid] = depth
+            if checkpoint is not None:
+                checkpoint.schedule(gid, depth, parent_id)
+            for kind, fetch in endpoints.items():
+                if kind == "subgroups" and known_children is not None:
+                    # Undergrupperne er allerede i checkpointen; kun gruppen og dens projekter listes igen
+                    results[gid][kind] = [{"id": child_id} for child_id in known_children]
+                    continue
+                pending[executor.submit(fetch, gid)] = (kind, gid, depth)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                if checkpoint is not None and checkpoint.start(group_id):
+                    # Færdige grupper genbruges; resten, inkl. fejlede, hentes igen
+                    completed = list(checkpoint.completed.values())
+                    for entry in completed:
+                        parents[entry["id"]] = entry["parent_id"]
+                        children[entry["id"]] = entry["children"]
+                    frontier = {gid: item for gid, item in checkpoint.frontier().items()
+                                if max_depth is None or item[0] < max_depth or item[1] is None}
+                    relist = [entry for entry in completed if "node" not in entry]
+                    log.info(f"♻️  Resuming crawl: {len(completed)} groups from checkpoint "
+                             f"({len(relist)} to re-list), {len(frontier)} left to fetch")
+                    for gid, (depth, parent_id) in frontier.items():
+                        schedule(gid, depth, parent_id)
+                    for entry in relist:
+                        schedule(entry["id"], entry["depth"], entry["parent_id"], entry["children"])
+                    for entry in completed:
+                        if "node" in entry:
+                            yield entry["id"], entry["parent_id"], dict(entry["node"], subgroups=[]), entry["children"]
+                else:
+                    schedule(group_id, current_depth, None)
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, gid, depth = pending.pop(future)
+                        try:
+                            results[gid][kind] = future.result()
+                        except requests.RequestException as e:
+                            if gid not in failed:
+                                log.error(f"❌ Failed to fetch group {gid}: {e}")
+                                if checkpoint is not None:
+                                    # En slettet gruppe (404) kommer ikke igen; den opgives med det samme
+                                    response = getattr(e, "response", None)
+                                    checkpoint.fail(gid, permanent=response is not None and response.status_code == 404)
+                            failed.add(gid)
+                            continue
+
+                        # Start undergrupperne så snart vi kender dem
+                        if kind == "subgroups":
+                            try:
+                                children[gid] = [sg["id"] for sg in results[gid]["subgroups"]]
+                            except KeyError as e:
+                                log.error(f"❌ Missing expected field in API response: {e}")
+                                failed.add(gid)
+                                continue
+                            for child_id in children[gid]:
+                                if max_depth is not None and depth + 1 >= max_depth:
+                                    log.warning(f"⚠️  Max depth {max_depth} reached at group {child_id}")
+                                elif child_id not in parents:
+                                    schedule(child_id, depth + 1, gid)
+
+                        if len(results[gid]) == len(endpoints) and gid not in failed:
+                            parts = results.pop(gid)
+                            try:
+                                node = self._build_group_node(parts["group"], parts["projects"], [])
+                            except KeyError as e:
+                                log.error(f"❌ Missing expected field in API response: {e}")
+                                failed.add(gid)
+                                continue
+                            if checkpoint is not None:
+                                checkpoint.complete(gid, depths[gid], parents[gid], node, children.get(gid, []))
+                            yield gid, parents[gid], node, children.get(gid, [])
+            except BaseException:
+                # Afbrudt kørsel: gem det, der nåede at blive færdigt
+                if checkpoint is not None:
+                    checkpoint.save()
+                raise
+
+        if checkpoint is not None and failed:
+            checkpoint.save()
+
+    @classmethod
+    def _build_tree_from_flat(cls, root_data, groups, projects):
+        root = cls._build_group_node(root_data, [], [])
+        nodes = {root["id"]: root}
+        for g in groups:
+            nodes[g["id"]] = cls._build_group_node(g, [], [])
+
+        # Projekter placeres i deres namespace, undergrupper under deres parent
+        for p in projects:
+            namespace_id = p.get("namespace", {}).get("id")
+            if namespace_id in nodes:
+                nodes[namespace_id]["projects"].append(cls._project_summary(p))
+
+        for g in groups:
+            parent = nodes.get(g.get("parent_id"))
+            if parent is not None:
+                parent["subgroups"].append(nodes[g["id"]])
+
+        return root
+
+    @classmethod
+    def _build_group_node(cls, group_data, projects, subgroup_trees):
+        return {
+            "id": group_data["id"],
+            "name": group_data["name"],
+            "full_path": group_data.get("full_path"),
+            "projects": [cls._project_summary(p) for p in projects],
+            "subgroups": subgroup_trees,
+        }
+
+    @staticmethod
+    def _project_summary(p):
+        return {
+            "id": p["id"],
+            "name": p["name"],
+            "web_url": p["web_url"],
+            "last_activity_at": p["last_activity_at"],
+            "description": p.get("description"),
+            "visibility": p.get("visibility"),
+            # Ejergruppen; delte projekter placeres efter den i alle stier
+            "namespace": {"id": (p.get("namespace") or {}).get("id")},
+        }
\ No newline at end of file
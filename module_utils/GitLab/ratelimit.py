@@ -0,0 +1,139 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def retry_after_seconds(headers, now: float, default: float = 1.0) -> float:
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp() - now, 0.0)
+            except (TypeError, ValueError):
+                pass
+
+    reset = headers.get("RateLimit-Reset")
+    if reset is not None:
+        try:
+            return max(float(reset) - now, 0.0)
+        except ValueError:
+            pass
+
+    return default
+
+
+class RateLimiter:
+    def __init__(self, max_concurrency: int = 16, min_concurrency: int = 1,
+                 initial_concurrency: Optional[int] = None, max_rate: Optional[float] = None,
+                 target_latency: float = 2.0, clock=time.monotonic, wall_clock=time.time,
+                 sleep=time.sleep):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._cond = threading.Condition()
+
+        # AIMD-styret antal samtidige requests
+        self._limit = float(initial_concurrency or max(min_concurrency, max_concurrency // 2))
+        self._in_flight = 0
+        self._last_decrease = None
+
+        # Token bucket; rate er None indtil serveren fortæller os andet
+        self._rate = max_rate
+        self._capacity = float(max_concurrency)
+        self._tokens = self._capacity
+        self._last_refill = clock()
+        self._paused_until = 0.0
+
+        self.remaining = None
+        self.throttled = 0
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._limit)
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+        while True:
+            with self._cond:
+                delay = self._reserve()
+            if delay <= 0:
+                return
+            self._sleep(delay)
+
+    def release(self, response=None, latency: Optional[float] = None, error: bool = False):
+        with self._cond:
+            self._in_flight -= 1
+
+            if response is not None:
+                self._update_budget(response.headers)
+
+            if response is not None and response.status_code == 429:
+                self.throttled += 1
+                wait = retry_after_seconds(response.headers, self._wall_clock())
+                self._paused_until = max(self._paused_until, self._clock() + wait)
+                self._decrease()
+            elif error or (latency is not None and latency > self.target_latency):
+                self._decrease()
+            elif response is not None:
+                # Additiv stigning: ca. +1 pr. "vindue" af vellykkede requests
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+
+            self._cond.notify_all()
+
+    def _reserve(self) -> float:
+        now = self._clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self._rate is None:
+            return 0.0
+
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    def _update_budget(self, headers):
+        remaining = headers.get("RateLimit-Remaining")
+        reset = headers.get("RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+
+        try:
+            remaining = int(remaining)
+            window = max(float(reset) - self._wall_clock(), 1.0)
+        except ValueError:
+            return
+
+        self.remaining = remaining
+        if remaining <= 0:
+            self._paused_until = max(self._paused_until, self._clock() + window)
+            return
+
+        # Fordel det resterende budget jævnt over resten af vinduet
+        derived = remaining / window
+        self._rate = min(self.max_rate, derived) if self.max_rate else derived
+
+    def _decrease(self):
+        now = self._clock()
+        if self._last_decrease is not None and now - self._last_decrease < self.target_latency:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_concurrency), self._limit / 2)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+import requests
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from module_utils.GitLab.ratelimit import RateLimiter
+from module_utils.metrics import Metrics, endpoint_name, get_metrics
+
+RETRY_STATUSES = {500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class GitLabSession:
+    def __init__(self, pool_size: int = 10, timeout: float = 30, max_retries: int = 3,
+                 backoff_factor: float = 0.5, backoff_max: float = 30, sleep=time.sleep,
+                 rate_limiter: Optional[RateLimiter] = None, max_rate_limit_retries: int = 10,
+                 metrics: Optional[Metrics] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.rate_limiter = rate_limiter or RateLimiter(max_concurrency=pool_size, sleep=sleep)
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self.metrics = metrics or get_metrics()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "throttled": 0}
+
+        # Én pool pr. host, som genbruger forbindelser på tværs af tråde
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+    def request(self, method: str, url: str, retryable: Optional[bool] = None, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        method = method.upper()
+        # Kaldere kan markere en POST som sikker at gentage, fx en skrivebeskyttet GraphQL-query
+        if retryable is None:
+            retryable = method in RETRY_METHODS
+        endpoint = endpoint_name(url)
+        attempt = 0
+        throttled = 0
+
+        while True:
+            self._count("requests")
+            self.rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                latency = time.monotonic() - started
+                self.rate_limiter.release(latency=latency, error=True)
+                self._record(method, endpoint, "error", latency, kwargs)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            except BaseException:
+                # Alle andre fejl (fx ChunkedEncodingError) skal også give pladsen i limiteren tilbage
+                latency = time.monotonic() - started
+                self.rate_limiter.release(latency=latency, error=True)
+                self._record(method, endpoint, "error", latency, kwargs)
+                raise
+            else:
+                latency = time.monotonic() - started
+                self.rate_limiter.release(response, latency=latency)
+                self._record(method, endpoint, response.status_code, latency, kwargs, response)
+
+                # 429 er aldrig behandlet af serveren, så alle metoder kan prøves igen
+                if response.status_code == 429 and throttled < self.max_rate_limit_retries:
+                    throttled += 1
+                    self._count("throttled")
+                    self.metrics.inc("http_throttled", method=method, endpoint=endpoint)
+                    response.close()
+                    continue
+
+                if not retryable or response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                response.close()
+
+            attempt += 1
+            self._count("retries")
+            self.metrics.inc("http_retries", method=method, endpoint=endpoint)
+            self._sleep(self._backoff(attempt))
+
+    def _record(self, method: str, endpoint: str, status, latency: float, kwargs: dict, response=None):
+        self.metrics.inc("http_requests", method=method, endpoint=endpoint, status=status)
+        self.metrics.observe("http_request_duration_seconds", latency, method=method, endpoint=endpoint)
+
+        sent = kwargs.get("data")
+        if isinstance(sent, (bytes, str)):
+            self.metrics.inc("http_request_bytes", len(sent), endpoint=endpoint)
+        if response is not None:
+            received = _received_bytes(response, kwargs.get("stream", False))
+            if received:
+                self.metrics.inc("http_response_bytes", received, endpoint=endpoint)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, retryable: bool = False, **kwargs) -> requests.Response:
+        return self.request("POST", url, retryable=retryable, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def _backoff(self, attempt: int) -> float:
+        # Eksponentiel backoff med "full jitter"
+        ceiling = min(self.backoff_max, self.backoff_factor * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def stats(self) -> dict:
+        opened = 0
+        sent = 0
+        for adapter in set(self.session.adapters.values()):
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                sent += pool.num_requests
+
+        with self._lock:
+            stats = dict(self._counters)
+        stats["connections_opened"] = opened
+        stats["connections_reused"] = max(sent - opened, 0)
+        stats["reuse_ratio"] = round(stats["connections_reused"] / sent, 3) if sent else 0.0
+        stats["concurrency"] = self.rate_limiter.concurrency
+        return stats
+
+    def close(self):
+        self.session.close()
+
+
+def _received_bytes(response: requests.Response, stream: bool) -> int:
+    # Bytes læst fra forbindelsen, dvs. før gzip-udpakning; chunked svar har ingen Content-Length
+    try:
+        received = response.raw.tell()
+    except (AttributeError, OSError):
+        received = 0
+    if received:
+        return received
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length)
+    # Et streamet svar er ikke læst endnu og må ikke læses her
+    return 0 if stream else len(response.content or b"")
\ No newline at end of file
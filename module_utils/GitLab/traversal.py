@@ -0,0 +1,110 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class TreeVisitor:
+    def enter_group(self, group: dict, path: tuple):
+        pass
+
+    def visit_project(self, project: dict, group: dict, path: tuple):
+        pass
+
+    def leave_group(self, group: dict, path: tuple):
+        pass
+
+
+def owner_id(project: dict):
+    return (project.get("namespace") or {}).get("id")
+
+
+def project_placements(trees) -> dict:
+    # Et delt projekt hører til sin namespace-gruppe; findes den ikke i træet, vinder gruppen med den mindste sti
+    owned, shared = {}, {}
+    seen_groups = set()
+    stack = [(tree, ()) for tree in reversed(trees) if tree]
+    while stack:
+        group, path = stack.pop()
+        if group["id"] in seen_groups:
+            continue
+        seen_groups.add(group["id"])
+        path = path + (group["name"],)
+        for project in group.get("projects", []):
+            if owner_id(project) == group["id"]:
+                owned[project["id"]] = group["id"]
+            elif project["id"] not in shared or path < shared[project["id"]][0]:
+                shared[project["id"]] = (path, group["id"])
+        stack.extend((subgroup, path) for subgroup in reversed(group.get("subgroups", [])) if subgroup)
+
+    placements = {pid: gid for pid, (_, gid) in shared.items()}
+    placements.update(owned)
+    return placements
+
+
+def walk(trees, visitors, root_path: tuple = ()) -> dict:
+    # Eksplicit stak: ingen rekursionsgrænse, og hver gruppe og hvert projekt besøges én gang
+    stats = {"groups": 0, "projects": 0, "duplicate_groups": 0, "duplicate_projects": 0}
+    seen_groups, seen_projects = set(), set()
+    placements = project_placements(trees)
+    stack = [(tree, tuple(root_path), False) for tree in reversed(trees) if tree]
+
+    while stack:
+        group, path, leaving = stack.pop()
+        if leaving:
+            for visitor in visitors:
+                visitor.leave_group(group, path)
+            continue
+
+        if group["id"] in seen_groups:
+            stats["duplicate_groups"] += 1
+            continue
+        seen_groups.add(group["id"])
+        stats["groups"] += 1
+
+        path = path + (group["name"],)
+        for visitor in visitors:
+            visitor.enter_group(group, path)
+
+        for project in group.get("projects", []):
+            if project["id"] in seen_projects or placements.get(project["id"], group["id"]) != group["id"]:
+                stats["duplicate_projects"] += 1
+                continue
+            seen_projects.add(project["id"])
+            stats["projects"] += 1
+            for visitor in visitors:
+                visitor.visit_project(project, group, path)
+
+        stack.append((group, path, True))
+        for subgroup in reversed(group.get("subgroups", [])):
+            if subgroup:
+                stack.append((subgroup, path, False))
+
+    if stats["duplicate_groups"] or stats["duplicate_projects"]:
+        log.debug(f"🔁 Skipped {stats['duplicate_groups']} duplicate groups and "
+                  f"{stats['duplicate_projects']} duplicate projects")
+    return stats
+
+
+def walk_tree(tree, visitors, root_path: tuple = ()) -> dict:
+    return walk([tree], visitors, root_path)
+
+
+def place_records(records):
+    # Strømmende modstykke til project_placements: delte projekter venter på ejergruppen,
+    # så placeringen ikke afhænger af den rækkefølge grupperne bliver færdige i
+    placed, shared = set(), {}
+    for record in records:
+        project = record.project
+        if project is None:
+            yield record
+        elif project["id"] in placed:
+            continue
+        elif owner_id(project) == record.group_id:
+            placed.add(project["id"])
+            yield record
+        elif project["id"] not in shared or record.group_path < shared[project["id"]].group_path:
+            shared[project["id"]] = record
+
+    for pid, record in sorted(shared.items()):
+        if pid not in placed:
+            yield record
\ No newline at end of file
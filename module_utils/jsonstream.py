@@ -0,0 +1,79 @@
+import os
+import tempfile
+import time
+from typing import Optional
+from module_utils.metrics import get_metrics
+from module_utils.serializer import Serializer, get_serializer
+
+OUTPUT_FORMATS = ("json", "jsonl")
+
+
+class AtomicJsonWriter:
+    def __init__(self, path: str, output_format: str = "json", serializer: Optional[Serializer] = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}")
+        self.path = path
+        self.output_format = output_format
+        self.serializer = serializer or get_serializer()
+        self.count = 0
+        self.serialize_seconds = 0.0
+        self.write_seconds = 0.0
+        self._file = None
+        self._tmp_path = None
+
+    def __enter__(self) -> 'AtomicJsonWriter':
+        # Midlertidig fil i samme mappe, så os.replace er atomisk
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, self._tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(self.path), dir=directory)
+        self._file = os.fdopen(fd, "wb")
+        if self.output_format == "json":
+            self._file.write(b"[")
+        return self
+
+    def write(self, record: dict):
+        started = time.perf_counter()
+        if self.output_format == "jsonl":
+            chunks = (self.serializer.dumps(record, compact=True), b"\n")
+        elif self.serializer.compact:
+            chunks = (b"," if self.count else b"", self.serializer.dumps(record))
+        else:
+            # Samme layout som json.dump(liste, indent=2), én post ad gangen
+            body = self.serializer.dumps(record)
+            chunks = (b",\n" if self.count else b"\n", b"  " + body.replace(b"\n", b"\n  "))
+        serialized = time.perf_counter()
+        for chunk in chunks:
+            self._file.write(chunk)
+        self.serialize_seconds += serialized - started
+        self.write_seconds += time.perf_counter() - serialized
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if self.output_format == "json":
+                    pretty = self.count and not self.serializer.compact
+                    self._file.write(b"\n]" if pretty else b"]")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.path)
+                metrics = get_metrics()
+                metrics.observe("stage_duration_seconds", self.serialize_seconds, stage="serialize")
+                metrics.observe("stage_duration_seconds", self.write_seconds, stage="write")
+                metrics.inc("records_written", self.count, format=self.output_format)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        return False
+
+
+def read_records(path: str, output_format: str = "json", serializer: Optional[Serializer] = None):
+    serializer = serializer or get_serializer()
+    with open(path, "rb") as f:
+        if output_format == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield serializer.loads(line)
+        else:
+            yield from serializer.loads(f.read())
\ No newline at end of file
@@ -0,0 +1,45 @@
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+LOG_FORMATS = ("text", "json")
+LOG_LEVELS = ("debug", "info", "warning", "error")
+
+# Standardfelterne på en LogRecord; alt andet kommer fra extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage().strip(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = "info", fmt: str = "text", quiet: bool = False, stream=None) -> logging.Logger:
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}', expected one of {LOG_FORMATS}")
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Unknown log level '{level}', expected one of {LOG_LEVELS}")
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if getattr(h, "_indexer", False)]:
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler._indexer = True
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+    root.addHandler(handler)
+    # Quiet til cron: kun advarsler og fejl
+    root.setLevel(logging.WARNING if quiet else getattr(logging, level.upper()))
+    return root
\ No newline at end of file
@@ -0,0 +1,173 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+PREFIX = "gitlab_indexer_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NUMERIC = re.compile(r"^\d+$")
+
+
+def endpoint_name(url: str) -> str:
+    # /api/v4/groups/123/projects -> /groups/:id/projects
+    parts = urlparse(url).path.split("/")
+    if parts[1:3] == ["api", "v4"]:
+        parts = parts[3:]
+    normalized = []
+    for part in parts:
+        if not part:
+            continue
+        if normalized and normalized[-1] == "files":
+            normalized.append(":path")
+            break
+        normalized.append(":id" if _NUMERIC.match(part) else part)
+    return "/" + "/".join(normalized)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.buckets = tuple(buckets)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(self.buckets)}
+            histogram["count"] += 1
+            histogram["sum"] += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", self._clock() - started, stage=name)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            if labels:
+                return self._counters.get((name, _label_key(labels)), 0)
+            return sum(value for (counter, _), value in self._counters.items() if counter == name)
+
+    def histogram(self, name: str, **labels) -> Optional[dict]:
+        with self._lock:
+            histogram = self._histograms.get((name, _label_key(labels)))
+            return None if histogram is None else dict(histogram, buckets=list(histogram["buckets"]))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                           for (name, labels), value in sorted(self._gauges.items())],
+                "histograms": [{"name": name, "labels": dict(labels), "count": h["count"], "sum": h["sum"],
+                                "buckets": dict(zip(map(str, self.buckets), h["buckets"]))}
+                               for (name, labels), h in sorted(self._histograms.items())],
+            }
+
+    def merge(self, snapshot: dict):
+        # Snapshot fra en anden proces: tællere og histogrammer lægges til, gauges overskrives
+        with self._lock:
+            for item in snapshot.get("counters", []):
+                key = (item["name"], _label_key(item["labels"]))
+                self._counters[key] = self._counters.get(key, 0) + item["value"]
+            for item in snapshot.get("gauges", []):
+                self._gauges[(item["name"], _label_key(item["labels"]))] = item["value"]
+            for item in snapshot.get("histograms", []):
+                key = (item["name"], _label_key(item["labels"]))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(self.buckets)}
+                histogram["count"] += item["count"]
+                histogram["sum"] += item["sum"]
+                for i, bound in enumerate(self.buckets):
+                    histogram["buckets"][i] += item["buckets"].get(str(bound), 0)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for kind, items in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in items}):
+                    metric = PREFIX + name + ("_total" if kind == "counter" else "")
+                    lines.append(f"# TYPE {metric} {kind}")
+                    for (item_name, labels), value in sorted(items.items()):
+                        if item_name == name:
+                            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+            for name in sorted({name for name, _ in self._histograms}):
+                metric = PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for (item_name, labels), h in sorted(self._histograms.items()):
+                    if item_name != name:
+                        continue
+                    for bound, count in zip(self.buckets, h["buckets"]):
+                        lines.append(f"{metric}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {h['count']}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {h['sum']}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str, extra: Optional[dict] = None):
+        report = dict(extra or {})
+        report["metrics"] = self.snapshot()
+        _write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path: str):
+        # Atomisk, så node_exporters textfile-collector aldrig læser en halv fil
+        _write_atomic(path, self.to_prometheus())
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_default = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _default
\ No newline at end of file
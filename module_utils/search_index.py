@@ -0,0 +1,340 @@
+import argparse
+import json
+import mmap
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from urllib.parse import urlparse
+from module_utils.jsonstream import read_records
+
+MAGIC = b"RIDX0001"
+HEADER = struct.Struct("<8s?I")
+SECTION = struct.Struct("<QQ")
+
+# Felter og deres vægt i rangeringen
+FIELD_WEIGHTS = (("name", 4), ("full_path", 2), ("description", 1))
+QUERY_MODES = ("auto", "prefix", "substring", "fuzzy")
+
+# Sektionerne i den binære fil, i fast rækkefølge
+SECTIONS = (
+    ("doc_offsets", "Q"), ("doc_blob", "B"),
+    ("term_offsets", "Q"), ("term_blob", "B"),
+    ("post_start", "I"), ("post_docs", "I"), ("post_weights", "B"),
+    ("gram_keys", "Q"), ("gram_start", "I"), ("gram_terms", "I"),
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text) -> list:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def trigram_key(gram: str) -> int:
+    return (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+
+
+def trigrams(text: str, padded: bool = True) -> set:
+    if padded:
+        text = f"  {text} "
+    return {trigram_key(text[i:i + 3]) for i in range(len(text) - 2)}
+
+
+def max_typos(token: str) -> int:
+    return 0 if len(token) < 4 else 1 if len(token) < 8 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    # Levenshtein med ombytninger (OSA), afbrudt når grænsen overskrides
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+def group_full_path(record: dict) -> str:
+    if record.get("full_path"):
+        return record["full_path"]
+    if record.get("group_path"):
+        group_path = record["group_path"]
+        return "/".join(group_path) if isinstance(group_path, (list, tuple)) else group_path
+    # Repository-dicts har ingen gruppesti, men web_url indeholder den
+    path = urlparse(record.get("web_url") or "").path.strip("/")
+    return path.rsplit("/", 1)[0] if "/" in path else ""
+
+
+class _StringTable:
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+
+class _DocTable(_StringTable):
+    def __getitem__(self, index: int) -> dict:
+        return json.loads(super().__getitem__(index))
+
+
+def _pack_strings(values) -> tuple:
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, array("B", blob)
+
+
+class SearchIndex:
+    def __init__(self, sections: dict, mapped=None):
+        self._sections = sections
+        self._mapped = mapped
+        self.docs = _DocTable(sections["doc_offsets"], sections["doc_blob"])
+        self.terms = _StringTable(sections["term_offsets"], sections["term_blob"])
+
+    @classmethod
+    def build(cls, records) -> 'SearchIndex':
+        docs = []
+        postings = {}
+        for record in records:
+            doc = {
+                "id": record["id"],
+                "name": record["name"],
+                "description": record.get("description"),
+                "full_path": group_full_path(record),
+                "web_url": record.get("web_url"),
+            }
+            doc_id = len(docs)
+            docs.append(json.dumps(doc, ensure_ascii=False, separators=(",", ":")))
+            for field, weight in FIELD_WEIGHTS:
+                for token in tokenize(doc[field]):
+                    entry = postings.setdefault(token, {})
+                    entry[doc_id] = max(entry.get(doc_id, 0), weight)
+
+        terms = sorted(postings)
+        post_start, post_docs, post_weights = array("I", [0]), array("I"), array("B")
+        grams = {}
+        for term_id, term in enumerate(terms):
+            for doc_id, weight in sorted(postings[term].items()):
+                post_docs.append(doc_id)
+                post_weights.append(weight)
+            post_start.append(len(post_docs))
+            for key in trigrams(term):
+                grams.setdefault(key, []).append(term_id)
+
+        gram_keys, gram_start, gram_terms = array("Q"), array("I", [0]), array("I")
+        for key in sorted(grams):
+            gram_keys.append(key)
+            gram_terms.extend(grams[key])
+            gram_start.append(len(gram_terms))
+
+        doc_offsets, doc_blob = _pack_strings(docs)
+        term_offsets, term_blob = _pack_strings(terms)
+        return cls({
+            "doc_offsets": doc_offsets, "doc_blob": doc_blob,
+            "term_offsets": term_offsets, "term_blob": term_blob,
+            "post_start": post_start, "post_docs": post_docs, "post_weights": post_weights,
+            "gram_keys": gram_keys, "gram_start": gram_start, "gram_terms": gram_terms,
+        })
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder == "little", len(SECTIONS)))
+            table_offset = f.tell()
+            f.write(b"\0" * SECTION.size * len(SECTIONS))
+
+            table = []
+            for name, _ in SECTIONS:
+                # 8-byte alignment, så sektionerne kan castes direkte fra mmap
+                f.write(b"\0" * (-f.tell() % 8))
+                data = bytes(memoryview(self._sections[name]).cast("B"))
+                table.append(SECTION.pack(f.tell(), len(data)))
+                f.write(data)
+
+            f.seek(table_offset)
+            f.write(b"".join(table))
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, little_endian, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or count != len(SECTIONS):
+            mapped.close()
+            raise ValueError(f"{path} is not a search index")
+        if little_endian != (sys.byteorder == "little"):
+            mapped.close()
+            raise ValueError(f"{path} was built on a machine with a different byte order")
+
+        view = memoryview(mapped)
+        sections = {}
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(mapped, HEADER.size + i * SECTION.size)
+            sections[name] = view[offset:offset + length].cast(typecode)
+        return cls(sections, mapped=(mapped, view))
+
+    def close(self):
+        if self._mapped is None:
+            return
+        mapped, view = self._mapped
+        for section in self._sections.values():
+            section.release()
+        view.release()
+        mapped.close()
+        self._mapped = None
+
+    def __enter__(self) -> 'SearchIndex':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _gram_terms(self, key: int):
+        keys = self._sections["gram_keys"]
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return ()
+        start = self._sections["gram_start"]
+        return self._sections["gram_terms"][start[i]:start[i + 1]]
+
+    def _prefix_terms(self, token: str) -> dict:
+        matches = {}
+        i = bisect_left(self.terms, token)
+        while i < len(self.terms):
+            term = self.terms[i]
+            if not term.startswith(token):
+                break
+            matches[i] = 1.0 if term == token else 0.8
+            i += 1
+        return matches
+
+    def _substring_terms(self, token: str) -> dict:
+        if len(token) < 3:
+            candidates = range(len(self.terms))
+        else:
+            # Kun termer der har alle forespørgslens trigrammer kan indeholde den
+            candidates = None
+            for key in trigrams(token, padded=False):
+                found = set(self._gram_terms(key))
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    return {}
+        matches = {}
+        for term_id in candidates:
+            term = self.terms[term_id]
+            if token in term:
+                matches[term_id] = 1.0 if term == token else 0.8 if term.startswith(token) else 0.6
+        return matches
+
+    def _fuzzy_terms(self, token: str) -> dict:
+        max_edits = max_typos(token)
+        query_grams = trigrams(token)
+        shared = {}
+        for key in query_grams:
+            for term_id in self._gram_terms(key):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        # Hver redigering ødelægger højst tre trigrammer
+        min_shared = max(1, len(query_grams) - 3 * max_edits)
+        matches = self._prefix_terms(token)
+        for term_id, count in shared.items():
+            if count < min_shared:
+                continue
+            term = self.terms[term_id]
+            distance = edit_distance(token, term, max_edits)
+            if distance <= max_edits:
+                similarity = 1.0 - distance / max(len(token), len(term))
+                matches[term_id] = max(matches.get(term_id, 0.0), 0.7 * similarity)
+        return matches
+
+    def _match_terms(self, token: str, mode: str) -> dict:
+        if mode == "prefix":
+            return self._prefix_terms(token)
+        if mode == "substring":
+            return self._substring_terms(token)
+        if mode == "fuzzy":
+            return self._fuzzy_terms(token)
+        return self._prefix_terms(token) or self._substring_terms(token) or self._fuzzy_terms(token)
+
+    def search(self, query: str, mode: str = "auto", limit: int = 10) -> list:
+        if mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query mode '{mode}', expected one of {QUERY_MODES}")
+
+        post_start = self._sections["post_start"]
+        post_docs = self._sections["post_docs"]
+        post_weights = self._sections["post_weights"]
+
+        scores = None
+        for token in tokenize(query):
+            token_scores = {}
+            for term_id, quality in self._match_terms(token, mode).items():
+                for i in range(post_start[term_id], post_start[term_id + 1]):
+                    score = post_weights[i] * quality
+                    doc_id = post_docs[i]
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+
+            # Alle ord i forespørgslen skal matche
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: score + token_scores[doc_id] for doc_id, score in scores.items()
+                          if doc_id in token_scores}
+            if not scores:
+                return []
+
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(round(score, 3), self.docs[doc_id]) for doc_id, score in ranked]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the repository search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Build a search index from an indexer output file")
+    build.add_argument("source", help="Output from index_repositories (.json or .jsonl)")
+    build.add_argument("index", help="Where to write the binary index")
+
+    find = commands.add_parser("find", help="Search a built index")
+    find.add_argument("index")
+    find.add_argument("query", nargs="+")
+    find.add_argument("--mode", choices=QUERY_MODES, default="auto")
+    find.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        output_format = "jsonl" if args.source.endswith(".jsonl") else "json"
+        index = SearchIndex.build(read_records(args.source, output_format))
+        index.save(args.index)
+        print(f"✅ Indexed {len(index)} repositories in {args.index}")
+        return 0
+
+    with SearchIndex.load(args.index) as index:
+        results = index.search(" ".join(args.query), mode=args.mode, limit=args.limit)
+        for score, doc in results:
+            print(f"{score:.3f}\t{doc['id']}\t{doc['full_path']}/{doc['name']}")
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
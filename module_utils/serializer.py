@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ("json", "orjson")
+
+
+def available_backends() -> tuple:
+    return tuple(backend for backend in BACKENDS if backend != "orjson" or orjson is not None)
+
+
+class Serializer:
+    def __init__(self, backend: Optional[str] = None, compact: bool = False):
+        backend = backend or ("orjson" if orjson is not None else "json")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend '{backend}', expected one of {BACKENDS}")
+        if backend == "orjson" and orjson is None:
+            raise ValueError("The orjson backend was requested but orjson is not installed")
+        self.backend = backend
+        self.compact = compact
+
+    def dumps(self, obj, compact: Optional[bool] = None) -> bytes:
+        compact = self.compact if compact is None else compact
+        if self.backend == "orjson":
+            option = orjson.OPT_NON_STR_KEYS
+            if not compact:
+                # Samme layout som json.dumps(indent=2, ensure_ascii=False)
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, option=option)
+
+        if compact:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data):
+        if self.backend == "orjson":
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def dump_file(self, obj, path: str, compact: Optional[bool] = None):
+        with open(path, "wb") as f:
+            f.write(self.dumps(obj, compact))
+
+    def load_file(self, path: str):
+        with open(path, "rb") as f:
+            return self.loads(f.read())
+
+
+_default: Optional[Serializer] = None
+
+
+def configure(backend: Optional[str] = None, compact: bool = False) -> Serializer:
+    global _default
+    _default = Serializer(backend, compact)
+    return _default
+
+
+def get_serializer() -> Serializer:
+    # Første brug vælger backend ud fra miljøet
+    if _default is None:
+        configure(os.getenv("GITLAB_JSON_BACKEND") or None,
+                  os.getenv("GITLAB_JSON_COMPACT", "").lower() in ("1", "true", "yes"))
+    return _default
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import struct
+import tempfile
+import zlib
+from bisect import bisect_right
+from typing import Optional
+from module_utils.GitLab.models import Repository
+from module_utils.GitLab.traversal import TreeVisitor, walk
+from module_utils.serializer import get_serializer
+
+MAGIC = b"IDXSNAP1"
+TRAILER = struct.Struct("<QI8s")
+DEFAULT_SHARD_SIZE = 1000
+
+
+class SnapshotRecords(TreeVisitor):
+    def __init__(self):
+        self.records = []
+
+    def enter_group(self, group, path):
+        self.records.append((path, None))
+
+    def visit_project(self, project, group, path):
+        self.records.append((path, project))
+
+
+def iter_tree_records(trees):
+    # Samme gennemløb som resten af indexeren, så delte projekter kun kommer med én gang
+    collector = SnapshotRecords()
+    walk([trees] if isinstance(trees, dict) else trees, [collector])
+    return iter(collector.records)
+
+
+def write_snapshot(path: str, records, shard_size: int = DEFAULT_SHARD_SIZE, level: int = 6) -> int:
+    groups = {}
+    projects = []
+    for group_path, project in records:
+        group_index = groups.setdefault(tuple(group_path), len(groups))
+        if project is not None:
+            projects.append((project["id"], group_index, project))
+
+    # Sorteret efter projekt-ID, så opslag kan bruge binær søgning over shards
+    projects.sort(key=lambda item: item[0])
+
+    serializer = get_serializer()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(path), dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            shards = []
+            for start in range(0, len(projects), shard_size):
+                chunk = projects[start:start + shard_size]
+                lines = b"\n".join(serializer.dumps([group_index, project], compact=True)
+                                    for _, group_index, project in chunk)
+                data = zlib.compress(lines, level)
+                shards.append([chunk[0][0], chunk[-1][0], f.tell(), len(data), len(chunk)])
+                f.write(data)
+
+            footer = zlib.compress(serializer.dumps({
+                "version": 1,
+                "count": len(projects),
+                "groups": [list(group_path) for group_path in groups],
+                "shards": shards,
+            }, compact=True), level)
+            footer_offset = f.tell()
+            f.write(footer)
+            f.write(TRAILER.pack(footer_offset, len(footer), MAGIC))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return len(projects)
+
+
+def _write_repository_file(project: dict, folder: str) -> bool:
+    repo = Repository.from_api(project)
+    with open(os.path.join(folder, f"{repo.name}.json"), "wb") as f:
+        f.write(get_serializer().dumps(repo.to_dict()))
+    return True
+
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not an index snapshot")
+
+        self._file.seek(-TRAILER.size, os.SEEK_END)
+        footer_offset, footer_length, magic = TRAILER.unpack(self._file.read(TRAILER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} has a damaged trailer")
+
+        self.serializer = get_serializer()
+        self._file.seek(footer_offset)
+        footer = self.serializer.loads(zlib.decompress(self._file.read(footer_length)))
+        self.count = footer["count"]
+        self.groups = [tuple(group_path) for group_path in footer["groups"]]
+        self._shards = footer["shards"]
+        self._first_ids = [shard[0] for shard in self._shards]
+        self._cached = (None, None)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> 'SnapshotReader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._file.close()
+
+    def _load_shard(self, index: int) -> list:
+        # Den senest brugte shard holdes udpakket
+        if self._cached[0] == index:
+            return self._cached[1]
+        _, _, offset, length, _ = self._shards[index]
+        self._file.seek(offset)
+        lines = zlib.decompress(self._file.read(length)).split(b"\n")
+        records = [self.serializer.loads(line) for line in lines]
+        self._cached = (index, records)
+        return records
+
+    def get(self, project_id: int) -> Optional[dict]:
+        index = bisect_right(self._first_ids, project_id) - 1
+        if index < 0 or project_id > self._shards[index][1]:
+            return None
+        for group_index, project in self._load_shard(index):
+            if project["id"] == project_id:
+                return dict(project, group_path=list(self.groups[group_index]))
+        return None
+
+    def __iter__(self):
+        for index in range(len(self._shards)):
+            for group_index, project in self._load_shard(index):
+                yield self.groups[group_index], project
+
+    def export_tree(self, data_path: str = "data", save_project=None) -> int:
+        save_project = save_project or _write_repository_file
+        for group_path in self.groups:
+            os.makedirs(os.path.join(data_path, *group_path), exist_ok=True)
+
+        saved = 0
+        for group_path, project in self:
+            if save_project(project, os.path.join(data_path, *group_path)):
+                saved += 1
+        return saved
\ No newline at end of file
@@ -0,0 +1,222 @@
+import argparse
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from typing import Optional
+from module_utils.GitLab.models import Repository
+from module_utils.GitLab.traversal import TreeVisitor, walk, walk_tree
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER,
+    group_path TEXT,
+    name TEXT NOT NULL,
+    description TEXT,
+    visibility TEXT,
+    last_activity_at TEXT,
+    web_url TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_groups_path ON groups(path);
+CREATE INDEX IF NOT EXISTS idx_projects_group_path ON projects(group_path);
+CREATE INDEX IF NOT EXISTS idx_projects_visibility ON projects(visibility);
+CREATE INDEX IF NOT EXISTS idx_projects_last_activity ON projects(last_activity_at);
+"""
+
+# Ekstern FTS5-tabel, holdt i sync med projects via triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+    name, description, content='projects', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS projects_ai AFTER INSERT ON projects BEGIN
+    INSERT INTO projects_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS projects_ad AFTER DELETE ON projects BEGIN
+    INSERT INTO projects_fts(projects_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS projects_au AFTER UPDATE ON projects BEGIN
+    INSERT INTO projects_fts(projects_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO projects_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+"""
+
+
+class IndexStore:
+    def __init__(self, path: str = "index.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite uden FTS5: søgning falder tilbage til LIKE
+            self.fts = False
+
+    def __enter__(self) -> 'IndexStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def bulk(self, replace: bool = False):
+        # Én transaktion for hele skrivningen; rulles tilbage ved fejl
+        with self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM projects")
+                self.conn.execute("DELETE FROM groups")
+            yield self
+
+    def add_group(self, group_id, path: str):
+        self.conn.execute("INSERT INTO groups (id, path) VALUES (?, ?) "
+                          "ON CONFLICT(id) DO UPDATE SET path = excluded.path", (int(group_id), path))
+
+    def add_project(self, project: dict, group_id, group_path: str):
+        repo = Repository.from_api(project)
+        self.conn.execute(
+            # Upsert i stedet for REPLACE, så opdateringstriggeren holder FTS-indekset i sync
+            "INSERT INTO projects (id, group_id, group_path, name, description, visibility, "
+            "last_activity_at, web_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET group_id = excluded.group_id, group_path = excluded.group_path, "
+            "name = excluded.name, description = excluded.description, visibility = excluded.visibility, "
+            "last_activity_at = excluded.last_activity_at, web_url = excluded.web_url",
+            (repo.id, int(group_id), group_path, repo.name, repo.description, repo.visibility,
+             repo.last_activity_at, repo.web_url),
+        )
+
+    def add_tree(self, tree: dict, parent_path: str = ""):
+        walk_tree(tree, [StoreRows(self, parent_path)])
+
+    def add_trees(self, trees: list, parent_path: str = ""):
+        walk(trees, [StoreRows(self, parent_path)])
+
+    def remove_projects(self, project_ids):
+        self.conn.executemany("DELETE FROM projects WHERE id = ?", [(int(pid),) for pid in project_ids])
+
+    def remove_groups(self, group_ids):
+        self.conn.executemany("DELETE FROM groups WHERE id = ?", [(int(gid),) for gid in group_ids])
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def get(self, project_id: int) -> Optional[dict]:
+        row = self.conn.execute("SELECT * FROM projects WHERE id = ?", (int(project_id),)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, text: str, limit: int = 20) -> list:
+        terms = text.split()
+        if not terms:
+            return []
+
+        if self.fts:
+            # Hvert ord citeres, så brugerinput ikke tolkes som FTS-syntaks
+            match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+            rows = self.conn.execute(
+                "SELECT p.* FROM projects_fts JOIN projects p ON p.id = projects_fts.rowid "
+                "WHERE projects_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit),
+            )
+        else:
+            clauses = " AND ".join("(name LIKE ? OR description LIKE ?)" for _ in terms)
+            params = [f"%{term}%" for term in terms for _ in range(2)]
+            rows = self.conn.execute(f"SELECT * FROM projects WHERE {clauses} ORDER BY id LIMIT ?",
+                                     params + [limit])
+        return [dict(row) for row in rows]
+
+    def find(self, visibility: Optional[str] = None, group_path: Optional[str] = None,
+             active_since: Optional[str] = None, limit: Optional[int] = None) -> list:
+        clauses, params = [], []
+        if visibility:
+            clauses.append("visibility = ?")
+            params.append(visibility)
+        if group_path:
+            # Gruppen selv plus alle undergrupper, som et indekserbart interval
+            prefix = group_path.rstrip(os.sep) + os.sep
+            clauses.append("(group_path = ? OR (group_path >= ? AND group_path < ?))")
+            params += [group_path.rstrip(os.sep), prefix, prefix[:-1] + chr(ord(os.sep) + 1)]
+        if active_since:
+            clauses.append("last_activity_at >= ?")
+            params.append(active_since)
+
+        sql = "SELECT * FROM projects"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY last_activity_at DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+
+class StoreRows(TreeVisitor):
+    def __init__(self, store: IndexStore, parent_path: str = ""):
+        self.store = store
+        self.parent_path = parent_path
+
+    def enter_group(self, group, path):
+        self.store.add_group(group["id"], os.path.join(self.parent_path, *path))
+
+    def visit_project(self, project, group, path):
+        self.store.add_project(project, group["id"], os.path.join(self.parent_path, *path))
+
+
+def format_row(row: dict) -> str:
+    return "\t".join(str(row[column] if row[column] is not None else "") for column in
+                     ("id", "visibility", "last_activity_at", "group_path", "name"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the SQLite repository index")
+    parser.add_argument("database", help="Path to the index database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="Full-text search over name and description")
+    search.add_argument("text", nargs="+")
+    search.add_argument("--limit", type=int, default=20)
+
+    get = commands.add_parser("get", help="Show a single project by ID")
+    get.add_argument("project_id", type=int)
+
+    listing = commands.add_parser("list", help="List projects by filter")
+    listing.add_argument("--visibility")
+    listing.add_argument("--group", help="Group path, including subgroups")
+    listing.add_argument("--since", help="Only projects active since this timestamp")
+    listing.add_argument("--limit", type=int)
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.database):
+        print(f"❌ Index database not found: {args.database}")
+        return 1
+
+    with IndexStore(args.database) as store:
+        if args.command == "search":
+            rows = store.search(" ".join(args.text), limit=args.limit)
+        elif args.command == "get":
+            row = store.get(args.project_id)
+            rows = [row] if row else []
+        else:
+            rows = store.find(args.visibility, args.group, args.since, args.limit)
+
+    for row in rows:
+        print(format_row(row))
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+from module_utils.metrics import get_metrics
+
+log = logging.getLogger(__name__)
+
+
+class FileWriter:
+    def __init__(self, max_workers: int = 0, dump_payloads: bool = False):
+        self.max_workers = max_workers
+        self.dump_payloads = dump_payloads
+        # Med 0 eller 1 worker skrives filerne direkte i kaldende tråd
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="writer") if max_workers > 1 else None
+        self._lock = threading.Lock()
+        self._folders = set()
+        self._pending = []
+        self._stats = {"written": 0, "unchanged": 0, "failed": 0}
+
+    def __enter__(self) -> 'FileWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def makedirs(self, folder: str):
+        if folder in self._folders:
+            return
+        os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            self._folders.add(folder)
+
+    def dump_payload(self, payload: dict):
+        if self.dump_payloads:
+            log.info(json.dumps(payload, indent=2, ensure_ascii=False))
+
+    def submit(self, path: str, data: bytes) -> bool:
+        if self._executor is None:
+            return self._write_logged(path, data)
+        future = self._executor.submit(self._write_logged, path, data)
+        with self._lock:
+            self._pending.append(future)
+        return True
+
+    def write(self, path: str, data: bytes) -> bool:
+        metrics = get_metrics()
+        # Uændrede filer røres ikke, så mtime bevares for alt der scanner data/ bagefter
+        if _unchanged(path, data):
+            self._count("unchanged")
+            metrics.inc("files_written", result="unchanged")
+            return False
+
+        tmp_path = f"{path}.tmp"
+        with metrics.stage("write"):
+            try:
+                _write_file(tmp_path, data)
+            except FileNotFoundError:
+                # Mappen kan være slettet efter den blev cachet (fx en fjernet gruppe)
+                folder = os.path.dirname(path)
+                with self._lock:
+                    self._folders.discard(folder)
+                self.makedirs(folder)
+                _write_file(tmp_path, data)
+            try:
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        self._count("written")
+        metrics.inc("files_written", result="written")
+        metrics.inc("bytes_written", len(data))
+        return True
+
+    def _write_logged(self, path: str, data: bytes) -> bool:
+        try:
+            self.write(path, data)
+            return True
+        except Exception as e:
+            log.error(f"  ❌ Failed to write {path}: {e}")
+            self._count("failed")
+            get_metrics().inc("files_written", result="failed")
+            return False
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def flush(self) -> dict:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+        return self.stats()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> dict:
+        stats = self.flush()
+        if self._executor is not None:
+            # En lukket writer skriver videre synkront
+            self._executor.shutdown()
+            self._executor = None
+        return stats
+
+
+def _unchanged(path: str, data: bytes) -> bool:
+    # Størrelsen afgør de fleste ændringer uden at læse filen
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+_default: Optional[FileWriter] = None
+
+
+def configure_writer(max_workers: int = 0, dump_payloads: bool = False) -> FileWriter:
+    global _default
+    if _default is not None:
+        _default.close()
+    _default = FileWriter(max_workers, dump_payloads)
+    return _default
+
+
+def get_writer() -> FileWriter:
+    # Uden konfiguration skrives synkront, så filerne findes når kaldet returnerer
+    if _default is None:
+        configure_writer()
+    return _default
\ No newline at end of file
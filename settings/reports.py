@@ -0,0 +1,58 @@
+import csv
+import os
+from module_utils.GitLab.traversal import TreeVisitor
+
+VISIBILITIES = ("private", "internal", "public")
+COLUMNS = ("group_id", "path", "projects", "total_projects", "subgroups", *VISIBILITIES, "last_activity_at")
+
+
+class GroupReport(TreeVisitor):
+    def __init__(self):
+        self.rows = []
+        self._open = []
+
+    def enter_group(self, group, path):
+        row = {"group_id": group["id"], "path": "/".join(path), "projects": 0, "total_projects": 0,
+               "subgroups": 0, **{visibility: 0 for visibility in VISIBILITIES}, "last_activity_at": None}
+        if self._open:
+            self._open[-1]["subgroups"] += 1
+        self.rows.append(row)
+        self._open.append(row)
+
+    def visit_project(self, project, group, path):
+        row = self._open[-1]
+        row["projects"] += 1
+        visibility = project.get("visibility")
+        if visibility in VISIBILITIES:
+            row[visibility] += 1
+        row["last_activity_at"] = _latest(row["last_activity_at"], project.get("last_activity_at"))
+
+    def leave_group(self, group, path):
+        # Undergruppernes tal lægges til forælderen, når hele undertræet er besøgt
+        row = self._open.pop()
+        row["total_projects"] += row["projects"]
+        if self._open:
+            parent = self._open[-1]
+            parent["total_projects"] += row["total_projects"]
+            parent["last_activity_at"] = _latest(parent["last_activity_at"], row["last_activity_at"])
+
+    def totals(self) -> dict:
+        totals = {"groups": len(self.rows), "projects": sum(row["projects"] for row in self.rows)}
+        for visibility in VISIBILITIES:
+            totals[visibility] = sum(row[visibility] for row in self.rows)
+        return totals
+
+    def write_csv(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        os.replace(tmp_path, path)
+
+
+def _latest(current, candidate):
+    # ISO 8601 i UTC sorterer korrekt som tekst
+    if candidate is None:
+        return current
+    return candidate if current is None or candidate > current else current
\ No newline at end of file
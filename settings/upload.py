@@ -1,14 +1,59 @@
 import os
 import json
+import logging
 import base64
+import hashlib
 import requests
 from pathlib import Path
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Union
+from module_utils.GitLab.session import GitLabSession
+from module_utils.GitLab.pagination import Paginator, with_params
+from module_utils.metrics import get_metrics
+from module_utils.serializer import get_serializer
+
+log = logging.getLogger(__name__)
+
+# GitLab afviser store request bodies; hold hver commit et godt stykke under grænsen
+DEFAULT_MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+
+def git_blob_sha(content: bytes) -> str:
+    # Samme hash som git bruger til blobs, og som tree-endpointet returnerer som "id"
+    header = f"blob {len(content)}\0".encode("ascii")
+    return hashlib.sha1(header + content).hexdigest()
+
+
+class RemoteManifest:
+    def __init__(self, blobs: Optional[dict] = None):
+        self._blobs = dict(blobs or {})
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._blobs
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def blob_id(self, path: str) -> Optional[str]:
+        return self._blobs.get(path)
+
+    def is_unchanged(self, path: str, content: bytes) -> bool:
+        blob_id = self._blobs.get(path)
+        return blob_id is not None and blob_id == git_blob_sha(content)
+
+    def add(self, path: str, blob_id: Optional[str] = None):
+        self._blobs[path] = blob_id
+
+    def discard(self, path: str):
+        self._blobs.pop(path, None)
+
+    def stale(self, local_paths) -> list:
+        return sorted(set(self._blobs) - set(local_paths))
 
 
 class GitLabUploader:
-    def __init__(self, base_url: str, token: str, project_id: str, branch: str = "main"):
+    def __init__(self, base_url: str, token: str, project_id: str, branch: str = "main",
+                 session: Optional[GitLabSession] = None):
         self.base_url = base_url.rstrip('/')
         self.token = token
         self.project_id = project_id
@@ -17,22 +62,35 @@ class GitLabUploader:
             "PRIVATE-TOKEN": token,
             "Content-Type": "application/json"
         }
+        self.session = session or GitLabSession()
+        self.manifest: Optional[RemoteManifest] = None
     
     def _encode_file_path(self, file_path: str) -> str:
         return file_path.replace("/", "%2F").replace("\\", "%2F")
     
+    def load_manifest(self, path: str = "") -> RemoteManifest:
+        self.manifest = RemoteManifest(self.remote_blob_ids(path))
+        return self.manifest
+
     def file_exists(self, file_path: str) -> bool:
+        # Med et indlæst manifest er opslaget lokalt
+        if self.manifest is not None:
+            return file_path in self.manifest
+
         encoded_path = self._encode_file_path(file_path)
         url = f"{self.base_url}/api/v4/projects/{self.project_id}/repository/files/{encoded_path}"
         params = {"ref": self.branch}
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=10)
             return response.status_code == 200
         except requests.RequestException:
             return False
     
-    def create_file(self, file_path: str, content: str, commit_message: Optional[str] = None) -> bool:
+    def _encode_payload(self, payload: dict) -> bytes:
+        return get_serializer().dumps(payload, compact=True)
+
+    def create_file(self, file_path: str, content: Union[str, bytes], commit_message: Optional[str] = None) -> bool:
         if not commit_message:
             commit_message = f"Add {file_path}"
         
@@ -40,7 +98,9 @@ class GitLabUploader:
         url = f"{self.base_url}/api/v4/projects/{self.project_id}/repository/files/{encoded_path}"
         
         # Encode content til base64 for at håndtere special characters
-        content_base64 = base64.b64encode(content.encode('utf-8')).decode('ascii')
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        content_base64 = base64.b64encode(content).decode('ascii')
         
         payload = {
             "branch": self.branch,
@@ -50,23 +110,25 @@ class GitLabUploader:
         }
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload, timeout=30)
+            response = self.session.post(url, headers=self.headers, data=self._encode_payload(payload), timeout=30)
             
             if response.status_code == 201:
-                print(f"  ✅ Created: {file_path}")
+                log.debug(f"  ✅ Created: {file_path}")
+                if self.manifest is not None:
+                    self.manifest.add(file_path, git_blob_sha(content))
                 return True
             elif response.status_code == 400 and "already exists" in response.text.lower():
-                print(f"  ⚠️  Already exists: {file_path}")
+                log.warning(f"  ⚠️  Already exists: {file_path}")
                 return False
             else:
-                print(f"  ❌ Failed to create {file_path}: {response.status_code} - {response.text}")
+                log.error(f"  ❌ Failed to create {file_path}: {response.status_code} - {response.text}")
                 return False
                 
         except requests.RequestException as e:
-            print(f"  ❌ Error creating {file_path}: {e}")
+            log.error(f"  ❌ Error creating {file_path}: {e}")
             return False
     
-    def update_file(self, file_path: str, content: str, commit_message: Optional[str] = None) -> bool:
+    def update_file(self, file_path: str, content: Union[str, bytes], commit_message: Optional[str] = None) -> bool:
         if not commit_message:
             commit_message = f"Update {file_path}"
         
@@ -74,7 +136,9 @@ class GitLabUploader:
         url = f"{self.base_url}/api/v4/projects/{self.project_id}/repository/files/{encoded_path}"
         
         # Encode content til base64
-        content_base64 = base64.b64encode(content.encode('utf-8')).decode('ascii')
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        content_base64 = base64.b64encode(content).decode('ascii')
         
         payload = {
             "branch": self.branch,
@@ -84,54 +148,147 @@ class GitLabUploader:
         }
         
         try:
-            response = requests.put(url, headers=self.headers, json=payload, timeout=30)
+            response = self.session.put(url, headers=self.headers, data=self._encode_payload(payload), timeout=30)
             
             if response.status_code == 200:
-                print(f"  ✅ Updated: {file_path}")
+                log.debug(f"  ✅ Updated: {file_path}")
+                if self.manifest is not None:
+                    self.manifest.add(file_path, git_blob_sha(content))
                 return True
             else:
-                print(f"  ❌ Failed to update {file_path}: {response.status_code} - {response.text}")
+                log.error(f"  ❌ Failed to update {file_path}: {response.status_code} - {response.text}")
                 return False
                 
         except requests.RequestException as e:
-            print(f"  ❌ Error updating {file_path}: {e}")
+            log.error(f"  ❌ Error updating {file_path}: {e}")
             return False
     
-    def upload_or_update_file(self, file_path: str, content: str, commit_message: Optional[str] = None) -> bool:
+    def upload_or_update_file(self, file_path: str, content: Union[str, bytes], commit_message: Optional[str] = None) -> bool:
         if self.file_exists(file_path):
             return self.update_file(file_path, content, commit_message)
         else:
             return self.create_file(file_path, content, commit_message)
 
+    def delete_file(self, file_path: str, commit_message: Optional[str] = None) -> bool:
+        if not commit_message:
+            commit_message = f"Delete {file_path}"
 
-def upload_local_directory_structure(local_base_path: str, uploader: GitLabUploader, gitlab_base_path: str = "data"):
-    local_path = Path(local_base_path)
-    
-    if not local_path.exists():
-        print(f"❌ Local path does not exist: {local_base_path}")
-        return
-    
-    stats = {
-        "created": 0,
-        "updated": 0,
-        "failed": 0,
-        "skipped": 0
+        encoded_path = self._encode_file_path(file_path)
+        url = f"{self.base_url}/api/v4/projects/{self.project_id}/repository/files/{encoded_path}"
+        payload = {
+            "branch": self.branch,
+            "commit_message": commit_message
+        }
+
+        try:
+            response = self.session.delete(url, headers=self.headers, data=self._encode_payload(payload), timeout=30)
+
+            if response.status_code == 204:
+                log.debug(f"  🗑️  Deleted: {file_path}")
+                if self.manifest is not None:
+                    self.manifest.discard(file_path)
+                return True
+            else:
+                log.error(f"  ❌ Failed to delete {file_path}: {response.status_code} - {response.text}")
+                return False
+
+        except requests.RequestException as e:
+            log.error(f"  ❌ Error deleting {file_path}: {e}")
+            return False
+
+    def _get_page(self, url: str) -> requests.Response:
+        response = self.session.get(url, headers=self.headers, timeout=30)
+        response.raise_for_status()
+        return response
+
+    def list_tree(self, path: str = "", recursive: bool = True) -> list:
+        url = f"{self.base_url}/api/v4/projects/{self.project_id}/repository/tree"
+        url = with_params(url, ref=self.branch, recursive=str(recursive).lower(), per_page=100)
+        if path:
+            url = with_params(url, path=path)
+
+        try:
+            return list(Paginator(self._get_page).iter_items(url))
+        except requests.HTTPError as e:
+            # Tom branch eller manglende mappe giver 404
+            if e.response is not None and e.response.status_code == 404:
+                return []
+            raise
+
+    def remote_blob_ids(self, path: str = "") -> dict:
+        return {item["path"]: item.get("id") for item in self.list_tree(path) if item.get("type") == "blob"}
+
+    def commit_actions(self, actions: list, commit_message: Optional[str] = None) -> bool:
+        if not commit_message:
+            commit_message = f"Update index ({len(actions)} files)"
+
+        url = f"{self.base_url}/api/v4/projects/{self.project_id}/repository/commits"
+        payload = {
+            "branch": self.branch,
+            "commit_message": commit_message,
+            "actions": actions
+        }
+
+        try:
+            response = self.session.post(url, headers=self.headers, data=self._encode_payload(payload), timeout=120)
+
+            if response.status_code == 201:
+                log.info(f"  ✅ Committed {len(actions)} files")
+                if self.manifest is not None:
+                    for action in actions:
+                        if action["action"] == "delete":
+                            self.manifest.discard(action["file_path"])
+                        else:
+                            self.manifest.add(action["file_path"])
+                return True
+            else:
+                log.error(f"  ❌ Failed to commit {len(actions)} files: {response.status_code} - {response.text}")
+                return False
+
+        except requests.RequestException as e:
+            log.error(f"  ❌ Error committing {len(actions)} files: {e}")
+            return False
+
+
+def _file_action(action: str, gitlab_path: str, content: bytes) -> dict:
+    return {
+        "action": action,
+        "file_path": gitlab_path,
+        "content": base64.b64encode(content).decode('ascii'),
+        "encoding": "base64"
     }
-    
-    # Find alle JSON filer rekursivt
-    json_files = list(local_path.rglob("*.json"))
-    
-    print(f"📁 Found {len(json_files)} JSON files to upload\n")
-    
-    for local_file in json_files:
-        # Beregn relativ sti
-        relative_path = local_file.relative_to(local_path)
-        gitlab_path = f"{gitlab_base_path}/{relative_path}".replace("\\", "/")
-        
+
+
+ACTION_STATS = {"create": "created", "update": "updated", "delete": "deleted"}
+
+
+def _commit_batch(uploader: GitLabUploader, actions: list, stats: dict):
+    # Halver en fejlet batch indtil de(n) skyldige fil(er) er isoleret
+    pending = [actions]
+    while pending:
+        batch = pending.pop()
+        if uploader.commit_actions(batch):
+            for action in batch:
+                stats[ACTION_STATS[action["action"]]] += 1
+        elif len(batch) == 1:
+            log.error(f"  ❌ Giving up on {batch[0]['file_path']}")
+            stats["failed"] += 1
+        else:
+            middle = len(batch) // 2
+            pending.append(batch[middle:])
+            pending.append(batch[:middle])
+
+
+def upload_file_by_file(files: list, uploader: GitLabUploader, stats: dict, stale: list):
+    for local_file, gitlab_path in files:
         try:
-            # Læs fil indhold
-            with open(local_file, "r", encoding="utf-8") as f:
-                content = f.read()
+            # Læs fil indhold som bytes; det er dem der både hashes og base64-encodes
+            content = local_file.read_bytes()
+
+            # Spring over hvis indholdet allerede ligger på branchen
+            if uploader.manifest is not None and uploader.manifest.is_unchanged(gitlab_path, content):
+                stats["skipped"] += 1
+                continue
             
             # Upload eller opdater
             exists = uploader.file_exists(gitlab_path)
@@ -150,15 +307,104 @@ def upload_local_directory_structure(local_base_path: str, uploader: GitLabUploa
                     stats["failed"] += 1
                     
         except Exception as e:
-            print(f"  ❌ Error processing {local_file}: {e}")
+            log.error(f"  ❌ Error processing {local_file}: {e}")
+            stats["failed"] += 1
+
+    for gitlab_path in stale:
+        if uploader.delete_file(gitlab_path):
+            stats["deleted"] += 1
+        else:
+            stats["failed"] += 1
+
+
+def upload_in_batches(files: list, uploader: GitLabUploader, stats: dict, stale: list,
+                      max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES):
+    manifest = uploader.manifest
+    batch = []
+    batch_bytes = 0
+
+    def add(action: dict, action_bytes: int):
+        nonlocal batch, batch_bytes
+        if batch and batch_bytes + action_bytes > max_batch_bytes:
+            _commit_batch(uploader, batch, stats)
+            batch, batch_bytes = [], 0
+        batch.append(action)
+        batch_bytes += action_bytes
+
+    for local_file, gitlab_path in files:
+        try:
+            content = local_file.read_bytes()
+        except OSError as e:
+            log.error(f"  ❌ Error processing {local_file}: {e}")
             stats["failed"] += 1
+            continue
+
+        if manifest.is_unchanged(gitlab_path, content):
+            stats["skipped"] += 1
+            continue
+
+        action = _file_action("update" if gitlab_path in manifest else "create", gitlab_path, content)
+        add(action, len(action["content"]) + len(gitlab_path))
+
+    # Slettede filer ryger med i samme commit
+    for gitlab_path in stale:
+        add({"action": "delete", "file_path": gitlab_path}, len(gitlab_path))
+
+    if batch:
+        _commit_batch(uploader, batch, stats)
+
+
+def upload_local_directory_structure(local_base_path: str, uploader: GitLabUploader, gitlab_base_path: str = "data",
+                                     batch: bool = False, max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+                                     delete_stale: bool = False):
+    local_path = Path(local_base_path)
+    
+    if not local_path.exists():
+        log.error(f"❌ Local path does not exist: {local_base_path}")
+        return
     
+    stats = {
+        "created": 0,
+        "updated": 0,
+        "failed": 0,
+        "skipped": 0,
+        "deleted": 0
+    }
+    
+    # Find alle JSON filer rekursivt
+    files = []
+    for local_file in local_path.rglob("*.json"):
+        relative_path = local_file.relative_to(local_path)
+        files.append((local_file, f"{gitlab_base_path}/{relative_path}".replace("\\", "/")))
+    
+    log.info(f"📁 Found {len(files)} JSON files to upload")
+
+    # Ét paginerede kald i stedet for et file_exists-kald pr. fil
+    try:
+        manifest = uploader.load_manifest(gitlab_base_path)
+    except requests.RequestException as e:
+        if batch:
+            log.error(f"❌ Could not list remote files: {e}")
+            return stats
+        log.warning(f"⚠️  Could not list remote files, checking each file instead: {e}")
+        uploader.manifest = manifest = None
+
+    stale = []
+    if delete_stale and manifest is not None:
+        stale = manifest.stale(gitlab_path for _, gitlab_path in files)
+        log.info(f"🗑️  {len(stale)} remote files no longer exist locally")
+
+    if batch:
+        upload_in_batches(files, uploader, stats, stale, max_batch_bytes)
+    else:
+        upload_file_by_file(files, uploader, stats, stale)
+
     # Print statistik
-    print("\n" + "="*50)
-    print("📊 UPLOAD STATISTICS")
-    print("="*50)
-    print(f"✅ Created: {stats['created']}")
-    print(f"🔄 Updated: {stats['updated']}")
-    print(f"❌ Failed: {stats['failed']}")
-    print(f"⏭️  Skipped: {stats['skipped']}")
-    print(f"\n📂 Total files processed: {sum(stats.values())}")
\ No newline at end of file
+    log.info(f"📊 Upload: ✅ Created: {stats['created']}, 🔄 Updated: {stats['updated']}, "
+             f"❌ Failed: {stats['failed']}, ⏭️  Skipped: {stats['skipped']}, 🗑️  Deleted: {stats['deleted']} "
+             f"(📂 {len(files)} files processed)", extra={"upload": dict(stats, files=len(files))})
+    metrics = get_metrics()
+    for result, count in stats.items():
+        metrics.inc("upload_files", count, result=result)
+
+    return stats
\ No newline at end of file
@@ -0,0 +1,28 @@
+import responses
+
+API = "https://gitlab.example.com/api/v4"
+
+
+def gitlab_project(pid, namespace_id=None, **fields):
+    project = {
+        "id": pid,
+        "name": f"p{pid}",
+        "web_url": f"https://gitlab.example.com/p{pid}",
+        "last_activity_at": "2025-11-18T10:00:00Z",
+        "description": None,
+        "visibility": "private",
+    }
+    if namespace_id is not None:
+        project["namespace"] = {"id": namespace_id}
+    project.update(fields)
+    return project
+
+
+def add_gitlab_group(gid, projects=(), subgroups=(), name=None, full_path=None, status=200, projects_status=200):
+    # De tre kald en rekursiv crawl laver pr. gruppe; projekterne ejes af gruppen selv
+    responses.add(responses.GET, f"{API}/groups/{gid}",
+                  json={"id": gid, "name": name or f"group-{gid}", "full_path": full_path}, status=status)
+    responses.add(responses.GET, f"{API}/groups/{gid}/projects?per_page=100",
+                  json=[gitlab_project(pid, namespace_id=gid) for pid in projects], status=projects_status)
+    responses.add(responses.GET, f"{API}/groups/{gid}/subgroups?per_page=100",
+                  json=[{"id": s, "name": f"group-{s}"} for s in subgroups])
\ No newline at end of file
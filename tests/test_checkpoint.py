@@ -0,0 +1,240 @@
+import pytest
+import responses
+from module_utils.GitLab.checkpoint import CrawlCheckpoint
+from module_utils.GitLab.main import exit_if_incomplete
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.session import GitLabSession
+from tests.conftest import add_gitlab_group, gitlab_project
+
+BASE = "https://gitlab.example.com/api/v4"
+
+
+def _api():
+    return GitLabAPI("https://gitlab.example.com", "token", session=GitLabSession(max_retries=0))
+
+
+def _requested(path):
+    return [call for call in responses.calls if call.request.url.startswith(f"{BASE}{path}")]
+
+
+class TestCrawlCheckpoint:
+
+    def test_save_and_load_roundtrip(self, tmp_path):
+        """Test at frontier, færdige grupper og cursors overlever en genstart"""
+        path = str(tmp_path / "checkpoint.json")
+        checkpoint = CrawlCheckpoint(path)
+        checkpoint.start(100)
+        checkpoint.schedule(101, 1, 100)
+        checkpoint.complete(100, 0, None, {"id": 100, "name": "root", "projects": []}, [101, 102])
+        checkpoint.fail(101)
+        checkpoint.advance("https://x/projects", "https://x/projects?page=2", [{"id": 1}])
+        checkpoint.save()
+
+        loaded = CrawlCheckpoint.load(path)
+
+        assert loaded.start(100) is True
+        assert loaded.frontier() == {101: (1, 100), 102: (1, 100)}
+        assert loaded.failed == {101: 1}
+        assert loaded.cursor("https://x/projects") == ("https://x/projects?page=2", [{"id": 1}])
+
+    def test_other_root_starts_from_scratch(self, tmp_path):
+        """Test at en checkpoint for en anden rod ikke genbruges"""
+        checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.json"))
+        checkpoint.start(100)
+        checkpoint.schedule(101, 1, 100)
+
+        assert checkpoint.start(200) is False
+        assert checkpoint.frontier() == {}
+
+    def test_saves_periodically(self, tmp_path):
+        """Test at checkpointen skrives, når intervallet er gået"""
+        now = [0.0]
+        path = tmp_path / "checkpoint.json"
+        checkpoint = CrawlCheckpoint(str(path), interval=10, clock=lambda: now[0])
+        checkpoint.start(100)
+
+        checkpoint.complete(100, 0, None, {"id": 100, "name": "root", "projects": []}, [])
+        assert not path.exists()
+
+        now[0] = 11.0
+        checkpoint.complete(101, 1, 100, {"id": 101, "name": "sub", "projects": []}, [])
+        assert path.exists()
+
+
+    def test_group_is_given_up_after_max_attempts(self, tmp_path):
+        """Test at en gruppe opgives efter max_attempts og ikke længere er i frontier"""
+        checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.json"), max_attempts=2)
+        checkpoint.start(100)
+        checkpoint.schedule(101, 1, 100)
+        checkpoint.schedule(102, 1, 100)
+
+        checkpoint.fail(101)
+        checkpoint.fail(102, permanent=True)
+        assert checkpoint.retryable() == [101]
+        assert checkpoint.abandoned() == [102]
+        assert checkpoint.frontier() == {101: (1, 100)}
+
+        checkpoint.fail(101)
+        assert checkpoint.retryable() == []
+        assert checkpoint.frontier() == {}
+
+
+class TestResumableCrawl:
+
+    @responses.activate
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_failed_subgroup_is_retried_on_resume(self, tmp_path, workers):
+        """Test at en fejlet undergruppe gemmes og hentes igen uden at hente resten forfra"""
+        path = str(tmp_path / "checkpoint.json")
+        add_gitlab_group(100, [1], [101, 102])
+        add_gitlab_group(101, [2], [])
+        add_gitlab_group(102, [3], [], projects_status=500)
+
+        checkpoint = CrawlCheckpoint(path)
+        tree = _api().fetch_group_tree(100, max_workers=workers, checkpoint=checkpoint)
+
+        assert [sg["id"] for sg in tree["subgroups"]] == [101]
+        assert checkpoint.failed == {102: 1}
+
+        responses.reset()
+        add_gitlab_group(102, [3], [])
+        resumed = CrawlCheckpoint.load(path)
+        tree = _api().fetch_group_tree(100, max_workers=workers, checkpoint=resumed)
+
+        assert [sg["id"] for sg in tree["subgroups"]] == [101, 102]
+        assert tree["subgroups"][1]["projects"][0]["id"] == 3
+        assert all(call.request.url.startswith(f"{BASE}/groups/102") for call in responses.calls)
+        assert resumed.failed == {}
+
+    @responses.activate
+    def test_partly_fetched_pages_resume_from_cursor(self, tmp_path):
+        """Test at en afbrudt paginering fortsætter fra den gemte side"""
+        path = str(tmp_path / "checkpoint.json")
+        page_2 = f"{BASE}/groups/100/projects?per_page=100&page=2"
+        add_gitlab_group(100, [1], [])
+        responses.replace(responses.GET, f"{BASE}/groups/100/projects?per_page=100", json=[gitlab_project(1)],
+                          headers={"Link": f'<{page_2}>; rel="next"'})
+        responses.add(responses.GET, page_2, status=502)
+
+        checkpoint = CrawlCheckpoint(path)
+        _api().fetch_group_tree(100, checkpoint=checkpoint)
+
+        assert checkpoint.stats()["cursors"] == 1
+
+        responses.reset()
+        add_gitlab_group(100)
+        responses.add(responses.GET, page_2, json=[gitlab_project(2)])
+        tree = _api().fetch_group_tree(100, checkpoint=CrawlCheckpoint.load(path))
+
+        assert [p["id"] for p in tree["projects"]] == [1, 2]
+        assert len(_requested("/groups/100/projects")) == 1
+
+    @responses.activate
+    def test_checkpoint_keeps_parallel_page_fetching(self, tmp_path):
+        """Test at en checkpoint stadig henter kendte sider parallelt og gemmer sidenummeret som cursor"""
+        path = str(tmp_path / "checkpoint.json")
+        url = f"{BASE}/groups/100/projects?per_page=100"
+        add_gitlab_group(100)
+        responses.replace(responses.GET, url, json=[gitlab_project(1)],
+                          headers={"X-Total-Pages": "3", "X-Page": "1", "Link": f'<{url}&page=2>; rel="next"'})
+        responses.add(responses.GET, f"{url}&page=2", json=[gitlab_project(2)])
+        responses.add(responses.GET, f"{url}&page=3", status=502)
+
+        checkpoint = CrawlCheckpoint(path)
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4, session=GitLabSession(max_retries=0))
+        api.fetch_group_tree(100, checkpoint=checkpoint)
+
+        next_url, fetched = checkpoint.cursor(url)
+        assert next_url == f"{url}&page=3"
+        assert [p["id"] for p in fetched] == [1, 2]
+
+        responses.reset()
+        add_gitlab_group(100)
+        responses.add(responses.GET, f"{url}&page=3", json=[gitlab_project(3)],
+                      headers={"X-Total-Pages": "3", "X-Page": "3"})
+        tree = _api().fetch_group_tree(100, checkpoint=CrawlCheckpoint.load(path))
+
+        assert [p["id"] for p in tree["projects"]] == [1, 2, 3]
+        assert len(_requested("/groups/100/projects")) == 1
+
+    @responses.activate
+    def test_deleted_subgroup_is_given_up_at_once(self, tmp_path):
+        """Test at en undergruppe, der svarer 404, opgives og resten af træet gemmes"""
+        add_gitlab_group(100, [1], [101, 102])
+        add_gitlab_group(101, [2], [])
+        add_gitlab_group(102, [3], [], projects_status=404)
+
+        checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.json"))
+        tree = _api().fetch_group_tree(100, checkpoint=checkpoint)
+
+        assert [sg["id"] for sg in tree["subgroups"]] == [101]
+        assert checkpoint.abandoned() == [102]
+        assert exit_if_incomplete(checkpoint) is True
+
+    @responses.activate
+    def test_persistent_failure_stops_blocking_resume(self, tmp_path):
+        """Test at en gruppe, der bliver ved med at fejle, ikke blokerer --resume for altid"""
+        path = str(tmp_path / "checkpoint.json")
+        add_gitlab_group(100, [1], [101])
+        add_gitlab_group(101, [2], [], projects_status=500)
+
+        checkpoint = CrawlCheckpoint(path, max_attempts=2)
+        _api().fetch_group_tree(100, checkpoint=checkpoint)
+        with pytest.raises(SystemExit) as exc:
+            exit_if_incomplete(checkpoint)
+        assert exc.value.code == 1
+
+        resumed = CrawlCheckpoint.load(path, max_attempts=2)
+        tree = _api().fetch_group_tree(100, checkpoint=resumed)
+        assert exit_if_incomplete(resumed) is True
+        assert tree["subgroups"] == []
+
+        responses.calls.reset()
+        again = CrawlCheckpoint.load(path, max_attempts=2)
+        _api().fetch_group_tree(100, checkpoint=again)
+        assert not _requested("/groups/101")
+
+class TestStreamingCheckpoint:
+
+    @responses.activate
+    def test_stores_structure_and_relists_on_resume(self, tmp_path):
+        """Test at en streamende checkpoint kun gemmer hierarkiet og lister færdige grupper igen ved resume"""
+        path = str(tmp_path / "checkpoint.json")
+        add_gitlab_group(100, [1], [101, 102])
+        add_gitlab_group(101, [2], [])
+        add_gitlab_group(102, [3], [], projects_status=500)
+
+        checkpoint = CrawlCheckpoint(path, keep_results=False)
+        first = [r.project["id"] for r in _api().iter_group_projects(100, checkpoint=checkpoint) if r.project]
+
+        assert sorted(first) == [1, 2]
+        assert all("node" not in entry for entry in checkpoint.completed.values())
+        assert checkpoint.completed[100]["children"] == [101, 102]
+
+        responses.reset()
+        add_gitlab_group(100, [1], [])
+        add_gitlab_group(101, [2], [])
+        add_gitlab_group(102, [3], [])
+        resumed = CrawlCheckpoint.load(path, keep_results=False)
+        records = list(_api().iter_group_projects(100, checkpoint=resumed))
+
+        assert sorted(r.project["id"] for r in records if r.project) == [1, 2, 3]
+        assert {r.group_path for r in records if r.project is None} == {
+            ("group-100",), ("group-100", "group-101"), ("group-100", "group-102")}
+        assert not _requested("/groups/100/subgroups")
+        assert resumed.failed == {}
+
+    @responses.activate
+    def test_page_bodies_are_not_kept(self, tmp_path):
+        """Test at en halvt hentet liste ikke gemmer siderne, men hentes forfra"""
+        page_2 = f"{BASE}/groups/100/projects?per_page=100&page=2"
+        add_gitlab_group(100, [1], [])
+        responses.replace(responses.GET, f"{BASE}/groups/100/projects?per_page=100", json=[gitlab_project(1)],
+                          headers={"Link": f'<{page_2}>; rel="next"'})
+        responses.add(responses.GET, page_2, status=502)
+
+        checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.json"), keep_results=False)
+        list(_api().iter_group_projects(100, checkpoint=checkpoint))
+
+        assert checkpoint.stats()["cursors"] == 0
+        assert checkpoint.cursor(f"{BASE}/groups/100/projects?per_page=100")[1] == []
@@ -0,0 +1,117 @@
+import pytest
+import responses
+from module_utils.GitLab.query import GitLabAPI
+from tests.conftest import add_gitlab_group, gitlab_project
+
+BASE = "https://gitlab.example.com/api/v4"
+
+
+class TestConcurrentGroupTree:
+
+    @pytest.fixture
+    def hierarchy(self):
+        """Root med to undergrupper, hvoraf den ene har en undergruppe"""
+        add_gitlab_group(100, [1], [101, 102], name="Root", full_path="root")
+        add_gitlab_group(101, [2, 3], [103], name="A", full_path="root/a")
+        add_gitlab_group(102, [], [], name="B", full_path="root/b")
+        add_gitlab_group(103, [4], [], name="C", full_path="root/a/c")
+
+    @responses.activate
+    def test_concurrent_tree_matches_sequential(self, hierarchy):
+        """Test at den parallelle crawl giver samme træ som den sekventielle"""
+        api = GitLabAPI("https://gitlab.example.com", "token")
+
+        sequential = api.get_group_tree(100, max_depth=5)
+        concurrent = api.get_group_tree(100, max_depth=5, max_workers=4)
+
+        assert concurrent == sequential
+        assert [sg["id"] for sg in concurrent["subgroups"]] == [101, 102]
+        assert concurrent["subgroups"][0]["subgroups"][0]["projects"][0]["id"] == 4
+
+    @responses.activate
+    def test_concurrent_respects_max_depth(self, hierarchy):
+        """Test at max_depth også overholdes i parallel mode"""
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4)
+
+        tree = api.get_group_tree(100, max_depth=2)
+
+        assert [sg["id"] for sg in tree["subgroups"]] == [101, 102]
+        assert tree["subgroups"][0]["subgroups"] == []
+
+    @responses.activate
+    def test_failed_subgroup_is_dropped(self):
+        """Test at en fejlende undergruppe udelades uden at stoppe resten"""
+        add_gitlab_group(100, [], [101, 102], name="Root", full_path="root")
+        add_gitlab_group(101, [], [], name="A", full_path="root/a", status=403)
+        add_gitlab_group(102, [5], [], name="B", full_path="root/b")
+
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4)
+        tree = api.get_group_tree(100, max_depth=3)
+
+        assert [sg["id"] for sg in tree["subgroups"]] == [102]
+
+    @responses.activate
+    def test_root_failure_returns_none(self):
+        """Test at fejl på rodgruppen returnerer None"""
+        add_gitlab_group(100, [], [], name="Root", full_path="root", status=404)
+
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4)
+
+        assert api.get_group_tree(100, max_depth=1) is None
+
+
+class TestFlatGroupTree:
+
+    @responses.activate
+    def test_flat_tree_matches_recursive(self):
+        """Test at flat strategi genopbygger samme træ som den rekursive"""
+        add_gitlab_group(100, [1], [101, 102], name="Root", full_path="root")
+        add_gitlab_group(101, [2], [103], name="A", full_path="root/a")
+        add_gitlab_group(102, [], [], name="B", full_path="root/b")
+        add_gitlab_group(103, [4], [], name="C", full_path="root/a/c")
+
+        responses.add(
+            responses.GET,
+            f"{BASE}/groups/100/descendant_groups?per_page=100",
+            json=[
+                {"id": 101, "name": "A", "full_path": "root/a", "parent_id": 100},
+                {"id": 102, "name": "B", "full_path": "root/b", "parent_id": 100},
+                {"id": 103, "name": "C", "full_path": "root/a/c", "parent_id": 101},
+            ],
+            status=200
+        )
+        responses.add(
+            responses.GET,
+            f"{BASE}/groups/100/projects?include_subgroups=true&with_shared=false&per_page=100",
+            json=[
+                gitlab_project(1, namespace_id=100),
+                gitlab_project(2, namespace_id=101),
+                gitlab_project(4, namespace_id=103),
+            ],
+            status=200
+        )
+
+        api = GitLabAPI("https://gitlab.example.com", "token")
+
+        assert api.fetch_group_tree(100, strategy="flat") == api.get_group_tree(100, max_depth=5)
+
+    @responses.activate
+    def test_flat_tree_fails_on_partial_listing(self):
+        """Test at en fejl midt i projektlisten giver intet træ i stedet for et afkortet træ"""
+        projects_url = f"{BASE}/groups/100/projects?include_subgroups=true&with_shared=false&per_page=100"
+        responses.add(responses.GET, f"{BASE}/groups/100", json={"id": 100, "name": "Root", "full_path": "root"})
+        responses.add(responses.GET, f"{BASE}/groups/100/descendant_groups?per_page=100", json=[])
+        responses.add(responses.GET, projects_url, json=[gitlab_project(1, namespace_id=100)],
+                      headers={"Link": f'<{projects_url}&page=2>; rel="next"'})
+        responses.add(responses.GET, f"{projects_url}&page=2", status=404)
+
+        api = GitLabAPI("https://gitlab.example.com", "token")
+
+        assert api.fetch_group_tree(100, strategy="flat") is None
+
+    def test_unknown_strategy_raises(self):
+        """Test at en ukendt strategi afvises"""
+        api = GitLabAPI("https://gitlab.example.com", "token")
+
+        with pytest.raises(ValueError):
+            api.fetch_group_tree(100, strategy="bogus")
@@ -0,0 +1,135 @@
+import pytest
+import responses
+from urllib.parse import parse_qs, urlparse
+from module_utils.GitLab.profile import FULL, LEAN, get_profile
+from benchmarks.stub_server import StubGitLabServer, SyntheticGitLab
+from module_utils.GitLab.models import Repository
+from module_utils.GitLab.query import GitLabAPI
+
+BASE = "https://gitlab.example.com"
+PROJECTS_URL = f"{BASE}/api/v4/groups/100/projects"
+
+FULL_PROJECT = {
+    "id": 1, "name": "repo", "description": "Beskrivelse", "visibility": "private",
+    "last_activity_at": "2024-01-01T00:00:00.000Z", "web_url": f"{BASE}/team/repo",
+    "namespace": {"id": 100, "name": "team", "full_path": "team", "kind": "group"},
+    "ssh_url_to_repo": "git@gitlab.example.com:team/repo.git", "permissions": {"project_access": None},
+}
+
+
+def query_of(call) -> dict:
+    return {key: values[0] for key, values in parse_qs(urlparse(call.request.url).query).items()}
+
+
+class TestFetchProfile:
+
+    def test_full_profile_sends_no_extra_params(self):
+        """Test at standardprofilen ikke ændrer de eksisterende URL'er"""
+        assert FULL.project_params() == {}
+        assert FULL.project(FULL_PROJECT) is FULL_PROJECT
+
+    def test_lean_profile_params(self):
+        """Test at lean-profilen slår simple til med et visibility-filter og statistik og custom attributes fra"""
+        profile = get_profile("lean", archived=False, visibility="internal")
+
+        assert profile.project_params() == {
+            "statistics": "false", "with_custom_attributes": "false", "simple": "true",
+            "archived": "false", "visibility": "internal",
+        }
+        assert profile.group_params() == {"statistics": "false", "with_custom_attributes": "false"}
+
+    def test_projection_keeps_only_model_fields(self):
+        """Test at kun de felter, modellerne bruger, beholdes"""
+        projected = LEAN.project(FULL_PROJECT)
+
+        assert set(projected) == {"id", "name", "description", "visibility", "last_activity_at", "web_url",
+                                  "namespace"}
+        assert projected["namespace"] == {"id": 100}
+
+    def test_visibility_filter_fills_simple_representation(self):
+        """Test at visibility udfyldes fra filteret, da simple=true udelader feltet"""
+        simple = {key: value for key, value in FULL_PROJECT.items() if key != "visibility"}
+
+        assert get_profile("lean", visibility="public").project(simple)["visibility"] == "public"
+
+    def test_rejects_unknown_profile(self):
+        """Test at ukendte profiler og visibility-værdier afvises"""
+        with pytest.raises(ValueError):
+            get_profile("tiny")
+        with pytest.raises(ValueError):
+            get_profile("lean", visibility="secret")
+
+
+class TestLeanFetching:
+
+    @responses.activate
+    def test_lean_profile_on_project_requests(self):
+        """Test at projektkald sender lean-parametrene og returnerer projicerede projekter"""
+        responses.add(responses.GET, PROJECTS_URL, json=[FULL_PROJECT])
+        api = GitLabAPI(BASE, "token", profile=get_profile("lean", archived=False, visibility="private"))
+
+        projects = api.get_all_repositories(100)
+
+        query = query_of(responses.calls[0])
+        assert query["simple"] == "true"
+        assert query["archived"] == "false"
+        assert query["include_subgroups"] == "true"
+        assert "ssh_url_to_repo" not in projects[0]
+
+    @responses.activate
+    def test_lean_profile_without_filter_fetches_full_representation(self):
+        """Test at lean uden visibility-filter henter én fuld liste og projicerer den, så visibility aldrig er null"""
+        responses.add(responses.GET, PROJECTS_URL, json=[FULL_PROJECT])
+        api = GitLabAPI(BASE, "token", profile=LEAN)
+
+        projects = api.get_all_repositories(100)
+
+        assert len(responses.calls) == 1
+        assert "simple" not in query_of(responses.calls[0])
+        assert query_of(responses.calls[0])["statistics"] == "false"
+        assert projects == [LEAN.project(FULL_PROJECT)]
+        assert projects[0]["visibility"] == "private"
+
+    @responses.activate
+    def test_with_shared_overrides_default(self):
+        """Test at with_shared-filteret erstatter standardværdien i URL'en"""
+        responses.add(responses.GET, PROJECTS_URL, json=[])
+        api = GitLabAPI(BASE, "token", profile=get_profile("lean", with_shared=True))
+
+        api.get_all_repositories(100)
+
+        assert query_of(responses.calls[0])["with_shared"] == "true"
+
+    @responses.activate
+    def test_lean_profile_on_subgroups(self):
+        """Test at undergrupper hentes uden statistik og kun med træets felter"""
+        responses.add(responses.GET, f"{BASE}/api/v4/groups/100/subgroups",
+                      json=[{"id": 101, "name": "sub", "full_path": "team/sub", "parent_id": 100,
+                             "avatar_url": None, "statistics": {"storage_size": 1}}])
+        api = GitLabAPI(BASE, "token", profile=LEAN)
+
+        subgroups = api.get_subgroups(100)
+
+        assert query_of(responses.calls[0])["statistics"] == "false"
+        assert subgroups == [{"id": 101, "name": "sub", "full_path": "team/sub", "parent_id": 100}]
+
+
+class TestLeanMatchesFull:
+
+    @pytest.mark.parametrize("strategy", ["recursive", "flat"])
+    def test_lean_crawl_keeps_every_model_field(self, strategy):
+        """Test at lean-profilen giver samme modeller som den fulde profil, inkl. visibility"""
+        with StubGitLabServer(SyntheticGitLab(depth=2, fanout=2, projects_per_group=3)) as server:
+            full = GitLabAPI(server.url, "token").fetch_group_tree("1", strategy=strategy)
+            lean = GitLabAPI(server.url, "token", profile=LEAN).fetch_group_tree("1", strategy=strategy)
+
+        def models(tree):
+            found, stack = {}, [tree]
+            while stack:
+                group = stack.pop()
+                found.update({p["id"]: Repository.from_api(p).to_dict() for p in group["projects"]})
+                stack.extend(group["subgroups"])
+            return found
+
+        assert models(lean) == models(full)
+        assert all(repo["visibility"] is not None for repo in models(lean).values())
\ No newline at end of file
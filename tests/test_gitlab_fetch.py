@@ -1,5 +1,7 @@
 import os
 import json
+import pytest
+import requests
 from dotenv import load_dotenv
 from module_utils.GitLab.query import GitLabAPI
 
@@ -14,7 +16,11 @@ def test_gitlab_group_repositories():
     group_id = "116891110"
 
     api = GitLabAPI(base_url, token)
-    repos = api.get_repositories(group_id)
+    try:
+        repos = api.get_repositories(group_id)
+    except requests.ConnectionError as e:
+        # Listefejl propageres nu; uden netværk kan testen ikke køre
+        pytest.skip(f"{base_url} is not reachable: {e}")
 
     print(f"Found {len(repos)} repositories in group {group_id}")
 
@@ -0,0 +1,116 @@
+import json
+import pytest
+import responses
+from benchmarks.stub_server import StubGitLabServer, SyntheticGitLab
+from module_utils.GitLab.graphql import GitLabGraphQL, GraphQLError, gid_to_id
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.session import GitLabSession
+
+BASE = "https://gitlab.example.com"
+GRAPHQL = f"{BASE}/api/graphql"
+
+
+def page(nodes, cursor=None):
+    return {"pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}, "nodes": nodes}
+
+
+def project(pid, gid):
+    return {"id": f"gid://gitlab/Project/{pid}", "name": f"repo-{pid}", "description": None,
+            "webUrl": f"{BASE}/team/repo-{pid}", "lastActivityAt": "2024-01-01T00:00:00Z",
+            "visibility": "private", "namespace": {"id": f"gid://gitlab/Group/{gid}"}}
+
+
+ROOT = {"id": "gid://gitlab/Group/100", "name": "team", "fullPath": "team", "parent": None}
+SUB = {"id": "gid://gitlab/Group/101", "name": "sub", "fullPath": "team/sub",
+       "parent": {"id": "gid://gitlab/Group/100"}}
+
+
+class TestGitLabGraphQL:
+
+    def test_gid_to_id(self):
+        """Test at globale ID'er oversættes til REST-ID'er"""
+        assert gid_to_id("gid://gitlab/Project/42") == 42
+        assert gid_to_id(None) is None
+
+    @responses.activate
+    def test_paginates_both_connections_in_one_query(self):
+        """Test at grupper og projekter pagineres hver for sig i de samme kald"""
+        responses.add(responses.POST, GRAPHQL, json={"data": {"group": dict(
+            ROOT, descendantGroups=page([SUB]), projects=page([project(1, 100)], "c1"))}})
+        responses.add(responses.POST, GRAPHQL, json={"data": {"group": dict(
+            ROOT, projects=page([project(2, 101)]))}})
+
+        root, groups, projects = GitLabGraphQL(BASE, "token").fetch_group("team")
+
+        assert root["id"] == 100
+        assert groups == [{"id": 101, "name": "sub", "full_path": "team/sub", "parent_id": 100}]
+        assert [p["id"] for p in projects] == [1, 2]
+
+        second = json.loads(responses.calls[1].request.body)["variables"]
+        assert second["withGroups"] is False
+        assert second["projectsAfter"] == "c1"
+        assert responses.calls[0].request.headers["Authorization"] == "Bearer token"
+
+    @responses.activate
+    def test_transient_errors_are_retried(self):
+        """Test at en forbigående 502 på en side prøves igen i stedet for at afbryde hele crawlet"""
+        responses.add(responses.POST, GRAPHQL, status=502)
+        responses.add(responses.POST, GRAPHQL, json={"data": {"group": dict(
+            ROOT, descendantGroups=page([SUB]), projects=page([project(1, 100)]))}})
+        session = GitLabSession(sleep=lambda seconds: None)
+
+        root, groups, projects = GitLabGraphQL(BASE, "token", session=session).fetch_group("team")
+
+        assert [p["id"] for p in projects] == [1]
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_plain_post_is_not_retried(self):
+        """Test at en almindelig POST stadig ikke gentages af sessionen"""
+        responses.add(responses.POST, GRAPHQL, status=502)
+
+        response = GitLabSession(sleep=lambda seconds: None).post(GRAPHQL)
+
+        assert response.status_code == 502
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_errors_are_raised(self):
+        """Test at GraphQL-fejl i et 200-svar bliver til en exception"""
+        responses.add(responses.POST, GRAPHQL, json={"errors": [{"message": "Field 'x' doesn't exist"}]})
+
+        with pytest.raises(GraphQLError, match="Field 'x'"):
+            GitLabGraphQL(BASE, "token").fetch_group("team")
+
+
+class TestGraphQLStrategy:
+
+    @responses.activate
+    def test_numeric_id_is_resolved_to_full_path(self):
+        """Test at et numerisk gruppe-ID slås op via REST og træet bygges som ved flat"""
+        responses.add(responses.GET, f"{BASE}/api/v4/groups/100", json={"id": 100, "name": "team", "full_path": "team"})
+        responses.add(responses.POST, GRAPHQL, json={"data": {"group": dict(
+            ROOT, descendantGroups=page([SUB]), projects=page([project(1, 100), project(2, 101)]))}})
+
+        tree = GitLabAPI(BASE, "token").fetch_group_tree(100, strategy="graphql")
+
+        assert json.loads(responses.calls[1].request.body)["variables"]["fullPath"] == "team"
+        assert [p["name"] for p in tree["projects"]] == ["repo-1"]
+        assert tree["subgroups"][0]["projects"][0]["web_url"] == f"{BASE}/team/repo-2"
+
+    @responses.activate
+    def test_missing_group_returns_none(self):
+        """Test at en ukendt gruppe logges og giver None som de andre strategier"""
+        responses.add(responses.POST, GRAPHQL, json={"data": {"group": None}})
+
+        assert GitLabAPI(BASE, "token").fetch_group_tree("missing", strategy="graphql") is None
+
+    def test_same_tree_as_flat_strategy(self):
+        """Test at GraphQL-backenden giver samme træ som REST mod stand-in serveren"""
+        gitlab = SyntheticGitLab(depth=2, fanout=2, projects_per_group=3)
+        with StubGitLabServer(gitlab) as server:
+            api = GitLabAPI(server.url, "token")
+            flat = api.fetch_group_tree(gitlab.root_id, strategy="flat")
+            graphql = api.fetch_group_tree(gitlab.root_id, strategy="graphql")
+
+        assert graphql == flat
\ No newline at end of file
@@ -0,0 +1,146 @@
+import json
+import os
+import pytest
+import requests
+import responses
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.incremental import IncompleteListingError, IndexState, collect_changes, apply_to_tree
+from module_utils.GitLab.main import save_repository, save_group_tree, sync_incremental
+from module_utils.GitLab.session import GitLabSession
+
+BASE = "https://gitlab.example.com/api/v4"
+
+
+def _project(pid, name, namespace_id, activity="2025-11-18T10:00:00Z"):
+    return {
+        "id": pid,
+        "name": name,
+        "web_url": f"https://gitlab.example.com/{name}",
+        "last_activity_at": activity,
+        "description": None,
+        "visibility": "private",
+        "namespace": {"id": namespace_id},
+    }
+
+
+class TestIncrementalSync:
+
+    @pytest.fixture
+    def snapshot(self, tmp_path):
+        """Første fulde kørsel: Root med undergrupperne A og B"""
+        tree = {
+            "id": 100, "name": "Root", "full_path": "root",
+            "projects": [_project(1, "p1", 100)],
+            "subgroups": [
+                {"id": 101, "name": "A", "full_path": "root/a", "projects": [_project(2, "p2", 101)], "subgroups": []},
+                {"id": 102, "name": "B", "full_path": "root/b", "projects": [_project(3, "p3", 102)], "subgroups": []},
+            ],
+        }
+        data_path = str(tmp_path / "data")
+        save_group_tree(tree, data_path)
+        return data_path, IndexState.from_tree(tree, data_path, "2025-11-18T12:00:00Z")
+
+    def test_state_roundtrip(self, snapshot, tmp_path):
+        """Test at state gemmes og indlæses uændret"""
+        _, state = snapshot
+        path = str(tmp_path / "state.json")
+
+        state.save(path)
+
+        assert IndexState.load(path) == state
+        assert state.since() == "2025-11-18T11:00:00Z"
+
+    @responses.activate
+    def test_changes_are_merged_into_snapshot(self, snapshot):
+        """Test at ændrede projekter, nye og fjernede grupper flettes ind"""
+        data_path, state = snapshot
+
+        responses.add(responses.GET, f"{BASE}/groups/100", json={"id": 100, "name": "Root"}, status=200)
+        responses.add(
+            responses.GET, f"{BASE}/groups/100/descendant_groups?per_page=100",
+            json=[
+                {"id": 101, "name": "A", "parent_id": 100},
+                {"id": 103, "name": "C", "parent_id": 100},
+            ],
+            status=200
+        )
+        responses.add(responses.GET, f"{BASE}/groups/102", status=404)
+        responses.add(
+            responses.GET, f"{BASE}/groups/103/projects?per_page=100",
+            json=[_project(4, "p4", 103)], status=200
+        )
+        responses.add(
+            responses.GET,
+            f"{BASE}/groups/100/projects?include_subgroups=true&with_shared=false&per_page=100"
+            f"&last_activity_after=2025-11-18T11:00:00Z",
+            json=[_project(2, "p2-renamed", 101, activity="2025-11-18T13:00:00Z")],
+            status=200
+        )
+
+        api = GitLabAPI("https://gitlab.example.com", "token")
+        changes = collect_changes(api, 100, state, data_path)
+        stats = apply_to_tree(changes, state, save_repository)
+
+        root = os.path.join(data_path, "Root")
+        assert stats == {"updated": 2, "removed": 1, "failed": 0}
+        assert os.path.exists(os.path.join(root, "A", "p2-renamed.json"))
+        assert not os.path.exists(os.path.join(root, "A", "p2.json"))
+        assert os.path.exists(os.path.join(root, "C", "p4.json"))
+        assert not os.path.exists(os.path.join(root, "B"))
+        assert os.path.exists(os.path.join(root, "p1.json"))
+        assert set(state.projects) == {"1", "2", "4"}
+
+        with open(os.path.join(root, "A", "p2-renamed.json"), encoding="utf-8") as f:
+            assert json.load(f)["last_activity_at"] == "2025-11-18T13:00:00Z"
+
+
+    @responses.activate
+    def test_failed_group_listing_aborts_sync(self, snapshot):
+        """Test at en fejlet gruppeliste afbryder synkroniseringen uden at fjerne noget"""
+        data_path, state = snapshot
+        before = IndexState(state.last_run, dict(state.groups), dict(state.projects))
+        responses.add(responses.GET, f"{BASE}/groups/100", json={"id": 100, "name": "Root"}, status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/descendant_groups?per_page=100", status=502)
+
+        api = GitLabAPI("https://gitlab.example.com", "token", session=GitLabSession(sleep=lambda seconds: None))
+        with pytest.raises(requests.HTTPError):
+            sync_incremental(api, 100, state, data_path)
+
+        assert os.path.exists(os.path.join(data_path, "Root", "B", "p3.json"))
+        assert state == before
+
+    @responses.activate
+    def test_group_missing_from_listing_is_not_removed(self, snapshot):
+        """Test at en gruppe, der stadig findes under roden, ikke tælles som fjernet"""
+        data_path, state = snapshot
+        responses.add(responses.GET, f"{BASE}/groups/100",
+                      json={"id": 100, "name": "Root", "full_path": "root"}, status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/descendant_groups?per_page=100",
+                      json=[{"id": 101, "name": "A", "parent_id": 100}], status=200)
+        responses.add(responses.GET, f"{BASE}/groups/102",
+                      json={"id": 102, "name": "B", "full_path": "root/b"}, status=200)
+
+        api = GitLabAPI("https://gitlab.example.com", "token")
+        with pytest.raises(IncompleteListingError):
+            collect_changes(api, 100, state, data_path)
+
+        assert os.path.exists(os.path.join(data_path, "Root", "B", "p3.json"))
+
+    @responses.activate
+    def test_group_moved_out_of_root_is_removed(self, snapshot):
+        """Test at en gruppe, der er flyttet ud af roden, fjernes"""
+        data_path, state = snapshot
+        responses.add(responses.GET, f"{BASE}/groups/100",
+                      json={"id": 100, "name": "Root", "full_path": "root"}, status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/descendant_groups?per_page=100",
+                      json=[{"id": 101, "name": "A", "parent_id": 100}], status=200)
+        responses.add(responses.GET, f"{BASE}/groups/102",
+                      json={"id": 102, "name": "B", "full_path": "elsewhere/b"}, status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/projects?include_subgroups=true&with_shared=false"
+                      f"&per_page=100&last_activity_after=2025-11-18T11:00:00Z", json=[], status=200)
+
+        api = GitLabAPI("https://gitlab.example.com", "token")
+        changes = collect_changes(api, 100, state, data_path)
+
+        assert set(changes.removed_groups) == {"102"}
+        assert changes.removed_projects == {"3"}
\ No newline at end of file
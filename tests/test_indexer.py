@@ -0,0 +1,102 @@
+import json
+import os
+import pytest
+import responses
+from library.indexer import index_repositories
+from module_utils.jsonstream import AtomicJsonWriter, read_records
+
+BASE = "https://gitlab.example.com/api/v4"
+
+RECORDS = [
+    {"id": 1, "name": "æøå-repo", "description": "Beskrivelse 🚀", "visibility": "private"},
+    {"id": 2, "name": "repo-2", "description": None, "visibility": "internal"},
+]
+
+
+class TestAtomicJsonWriter:
+
+    def test_json_output_matches_json_dump(self, tmp_path):
+        """Test at den streamede array er byte-identisk med json.dump"""
+        path = str(tmp_path / "out.json")
+
+        with AtomicJsonWriter(path) as writer:
+            for record in RECORDS:
+                writer.write(record)
+
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == json.dumps(RECORDS, indent=2, ensure_ascii=False)
+
+    def test_empty_array(self, tmp_path):
+        """Test at en tom kørsel giver en gyldig tom liste"""
+        path = str(tmp_path / "out.json")
+
+        with AtomicJsonWriter(path):
+            pass
+
+        assert list(read_records(path)) == []
+
+    def test_jsonl_roundtrip(self, tmp_path):
+        """Test at JSON Lines kan læses tilbage"""
+        path = str(tmp_path / "out.jsonl")
+
+        with AtomicJsonWriter(path, "jsonl") as writer:
+            for record in RECORDS:
+                writer.write(record)
+
+        assert list(read_records(path, "jsonl")) == RECORDS
+
+    def test_crash_keeps_previous_file(self, tmp_path):
+        """Test at en fejl midt i skrivningen ikke efterlader en halv fil"""
+        path = tmp_path / "out.json"
+        path.write_text("[]", encoding="utf-8")
+
+        with pytest.raises(RuntimeError):
+            with AtomicJsonWriter(str(path)) as writer:
+                writer.write(RECORDS[0])
+                raise RuntimeError("crash")
+
+        assert path.read_text(encoding="utf-8") == "[]"
+        assert os.listdir(tmp_path) == ["out.json"]
+
+
+class TestIndexRepositories:
+
+    @pytest.fixture
+    def group(self):
+        responses.add(responses.GET, f"{BASE}/groups/100", json={"id": 100, "name": "Root"}, status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/projects?per_page=100", json=[{
+            "id": 1,
+            "name": "repo-1",
+            "web_url": "https://gitlab.example.com/root/repo-1",
+            "last_activity_at": "2025-11-18T10:00:00Z",
+            "visibility": "private",
+        }], status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/subgroups?per_page=100", json=[], status=200)
+
+    @responses.activate
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_index_writes_repositories(self, group, tmp_path, stream):
+        """Test at index_repositories skriver alle repositories, med og uden streaming"""
+        path = str(tmp_path / "repos.json")
+
+        assert index_repositories("https://gitlab.example.com", "token", "100", path, stream=stream)
+
+        assert list(read_records(path)) == [{
+            "id": 1,
+            "name": "repo-1",
+            "description": None,
+            "visibility": "private",
+            "last_activity_at": "2025-11-18T10:00:00Z",
+            "web_url": "https://gitlab.example.com/root/repo-1",
+        }]
+
+    @responses.activate
+    def test_failed_stream_leaves_no_output(self, tmp_path):
+        """Test at en fejlet crawl ikke overskriver outputtet"""
+        responses.add(responses.GET, f"{BASE}/groups/100", status=404)
+        responses.add(responses.GET, f"{BASE}/groups/100/projects?per_page=100", json=[], status=200)
+        responses.add(responses.GET, f"{BASE}/groups/100/subgroups?per_page=100", json=[], status=200)
+        path = str(tmp_path / "repos.json")
+
+        assert index_repositories("https://gitlab.example.com", "token", "100", path, stream=True) is False
+        assert not os.path.exists(path)
@@ -0,0 +1,185 @@
+import gzip
+import io
+import json
+import logging
+import pytest
+import responses
+from module_utils.GitLab.session import GitLabSession
+from module_utils.jsonstream import AtomicJsonWriter
+from module_utils.logger import configure_logging
+from module_utils.metrics import Metrics, endpoint_name, get_metrics
+
+URL = "https://gitlab.example.com/api/v4/groups/100/projects"
+
+
+class TestEndpointName:
+
+    @pytest.mark.parametrize("url, expected", [
+        ("https://gitlab.example.com/api/v4/groups/100", "/groups/:id"),
+        ("https://gitlab.example.com/api/v4/groups/100/projects?page=2", "/groups/:id/projects"),
+        ("https://gitlab.example.com/api/v4/projects/7/repository/files/data%2Fa.json", "/projects/:id/repository/files/:path"),
+        ("https://gitlab.example.com/api/v4/projects/7/repository/commits", "/projects/:id/repository/commits"),
+    ])
+    def test_normalizes_ids_and_paths(self, url, expected):
+        """Test at id'er og filstier ikke giver en label pr. ressource"""
+        assert endpoint_name(url) == expected
+
+
+class TestMetrics:
+
+    def test_counters_are_summed_per_label_set(self):
+        """Test at tællere lægges sammen pr. label-kombination"""
+        metrics = Metrics()
+        metrics.inc("http_requests", status=200)
+        metrics.inc("http_requests", status=200)
+        metrics.inc("http_requests", status=404)
+
+        assert metrics.counter("http_requests", status=200) == 2
+        assert metrics.counter("http_requests") == 3
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test at histogrammets buckets er kumulative som i Prometheus"""
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.observe("latency", 0.05)
+        metrics.observe("latency", 0.5)
+        metrics.observe("latency", 5.0)
+
+        histogram = metrics.histogram("latency")
+        assert histogram["count"] == 3
+        assert histogram["sum"] == pytest.approx(5.55)
+        assert histogram["buckets"] == [1, 2]
+
+    def test_merge_adds_snapshot_from_another_process(self):
+        """Test at et snapshot fra en børneproces lægges til tællere og histogrammer"""
+        child = Metrics(buckets=(0.1, 1.0))
+        child.inc("http_requests", 3, status=200)
+        child.observe("latency", 0.5)
+        parent = Metrics(buckets=(0.1, 1.0))
+        parent.inc("http_requests", status=200)
+        parent.observe("latency", 0.05)
+
+        parent.merge(child.snapshot())
+
+        assert parent.counter("http_requests", status=200) == 4
+        assert parent.histogram("latency") == {"count": 2, "sum": pytest.approx(0.55), "buckets": [1, 2]}
+
+    def test_stage_records_duration(self):
+        """Test at en stage måles med det injicerede ur"""
+        ticks = iter([10.0, 12.5])
+        metrics = Metrics(clock=lambda: next(ticks))
+
+        with metrics.stage("crawl"):
+            pass
+
+        assert metrics.histogram("stage_duration_seconds", stage="crawl")["sum"] == 2.5
+
+    def test_prometheus_text_format(self):
+        """Test at Prometheus-output har typer, _total og +Inf bucket"""
+        metrics = Metrics(buckets=(1.0,))
+        metrics.inc("http_requests", method="GET", status=200)
+        metrics.observe("stage_duration_seconds", 0.5, stage="crawl")
+
+        text = metrics.to_prometheus()
+
+        assert "# TYPE gitlab_indexer_http_requests_total counter" in text
+        assert 'gitlab_indexer_http_requests_total{method="GET",status="200"} 1' in text
+        assert 'gitlab_indexer_stage_duration_seconds_bucket{stage="crawl",le="+Inf"} 1' in text
+        assert 'gitlab_indexer_stage_duration_seconds_count{stage="crawl"} 1' in text
+
+    def test_json_report(self, tmp_path):
+        """Test at JSON-rapporten indeholder ekstra felter og alle metrics"""
+        metrics = Metrics()
+        metrics.inc("repositories_saved", 3)
+        path = tmp_path / "report.json"
+
+        metrics.write_json(str(path), extra={"started": "2024-01-01T00:00:00Z"})
+
+        report = json.loads(path.read_text(encoding="utf-8"))
+        assert report["started"] == "2024-01-01T00:00:00Z"
+        assert report["metrics"]["counters"] == [{"name": "repositories_saved", "labels": {}, "value": 3}]
+        assert not (tmp_path / "report.json.tmp").exists()
+
+
+class TestInstrumentation:
+
+    @responses.activate
+    def test_session_records_requests_and_retries(self):
+        """Test at sessionen tæller kald, statuskoder og retries pr. endpoint"""
+        responses.add(responses.GET, URL, status=502)
+        responses.add(responses.GET, URL, json=[{"id": 1}], status=200)
+        metrics = Metrics()
+        session = GitLabSession(sleep=lambda seconds: None, metrics=metrics)
+
+        session.get(URL)
+
+        assert metrics.counter("http_requests", method="GET", endpoint="/groups/:id/projects", status=502) == 1
+        assert metrics.counter("http_requests", method="GET", endpoint="/groups/:id/projects", status=200) == 1
+        assert metrics.counter("http_retries") == 1
+        assert metrics.histogram("http_request_duration_seconds", method="GET",
+                                 endpoint="/groups/:id/projects")["count"] == 2
+
+    @responses.activate
+    def test_session_counts_bytes_without_content_length(self):
+        """Test at komprimerede, chunked svar uden Content-Length tælles med de bytes, der blev læst"""
+        body = gzip.compress(json.dumps([{"id": pid} for pid in range(100)]).encode())
+        responses.add(responses.GET, URL, body=body, headers={"Content-Encoding": "gzip"},
+                      auto_calculate_content_length=False)
+        metrics = Metrics()
+
+        response = GitLabSession(metrics=metrics).get(URL)
+
+        assert "Content-Length" not in response.headers
+        assert len(response.json()) == 100
+        assert metrics.counter("http_response_bytes", endpoint="/groups/:id/projects") == len(body)
+
+    def test_writer_records_serialize_and_write_stages(self, tmp_path):
+        """Test at AtomicJsonWriter rapporterer serialiserings- og skrivetid"""
+        metrics = get_metrics()
+        metrics.reset()
+
+        with AtomicJsonWriter(str(tmp_path / "repos.json")) as writer:
+            writer.write({"id": 1})
+            writer.write({"id": 2})
+
+        assert metrics.counter("records_written", format="json") == 2
+        assert metrics.histogram("stage_duration_seconds", stage="serialize")["count"] == 1
+        assert metrics.histogram("stage_duration_seconds", stage="write")["count"] == 1
+
+
+class TestLogging:
+
+    @pytest.fixture(autouse=True)
+    def restore_root_logger(self):
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        yield
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    def test_json_format_includes_extra_fields(self):
+        """Test at JSON-logning giver én parsebar linje med extra-felter"""
+        stream = io.StringIO()
+        configure_logging("info", "json", stream=stream)
+
+        logging.getLogger("indexer").info("📊 Upload done", extra={"upload": {"created": 2}})
+
+        entry = json.loads(stream.getvalue())
+        assert entry["level"] == "info"
+        assert entry["logger"] == "indexer"
+        assert entry["message"] == "📊 Upload done"
+        assert entry["upload"] == {"created": 2}
+
+    def test_quiet_only_logs_warnings(self):
+        """Test at quiet-tilstand kun viser advarsler og fejl"""
+        stream = io.StringIO()
+        configure_logging("debug", "text", quiet=True, stream=stream)
+
+        logging.getLogger("indexer").info("✅ Saved")
+        logging.getLogger("indexer").error("❌ Failed")
+
+        assert stream.getvalue() == "❌ Failed\n"
+
+    def test_rejects_unknown_format(self):
+        """Test at ukendte logformater afvises"""
+        with pytest.raises(ValueError):
+            configure_logging("info", "xml")
\ No newline at end of file
@@ -0,0 +1,107 @@
+import json
+import pytest
+from benchmarks.stub_server import StubGitLabServer, SyntheticGitLab
+from library.indexer import index_repositories
+from module_utils.GitLab.incremental import IndexState
+from module_utils.GitLab.multiroot import fetch_group_trees, merge_trees, parse_group_ids
+from module_utils.metrics import get_metrics
+
+
+def group(gid, name, projects=(), subgroups=()):
+    return {"id": gid, "name": name, "projects": [{"id": p, "name": f"p{p}"} for p in projects],
+            "subgroups": list(subgroups)}
+
+
+@pytest.fixture(scope="module")
+def gitlab():
+    return SyntheticGitLab(depth=2, fanout=2, projects_per_group=2)
+
+
+@pytest.fixture(scope="module")
+def server(gitlab):
+    with StubGitLabServer(gitlab) as server:
+        yield server
+
+
+class TestParseGroupIds:
+
+    @pytest.mark.parametrize("value, expected", [
+        ("123", ["123"]),
+        ("123, 456,,123 ", ["123", "456"]),
+        ([1, 2], ["1", "2"]),
+        (None, []),
+    ])
+    def test_parses_comma_separated_ids(self, value, expected):
+        """Test at kommaseparerede rødder renses og dubletter fjernes"""
+        assert parse_group_ids(value) == expected
+
+
+class TestMergeTrees:
+
+    def test_deduplicates_projects_by_id(self):
+        """Test at et projekt, der deles mellem to rødder, kun tages med én gang"""
+        a = group(1, "a", projects=[10, 11])
+        b = group(2, "b", projects=[11, 12])
+
+        merged, stats = merge_trees([a, b])
+
+        assert [p["id"] for p in merged[1]["projects"]] == [12]
+        assert stats == {"roots": 2, "projects": 3, "duplicate_projects": 1, "duplicate_groups": 0}
+
+    def test_nested_root_is_skipped(self):
+        """Test at en rod, der allerede ligger under en anden rod, ikke gemmes to gange"""
+        child = group(2, "child", projects=[20])
+        parent = group(1, "parent", projects=[10], subgroups=[child])
+
+        merged, stats = merge_trees([parent, group(2, "child", projects=[20])])
+
+        assert [tree["id"] for tree in merged] == [1]
+        assert stats["duplicate_groups"] == 1
+
+    def test_deep_roots_are_merged_without_recursion(self):
+        """Test at dybe rødder flettes uden rekursionsgrænse"""
+        tree = group(2000, "g2000", projects=[2000])
+        for gid in range(1999, 0, -1):
+            tree = group(gid, f"g{gid}", projects=[gid], subgroups=[tree])
+
+        merged, stats = merge_trees([tree, group(5000, "other", projects=[1, 5000])])
+
+        assert stats == {"roots": 2, "projects": 2001, "duplicate_projects": 1, "duplicate_groups": 0}
+        assert [p["id"] for p in merged[1]["projects"]] == [5000]
+
+    def test_state_covers_all_roots(self):
+        """Test at tilstanden indeholder grupper og projekter fra alle rødder"""
+        merged, _ = merge_trees([group(1, "a", projects=[10]), group(2, "b", projects=[20])])
+
+        state = IndexState.from_trees(merged, "data", "2024-01-01T00:00:00Z")
+
+        assert state.groups == {"1": "data/a", "2": "data/b"}
+        assert set(state.projects) == {"10", "20"}
+
+
+class TestMultiRootCrawl:
+
+    def test_roots_are_crawled_in_separate_processes(self, server, gitlab):
+        """Test at hver rod crawles i sin egen proces og flettes uden dubletter"""
+        metrics = get_metrics()
+        metrics.reset()
+        results = fetch_group_trees(server.url, "token", ["2", "1"], processes=2)
+        merged, stats = merge_trees([result["tree"] for result in results])
+
+        assert [result["group_id"] for result in results] == ["2", "1"]
+        assert all(result["http"]["requests"] > 0 for result in results)
+        assert stats["projects"] == gitlab.project_count
+        assert stats["duplicate_groups"] == 1
+        # Børneprocessernes HTTP-metrics når frem til forælderens rapport
+        requests_total = sum(result["http"]["requests"] for result in results)
+        assert metrics.counter("http_requests") == requests_total
+        assert metrics.histogram("http_request_duration_seconds", method="GET", endpoint="/groups/:id")["count"] > 0
+
+    def test_index_repositories_with_several_roots(self, server, gitlab, tmp_path):
+        """Test at indexeren accepterer flere rødder og skriver hvert projekt én gang"""
+        output = tmp_path / "repos.json"
+
+        assert index_repositories(server.url, "token", "1,3", str(output), max_workers=2, processes=2)
+
+        ids = [repo["id"] for repo in json.loads(output.read_text(encoding="utf-8"))]
+        assert sorted(ids) == list(range(1, gitlab.project_count + 1))
\ No newline at end of file
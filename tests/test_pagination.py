@@ -0,0 +1,117 @@
+import pytest
+import responses
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.pagination import Paginator, supports_keyset, with_params
+
+BASE = "https://gitlab.example.com/api/v4/groups/100/projects"
+PROJECTS = "https://gitlab.example.com/api/v4/projects"
+
+
+def _page(start, count):
+    return [{"id": i, "name": f"repo-{i}"} for i in range(start, start + count)]
+
+
+class TestPaginator:
+
+    def test_with_params_merges_query(self):
+        """Test at parametre flettes ind i eksisterende query string"""
+        url = with_params(f"{BASE}?per_page=100", page=3)
+
+        assert url == f"{BASE}?per_page=100&page=3"
+
+    def test_unknown_mode_raises(self):
+        """Test at ukendte pagineringsformer afvises"""
+        with pytest.raises(ValueError):
+            Paginator(lambda url: None, mode="bogus")
+
+    @responses.activate
+    def test_total_pages_are_fetched_in_parallel(self):
+        """Test at resterende sider hentes direkte når X-Total-Pages kendes"""
+        responses.add(
+            responses.GET, f"{BASE}?per_page=100", json=_page(0, 100), status=200,
+            headers={"X-Total-Pages": "3", "X-Page": "1", "Link": f'<{BASE}?per_page=100&page=2>; rel="next"'}
+        )
+        responses.add(responses.GET, f"{BASE}?per_page=100&page=2", json=_page(100, 100), status=200)
+        responses.add(responses.GET, f"{BASE}?per_page=100&page=3", json=_page(200, 10), status=200)
+
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4)
+        repos = api.get_repositories(100)
+
+        assert [r["id"] for r in repos] == list(range(210))
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_keyset_mode_follows_cursor_links(self):
+        """Test at keyset mode beder om keyset og følger next-links"""
+        responses.add(
+            responses.GET, f"{PROJECTS}?per_page=100&pagination=keyset&order_by=id&sort=asc",
+            json=_page(0, 2), status=200,
+            headers={"Link": f'<{PROJECTS}?per_page=100&pagination=keyset&order_by=id&sort=asc&id_after=1>; rel="next"'}
+        )
+        responses.add(
+            responses.GET, f"{PROJECTS}?per_page=100&pagination=keyset&order_by=id&sort=asc&id_after=1",
+            json=_page(2, 1), status=200
+        )
+
+        api = GitLabAPI("https://gitlab.example.com", "token", pagination="keyset")
+
+        assert [r["id"] for r in api.iter_paginated(f"{PROJECTS}?per_page=100")] == [0, 1, 2]
+
+    @responses.activate
+    def test_auto_mode_switches_to_keyset_without_total(self):
+        """Test at auto mode skifter til keyset og undgår dubletter"""
+        responses.add(
+            responses.GET, f"{PROJECTS}?per_page=100", json=[{"id": 5}, {"id": 1}], status=200,
+            headers={"Link": f'<{PROJECTS}?per_page=100&page=2>; rel="next"'}
+        )
+        responses.add(
+            responses.GET, f"{PROJECTS}?per_page=100&pagination=keyset&order_by=id&sort=asc",
+            json=[{"id": 1}, {"id": 2}, {"id": 5}, {"id": 7}], status=200
+        )
+
+        api = GitLabAPI("https://gitlab.example.com", "token", pagination="auto")
+
+        assert sorted(r["id"] for r in api.iter_paginated(f"{PROJECTS}?per_page=100")) == [1, 2, 5, 7]
+
+    @pytest.mark.parametrize("mode", ["keyset", "auto"])
+    @responses.activate
+    def test_group_endpoints_follow_links_instead_of_keyset(self, mode):
+        """Test at endpoints uden keyset-understøttelse følger Link-headeren fra første svar"""
+        responses.add(
+            responses.GET, f"{BASE}?per_page=100", json=_page(0, 2), status=200,
+            headers={"Link": f'<{BASE}?per_page=100&page=2>; rel="next"'}
+        )
+        responses.add(responses.GET, f"{BASE}?per_page=100&page=2", json=_page(2, 1), status=200)
+
+        api = GitLabAPI("https://gitlab.example.com", "token", pagination=mode)
+
+        assert [r["id"] for r in api.get_repositories(100)] == [0, 1, 2]
+        assert len(responses.calls) == 2
+        assert all("pagination=keyset" not in call.request.url for call in responses.calls)
+
+    @pytest.mark.parametrize("url, expected", [
+        (f"{PROJECTS}?per_page=100", True),
+        ("https://gitlab.example.com/api/v4/users", True),
+        (f"{BASE}?per_page=100", False),
+        ("https://gitlab.example.com/api/v4/groups/100/subgroups", False),
+        ("https://gitlab.example.com/api/v4/groups/100/descendant_groups", False),
+    ])
+    def test_supports_keyset(self, url, expected):
+        """Test at kun endpoints på allow-listen bruger keyset"""
+        assert supports_keyset(url) is expected
+
+    @responses.activate
+    def test_generator_yields_before_last_page(self):
+        """Test at elementer kan behandles før sidste side er hentet"""
+        responses.add(
+            responses.GET, f"{BASE}?per_page=100", json=_page(0, 1), status=200,
+            headers={"Link": f'<{BASE}?per_page=100&page=2>; rel="next"'}
+        )
+        responses.add(responses.GET, f"{BASE}?per_page=100&page=2", json=_page(1, 1), status=200)
+
+        api = GitLabAPI("https://gitlab.example.com", "token")
+        items = api.iter_paginated(f"{BASE}?per_page=100")
+
+        assert next(items)["id"] == 0
+        assert len(responses.calls) == 1
+        assert next(items)["id"] == 1
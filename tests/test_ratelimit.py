@@ -0,0 +1,118 @@
+import pytest
+import responses
+from module_utils.GitLab.ratelimit import RateLimiter, retry_after_seconds
+from module_utils.GitLab.session import GitLabSession
+from module_utils.GitLab.query import GitLabAPI
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TestRateLimiter:
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    def test_retry_after_header_parsing(self):
+        """Test at Retry-After og RateLimit-Reset fortolkes korrekt"""
+        assert retry_after_seconds({"Retry-After": "7"}, now=0) == 7
+        assert retry_after_seconds({"RateLimit-Reset": "130"}, now=100) == 30
+        assert retry_after_seconds({}, now=0, default=2.5) == 2.5
+        assert retry_after_seconds({"Retry-After": "Thu, 01 Jan 1970 00:01:40 GMT"}, now=40) == 60
+
+    def test_budget_headers_set_token_bucket_rate(self, clock):
+        """Test at det resterende budget fordeles over vinduet"""
+        limiter = RateLimiter(clock=clock, wall_clock=clock, sleep=clock.sleep)
+
+        limiter.acquire()
+        limiter.release(FakeResponse(headers={"RateLimit-Remaining": "50", "RateLimit-Reset": str(clock.now + 10)}))
+
+        assert limiter.rate == 5
+        assert limiter.remaining == 50
+
+    def test_token_bucket_paces_requests(self, clock):
+        """Test at requests spredes når bucket er tom"""
+        limiter = RateLimiter(max_concurrency=2, max_rate=2, clock=clock, wall_clock=clock, sleep=clock.sleep)
+
+        start = clock.now
+        for _ in range(6):
+            limiter.acquire()
+            limiter.release()
+
+        # To tokens i burst, derefter 2 pr. sekund
+        assert clock.now - start == pytest.approx(2.0)
+
+    def test_429_pauses_and_halves_concurrency(self, clock):
+        """Test at 429 giver pause og multiplikativ nedgang"""
+        limiter = RateLimiter(max_concurrency=16, initial_concurrency=8, clock=clock,
+                              wall_clock=clock, sleep=clock.sleep)
+
+        limiter.acquire()
+        limiter.release(FakeResponse(429, {"Retry-After": "5"}))
+
+        assert limiter.concurrency == 4
+        assert limiter.throttled == 1
+
+        start = clock.now
+        limiter.acquire()
+        assert clock.now - start == pytest.approx(5.0)
+
+    def test_fast_successes_increase_concurrency(self, clock):
+        """Test at hurtige svar øger antallet af samtidige requests"""
+        limiter = RateLimiter(max_concurrency=8, initial_concurrency=2, clock=clock,
+                              wall_clock=clock, sleep=clock.sleep)
+
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(FakeResponse(), latency=0.1)
+
+        assert limiter.concurrency > 2
+        assert limiter.concurrency <= 8
+
+    def test_slow_responses_decrease_concurrency(self, clock):
+        """Test at langsomme svar sænker antallet af samtidige requests"""
+        limiter = RateLimiter(max_concurrency=8, initial_concurrency=8, target_latency=1.0,
+                              clock=clock, wall_clock=clock, sleep=clock.sleep)
+
+        limiter.acquire()
+        limiter.release(FakeResponse(), latency=5.0)
+
+        assert limiter.concurrency == 4
+
+
+class TestThrottledPagination:
+
+    @responses.activate
+    def test_429_does_not_truncate_pagination(self):
+        """Test at en 429 midt i pagineringen ikke giver delvise data"""
+        base = "https://gitlab.example.com/api/v4/groups/100/projects"
+        responses.add(
+            responses.GET, f"{base}?per_page=100",
+            json=[{"id": 1}], status=200,
+            headers={"Link": f'<{base}?per_page=100&page=2>; rel="next"'}
+        )
+        responses.add(responses.GET, f"{base}?per_page=100&page=2", status=429, headers={"Retry-After": "0"})
+        responses.add(responses.GET, f"{base}?per_page=100&page=2", json=[{"id": 2}], status=200)
+
+        session = GitLabSession(sleep=lambda seconds: None)
+        api = GitLabAPI("https://gitlab.example.com", "token", session=session)
+
+        repos = api.get_repositories(100)
+
+        assert [r["id"] for r in repos] == [1, 2]
+        assert session.stats()["throttled"] == 1
@@ -0,0 +1,116 @@
+import pytest
+from module_utils.GitLab.incremental import ChangeSet, IndexState, apply_to_records
+from module_utils.GitLab.models import Repository, Group, RepositoryTable, parse_timestamp
+
+
+def api_project(pid, **overrides):
+    data = {
+        "id": pid,
+        "name": f"repo-{pid}",
+        "description": "Delt beskrivelse",
+        "visibility": "private",
+        "last_activity_at": "2025-11-18T10:00:00Z",
+        "web_url": f"https://gitlab.example.com/group/repo-{pid}",
+        "name_with_namespace": f"Group / repo-{pid}",
+    }
+    data.update(overrides)
+    return data
+
+
+class TestSlottedModels:
+
+    def test_records_have_no_instance_dict(self):
+        """Test at modellerne bruger __slots__ i stedet for __dict__"""
+        repo = Repository.from_api(api_project(1))
+        group = Group.from_tree({"id": 1, "name": "g", "projects": [], "subgroups": []})
+
+        assert not hasattr(repo, "__dict__")
+        assert not hasattr(group, "__dict__")
+        assert repo.to_dict()["name"] == "repo-1"
+
+
+class TestRepositoryTable:
+
+    def test_roundtrip_matches_to_dict(self):
+        """Test at tabellen giver præcis de samme dicts som Repository.to_dict"""
+        projects = [
+            api_project(1),
+            api_project(2, last_activity_at="2025-11-18T10:00:00.123Z", visibility="public"),
+            api_project(3, description=None, visibility=None),
+            api_project(4, last_activity_at="2025-11-18T11:00:00+01:00", visibility="hemmelig"),
+        ]
+
+        table = RepositoryTable.from_api(projects)
+
+        assert list(table.to_dicts()) == [Repository.from_api(p).to_dict() for p in projects]
+
+    def test_columns_are_typed_arrays(self):
+        """Test at ID'er, tidsstempler og synlighed ligger i typede arrays"""
+        table = RepositoryTable.from_api([api_project(1), api_project(2, visibility="internal")])
+
+        assert table.ids.typecode == "q"
+        assert list(table.activity) == [parse_timestamp("2025-11-18T10:00:00Z")] * 2
+        assert list(table.visibility_codes) == [1, 2]
+
+    def test_strings_are_pooled(self):
+        """Test at gentagne beskrivelser deler samme objekt"""
+        table = RepositoryTable.from_api([api_project(1), api_project(2)])
+
+        assert table.descriptions[0] is table.descriptions[1]
+
+    def test_append_existing_id_updates_row(self):
+        """Test at et kendt ID opdaterer rækken i stedet for at tilføje en ny"""
+        table = RepositoryTable.from_api([api_project(1)])
+
+        table.append(Repository.from_api(api_project(1, name="omdøbt")))
+
+        assert len(table) == 1
+        assert table.get(1).name == "omdøbt"
+        assert table.get(99) is None
+        assert 1 in table
+
+    def test_filters(self):
+        """Test at filtre på dato og synlighed sammenligner koder og tal"""
+        table = RepositoryTable.from_api([
+            api_project(1, last_activity_at="2024-01-01T00:00:00Z"),
+            api_project(2, last_activity_at="2025-06-01T00:00:00.500Z", visibility="public"),
+        ])
+
+        assert table.active_since("2025-01-01T00:00:00Z") == [1]
+        assert table.active_since(0) == [0, 1]
+        assert table.with_visibility("public") == [1]
+        assert table.with_visibility("ukendt") == []
+
+    def test_remove_leaves_other_rows_in_place(self):
+        """Test at et fjernet projekt forsvinder fra opslag, iteration og filtre uden at flytte andre rækker"""
+        table = RepositoryTable.from_api([api_project(1), api_project(2), api_project(3)])
+
+        assert table.remove(2) is True
+        assert table.remove(2) is False
+
+        assert len(table) == 2
+        assert 2 not in table
+        assert [repo.id for repo in table] == [1, 3]
+        assert table.with_visibility("private") == [0, 2]
+        assert table.row(3) == 2
+
+        table.append(Repository.from_api(api_project(2)))
+        assert [repo.id for repo in table] == [1, 3, 2]
+
+    def test_incremental_merge_updates_table(self):
+        """Test at den inkrementelle fletning opdaterer, tilføjer og fjerner rækker i tabellen"""
+        table = RepositoryTable.from_api([api_project(1), api_project(2)])
+        state = IndexState(projects={str(pid): {"group_id": "10", "name": f"repo-{pid}"} for pid in (1, 2)})
+        changes = ChangeSet(groups={"10": "root"}, removed_projects={"2"},
+                            updated={"1": (api_project(1, name="omdøbt"), "10"), "5": (api_project(5), "10")})
+
+        stats = apply_to_records(changes, state, table)
+
+        assert stats == {"updated": 2, "removed": 1}
+        assert [repo["name"] for repo in table.to_dicts()] == ["omdøbt", "repo-5"]
+        assert set(state.projects) == {"1", "5"}
+
+    def test_missing_required_field(self):
+        """Test at manglende felter stadig fejler som i from_api"""
+        with pytest.raises(KeyError):
+            RepositoryTable.from_api([{"id": 1, "name": "x"}])
\ No newline at end of file
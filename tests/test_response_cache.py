@@ -0,0 +1,83 @@
+import pytest
+import responses
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.cache import ResponseCache
+
+URL = "https://gitlab.example.com/api/v4/groups/100/projects?per_page=100"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache:
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @responses.activate
+    def test_etag_revalidation_serves_cached_body(self, tmp_path, clock):
+        """Test at 304 giver det cachede svar og at If-None-Match sendes"""
+        responses.add(responses.GET, URL, json=[{"id": 1}], status=200, headers={"ETag": 'W/"abc"'})
+        responses.add(responses.GET, URL, status=304, headers={"ETag": 'W/"abc"'})
+
+        cache = ResponseCache(str(tmp_path), clock=clock)
+        api = GitLabAPI("https://gitlab.example.com", "token", cache=cache)
+
+        assert api.get_repositories(100) == [{"id": 1}]
+        assert api.get_repositories(100) == [{"id": 1}]
+
+        assert responses.calls[1].request.headers["If-None-Match"] == 'W/"abc"'
+        assert cache.stats()["revalidated"] == 1
+
+    @responses.activate
+    def test_ttl_skips_revalidation(self, tmp_path, clock):
+        """Test at friske svar i TTL mode ikke rammer serveren"""
+        responses.add(responses.GET, URL, json=[{"id": 1}], status=200)
+
+        cache = ResponseCache(str(tmp_path), ttl=60, clock=clock)
+        api = GitLabAPI("https://gitlab.example.com", "token", cache=cache)
+
+        api.get_repositories(100)
+        clock.now += 30
+        assert api.get_repositories(100) == [{"id": 1}]
+        assert len(responses.calls) == 1
+
+        clock.now += 60
+        api.get_repositories(100)
+        assert len(responses.calls) == 2
+
+    def test_cache_is_scoped_by_token(self):
+        """Test at forskellige tokens ikke deler cache-nøgler"""
+        assert ResponseCache.key(URL, "token-a") != ResponseCache.key(URL, "token-b")
+
+    def test_lru_eviction_respects_size_limit(self, tmp_path, clock):
+        """Test at de mindst brugte entries smides ud først"""
+        cache = ResponseCache(str(tmp_path), max_bytes=400, clock=clock)
+
+        for name in ("a", "b", "c"):
+            clock.now += 1
+            cache.put(name, b"x" * 60, None, {})
+
+        clock.now += 1
+        cache.get("a")
+        clock.now += 1
+        cache.put("d", b"x" * 60, None, {})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["bytes"] <= 400
+
+    def test_index_survives_restart(self, tmp_path, clock):
+        """Test at cachen genindlæses fra disk"""
+        ResponseCache(str(tmp_path), clock=clock).put("a", b"[]", '"etag"', {"Link": "<x>"})
+
+        entry = ResponseCache(str(tmp_path), clock=clock).get("a")
+
+        assert entry.etag == '"etag"'
+        assert entry.headers == {"Link": "<x>"}
@@ -0,0 +1,119 @@
+import json
+import pytest
+from module_utils.search_index import SearchIndex, group_full_path, main
+
+RECORDS = [
+    {"id": 1, "name": "terraform-modules", "description": "Shared infrastructure modules",
+     "web_url": "https://gitlab.example.com/platform/infra/terraform-modules"},
+    {"id": 2, "name": "web-frontend", "description": "Kundeportal i React",
+     "web_url": "https://gitlab.example.com/apps/web-frontend"},
+    {"id": 3, "name": "ansible-roles", "description": "Roles that install terraform on runners",
+     "web_url": "https://gitlab.example.com/platform/ansible-roles"},
+    {"id": 4, "name": "æøå-værktøj", "description": None,
+     "web_url": "https://gitlab.example.com/apps/æøå-værktøj"},
+]
+
+
+@pytest.fixture(params=["memory", "mmap"])
+def index(request, tmp_path):
+    built = SearchIndex.build(RECORDS)
+    if request.param == "memory":
+        yield built
+        return
+    path = str(tmp_path / "repos.idx")
+    built.save(path)
+    with SearchIndex.load(path) as loaded:
+        yield loaded
+
+
+def ids(results):
+    return [doc["id"] for _, doc in results]
+
+
+class TestSearchIndex:
+
+    def test_name_ranks_above_description(self, index):
+        """Test at et match i navnet rangeres over et match i beskrivelsen"""
+        assert ids(index.search("terraform")) == [1, 3]
+
+    def test_prefix(self, index):
+        """Test at præfikser matcher hele ord"""
+        assert ids(index.search("front", mode="prefix")) == [2]
+        assert index.search("ontend", mode="prefix") == []
+
+    def test_substring(self, index):
+        """Test at delstrenge inde i ord matcher"""
+        assert ids(index.search("ontend", mode="substring")) == [2]
+        assert ids(index.search("nsi", mode="substring")) == [3]
+
+    def test_fuzzy_tolerates_typos(self, index):
+        """Test at stavefejl stadig finder repositoriet"""
+        assert ids(index.search("terrafrom", mode="fuzzy"))[0] == 1
+        assert ids(index.search("ansibel"))[0] == 3
+
+    def test_group_path_is_searchable(self, index):
+        """Test at gruppens fulde sti er indekseret"""
+        assert ids(index.search("platform")) == [1, 3]
+        assert ids(index.search("platform infra")) == [1]
+
+    def test_all_terms_must_match(self, index):
+        """Test at alle ord i forespørgslen skal matche"""
+        assert index.search("terraform react") == []
+
+    def test_unicode(self, index):
+        """Test at danske tegn tokeniseres korrekt"""
+        assert ids(index.search("værktøj")) == [4]
+
+    def test_unknown_mode(self, index):
+        """Test at en ukendt tilstand afvises"""
+        with pytest.raises(ValueError):
+            index.search("web", mode="regex")
+
+
+class TestPersistence:
+
+    def test_loaded_index_returns_records(self, tmp_path):
+        """Test at et indlæst index giver de samme poster som det byggede"""
+        path = str(tmp_path / "repos.idx")
+        SearchIndex.build(RECORDS).save(path)
+
+        with SearchIndex.load(path) as index:
+            assert len(index) == 4
+            score, doc = index.search("web-frontend")[0]
+            assert doc["full_path"] == "apps"
+            assert doc["web_url"] == RECORDS[1]["web_url"]
+
+    def test_rejects_foreign_file(self, tmp_path):
+        """Test at en fil der ikke er et index afvises"""
+        path = tmp_path / "repos.idx"
+        path.write_bytes(b"x" * 64)
+
+        with pytest.raises(ValueError):
+            SearchIndex.load(str(path))
+
+    def test_empty_index(self, tmp_path):
+        """Test at et tomt index kan gemmes og indlæses"""
+        path = str(tmp_path / "repos.idx")
+        SearchIndex.build([]).save(path)
+
+        with SearchIndex.load(path) as index:
+            assert len(index) == 0
+            assert index.search("web") == []
+
+
+def test_group_full_path():
+    """Test at gruppestien findes fra web_url eller eksplicitte felter"""
+    assert group_full_path(RECORDS[0]) == "platform/infra"
+    assert group_full_path({"group_path": ["root", "team"]}) == "root/team"
+    assert group_full_path({"web_url": None}) == ""
+
+
+def test_cli_build_and_find(tmp_path, capsys):
+    """Test at CLI'en kan bygge og søge i et index"""
+    source = tmp_path / "repos.json"
+    source.write_text(json.dumps(RECORDS), encoding="utf-8")
+    index = str(tmp_path / "repos.idx")
+
+    assert main(["build", str(source), index]) == 0
+    assert main(["find", index, "terafrom"]) == 0
+    assert "terraform-modules" in capsys.readouterr().out
\ No newline at end of file
@@ -0,0 +1,107 @@
+import json
+import pytest
+import module_utils.serializer as serializer_module
+from module_utils.serializer import Serializer, available_backends, configure, get_serializer
+from module_utils.jsonstream import AtomicJsonWriter, read_records
+
+RECORD = {
+    "id": 1,
+    "name": "æøå-repo",
+    "description": "Beskrivelse 🚀 med \"citat\"\nog linjeskift",
+    "visibility": None,
+    "tags": [],
+    "nested": {"a": [1, 2], "b": {}},
+}
+
+
+@pytest.fixture(params=available_backends())
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def restore_default():
+    previous = serializer_module._default
+    yield
+    serializer_module._default = previous
+
+
+class TestSerializer:
+
+    def test_pretty_matches_stdlib(self, backend):
+        """Test at pretty-output er byte-identisk med json.dumps(indent=2)"""
+        expected = json.dumps(RECORD, indent=2, ensure_ascii=False).encode("utf-8")
+        assert Serializer(backend).dumps(RECORD) == expected
+
+    def test_compact(self, backend):
+        """Test at compact-output ikke har whitespace"""
+        expected = json.dumps(RECORD, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        assert Serializer(backend, compact=True).dumps(RECORD) == expected
+        assert Serializer(backend).dumps(RECORD, compact=True) == expected
+
+    def test_loads_bytes_and_str(self, backend):
+        """Test at både bytes og str kan læses"""
+        serializer = Serializer(backend)
+        data = serializer.dumps(RECORD)
+        assert serializer.loads(data) == RECORD
+        assert serializer.loads(data.decode("utf-8")) == RECORD
+
+    def test_file_roundtrip(self, backend, tmp_path):
+        """Test at filer skrives og læses som bytes"""
+        path = str(tmp_path / "repo.json")
+        serializer = Serializer(backend)
+
+        serializer.dump_file(RECORD, path)
+
+        assert serializer.load_file(path) == RECORD
+
+    def test_unknown_backend(self):
+        """Test at en ukendt backend afvises"""
+        with pytest.raises(ValueError):
+            Serializer("pickle")
+
+    def test_missing_optional_backend(self, monkeypatch):
+        """Test at orjson kun kan vælges når den er installeret"""
+        monkeypatch.setattr(serializer_module, "orjson", None)
+
+        assert Serializer().backend == "json"
+        with pytest.raises(ValueError):
+            Serializer("orjson")
+
+    def test_default_from_environment(self, monkeypatch, restore_default):
+        """Test at standard-serializeren læser backend og compact fra miljøet"""
+        monkeypatch.setenv("GITLAB_JSON_BACKEND", "json")
+        monkeypatch.setenv("GITLAB_JSON_COMPACT", "true")
+        serializer_module._default = None
+
+        serializer = get_serializer()
+
+        assert serializer.backend == "json"
+        assert serializer.compact is True
+
+
+class TestWriterWithSerializer:
+
+    def test_compact_array_roundtrip(self, backend, tmp_path):
+        """Test at en compact JSON-array kan læses tilbage"""
+        path = str(tmp_path / "out.json")
+        serializer = Serializer(backend, compact=True)
+
+        with AtomicJsonWriter(path, serializer=serializer) as writer:
+            writer.write(RECORD)
+            writer.write({"id": 2})
+
+        with open(path, "rb") as f:
+            assert b"\n" not in f.read()
+        assert list(read_records(path, serializer=serializer)) == [RECORD, {"id": 2}]
+
+    def test_configure_changes_default(self, restore_default, tmp_path):
+        """Test at configure bruges af skriverne"""
+        configure("json", compact=True)
+        path = str(tmp_path / "out.json")
+
+        with AtomicJsonWriter(path) as writer:
+            writer.write({"id": 1})
+
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == '[{"id":1}]'
\ No newline at end of file
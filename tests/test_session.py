@@ -0,0 +1,97 @@
+import pytest
+import requests
+import responses
+from module_utils.GitLab.session import GitLabSession
+from module_utils.GitLab.query import GitLabAPI
+from settings.upload import GitLabUploader
+
+URL = "https://gitlab.example.com/api/v4/groups/100"
+
+
+class TestGitLabSession:
+
+    @pytest.fixture
+    def session(self):
+        """Session uden rigtige pauser mellem retries"""
+        return GitLabSession(max_retries=3, sleep=lambda seconds: None)
+
+    @responses.activate
+    def test_retries_server_errors_until_success(self, session):
+        """Test at 5xx svar forsøges igen med backoff"""
+        responses.add(responses.GET, URL, status=502)
+        responses.add(responses.GET, URL, status=503)
+        responses.add(responses.GET, URL, json={"id": 100}, status=200)
+
+        response = session.get(URL)
+
+        assert response.status_code == 200
+        assert len(responses.calls) == 3
+        assert session.stats()["retries"] == 2
+
+    @responses.activate
+    def test_gives_up_after_max_retries(self, session):
+        """Test at sidste svar returneres når retries er brugt op"""
+        responses.add(responses.GET, URL, status=500)
+
+        response = session.get(URL)
+
+        assert response.status_code == 500
+        assert len(responses.calls) == 4
+
+    @responses.activate
+    def test_connection_errors_are_retried(self, session):
+        """Test at netværksfejl forsøges igen og til sidst kastes"""
+        responses.add(responses.GET, URL, body=requests.ConnectionError("reset"))
+
+        with pytest.raises(requests.ConnectionError):
+            session.get(URL)
+
+        assert len(responses.calls) == 4
+
+    @responses.activate
+    def test_other_request_errors_release_limiter_slot(self):
+        """Test at fx ChunkedEncodingError giver pladsen i rate limiteren tilbage"""
+        session = GitLabSession(pool_size=2, max_retries=0, sleep=lambda seconds: None)
+        responses.add(responses.GET, URL, body=requests.exceptions.ChunkedEncodingError("broken"))
+        responses.add(responses.GET, URL, body=requests.exceptions.ChunkedEncodingError("broken"))
+        responses.add(responses.GET, URL, json={"id": 100}, status=200)
+
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ChunkedEncodingError):
+                session.get(URL)
+
+        assert session.get(URL).status_code == 200
+        assert session.rate_limiter._in_flight == 0
+
+    @responses.activate
+    def test_post_is_not_retried(self, session):
+        """Test at ikke-idempotente kald ikke gentages"""
+        responses.add(responses.POST, URL, status=502)
+
+        response = session.post(URL, json={})
+
+        assert response.status_code == 502
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_default_timeout_is_applied(self, session):
+        """Test at alle kald får en timeout"""
+        responses.add(responses.GET, URL, json={}, status=200)
+
+        session.get(URL)
+
+        assert responses.calls[0].request.req_kwargs["timeout"] == session.timeout
+
+    def test_backoff_is_bounded(self):
+        """Test at backoff aldrig overstiger loftet"""
+        session = GitLabSession(backoff_factor=1, backoff_max=4)
+
+        for attempt in range(1, 10):
+            assert 0 <= session._backoff(attempt) <= 4
+
+    def test_api_and_uploader_share_session(self, session):
+        """Test at API og uploader kan dele samme connection pool"""
+        api = GitLabAPI("https://gitlab.example.com", "token", session=session)
+        uploader = GitLabUploader("https://gitlab.example.com", "token", "1", session=session)
+
+        assert api.session is uploader.session
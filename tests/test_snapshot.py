@@ -0,0 +1,123 @@
+import json
+import os
+import pytest
+from module_utils.snapshot import SnapshotReader, iter_tree_records, write_snapshot
+
+
+def project(pid, name=None):
+    return {
+        "id": pid,
+        "name": name or f"repo-{pid}",
+        "web_url": f"https://gitlab.example.com/p/{pid}",
+        "last_activity_at": "2024-01-01T00:00:00Z",
+        "description": "Beskrivelse æøå",
+        "visibility": "private",
+    }
+
+
+TREE = {
+    "id": 1,
+    "name": "root",
+    "projects": [project(30), project(2)],
+    "subgroups": [
+        {"id": 2, "name": "team", "projects": [project(17)], "subgroups": [
+            {"id": 3, "name": "tom", "projects": [], "subgroups": []},
+        ]},
+    ],
+}
+
+
+class TestSnapshot:
+
+    def test_roundtrip_sorted_by_id(self, tmp_path):
+        """Test at alle poster kan læses tilbage sorteret efter projekt-ID"""
+        path = str(tmp_path / "index.snap")
+
+        assert write_snapshot(path, iter_tree_records(TREE), shard_size=2) == 3
+
+        with SnapshotReader(path) as reader:
+            assert len(reader) == 3
+            assert [p["id"] for _, p in reader] == [2, 17, 30]
+            assert ("root", "team", "tom") in reader.groups
+
+    def test_shared_project_is_written_once(self, tmp_path):
+        """Test at et delt projekt kun kommer med én gang, under sin ejergruppe"""
+        path = str(tmp_path / "index.snap")
+        shared = dict(project(17), namespace={"id": 2})
+        tree = dict(TREE, subgroups=[dict(TREE["subgroups"][0], projects=[shared])])
+        other = {"id": 9, "name": "other", "projects": [shared, project(40)], "subgroups": []}
+
+        assert write_snapshot(path, iter_tree_records([other, tree])) == 4
+
+        with SnapshotReader(path) as reader:
+            assert reader.get(17)["group_path"] == ["root", "team"]
+            assert ("other",) in reader.groups
+
+    def test_get_single_project(self, tmp_path):
+        """Test at opslag finder den rigtige shard og gruppesti"""
+        path = str(tmp_path / "index.snap")
+        write_snapshot(path, iter_tree_records(TREE), shard_size=1)
+
+        with SnapshotReader(path) as reader:
+            found = reader.get(17)
+            assert found["name"] == "repo-17"
+            assert found["group_path"] == ["root", "team"]
+            assert reader.get(5) is None
+            assert reader.get(99) is None
+            assert reader.get(1) is None
+
+    def test_only_one_shard_is_decompressed(self, tmp_path, monkeypatch):
+        """Test at et opslag kun udpakker én shard"""
+        path = str(tmp_path / "index.snap")
+        records = [(("root",), project(pid)) for pid in range(1, 101)]
+        write_snapshot(path, records, shard_size=10)
+
+        loaded = []
+        with SnapshotReader(path) as reader:
+            original = reader._load_shard
+            monkeypatch.setattr(reader, "_load_shard", lambda i: loaded.append(i) or original(i))
+            assert reader.get(55)["id"] == 55
+
+        assert loaded == [5]
+
+    def test_export_matches_per_file_layout(self, tmp_path):
+        """Test at eksporten giver samme filer som save_group_tree"""
+        path = str(tmp_path / "index.snap")
+        data = tmp_path / "data"
+        write_snapshot(path, iter_tree_records(TREE))
+
+        with SnapshotReader(path) as reader:
+            assert reader.export_tree(str(data)) == 3
+
+        assert (data / "root" / "team" / "tom").is_dir()
+        with open(data / "root" / "team" / "repo-17.json", encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved == {k: project(17)[k] for k in
+                         ("id", "name", "description", "visibility", "last_activity_at", "web_url")}
+
+    def test_empty_snapshot(self, tmp_path):
+        """Test at en snapshot uden projekter stadig kan åbnes"""
+        path = str(tmp_path / "index.snap")
+        write_snapshot(path, [(("root",), None)])
+
+        with SnapshotReader(path) as reader:
+            assert len(reader) == 0
+            assert reader.get(1) is None
+            assert reader.groups == [("root",)]
+
+    def test_rejects_foreign_file(self, tmp_path):
+        """Test at en fil der ikke er en snapshot afvises"""
+        path = tmp_path / "other.snap"
+        path.write_bytes(b"not a snapshot at all, just some bytes")
+
+        with pytest.raises(ValueError):
+            SnapshotReader(str(path))
+
+    def test_failed_write_leaves_no_temp_file(self, tmp_path):
+        """Test at en fejl under skrivning ikke efterlader filer"""
+        path = str(tmp_path / "index.snap")
+
+        with pytest.raises(KeyError):
+            write_snapshot(path, [(("root",), {"name": "mangler-id"})])
+
+        assert os.listdir(tmp_path) == []
\ No newline at end of file
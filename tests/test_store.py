@@ -0,0 +1,142 @@
+import os
+import pytest
+import responses
+from library.indexer import index_repositories
+from module_utils.store import IndexStore, main
+
+BASE = "https://gitlab.example.com/api/v4"
+
+
+def project(pid, name, description=None, visibility="private", last_activity_at="2025-01-01T00:00:00Z"):
+    return {
+        "id": pid,
+        "name": name,
+        "description": description,
+        "visibility": visibility,
+        "last_activity_at": last_activity_at,
+        "web_url": f"https://gitlab.example.com/p/{pid}",
+    }
+
+
+TREE = {
+    "id": 1,
+    "name": "root",
+    "projects": [project(10, "infra", "Terraform modules for AWS", "internal", "2025-03-01T00:00:00Z")],
+    "subgroups": [
+        {"id": 2, "name": "team", "projects": [
+            project(20, "terraform-ci", "Pipelines"),
+            project(21, "web", "Frontend æøå", "public", "2024-06-01T00:00:00Z"),
+        ], "subgroups": []},
+    ],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with IndexStore(str(tmp_path / "index.db")) as store:
+        with store.bulk(replace=True):
+            store.add_tree(TREE)
+        yield store
+
+
+class TestIndexStore:
+
+    def test_get_and_count(self, store):
+        """Test at projekter gemmes med gruppesti"""
+        assert store.count() == 3
+        row = store.get(21)
+        assert row["name"] == "web"
+        assert row["group_path"] == os.path.join("root", "team")
+        assert store.get(99) is None
+
+    def test_search_name_and_description(self, store):
+        """Test at fritekstsøgning rammer både navn og beskrivelse"""
+        assert {row["id"] for row in store.search("terraform")} == {10, 20}
+        assert [row["id"] for row in store.search("terraform aws")] == [10]
+        assert [row["id"] for row in store.search("front")] == [21]
+        assert store.search("") == []
+
+    def test_search_like_fallback(self, store):
+        """Test at søgning virker uden FTS5"""
+        store.fts = False
+        assert {row["id"] for row in store.search("terraform")} == {10, 20}
+
+    def test_search_ignores_fts_syntax(self, store):
+        """Test at brugerinput ikke tolkes som FTS-syntaks"""
+        assert store.search('"AND (') == []
+
+    def test_find_filters(self, store):
+        """Test filtrering på synlighed, gruppesti og aktivitet"""
+        assert [row["id"] for row in store.find(visibility="public")] == [21]
+        assert {row["id"] for row in store.find(group_path="root")} == {10, 20, 21}
+        assert {row["id"] for row in store.find(group_path=os.path.join("root", "team"))} == {20, 21}
+        assert [row["id"] for row in store.find(active_since="2025-02-01")] == [10]
+
+    def test_group_path_does_not_match_siblings(self, store):
+        """Test at en gruppesti ikke matcher søskende med samme præfiks"""
+        with store.bulk():
+            store.add_group(3, "root-old")
+            store.add_project(project(30, "legacy"), 3, "root-old")
+
+        assert 30 not in {row["id"] for row in store.find(group_path="root")}
+
+    def test_updates_keep_search_in_sync(self, store):
+        """Test at opdaterede og slettede projekter også ændres i søgeindekset"""
+        with store.bulk():
+            store.add_project(project(20, "ci", "Pipelines"), 2, os.path.join("root", "team"))
+            store.remove_projects(["10"])
+
+        assert store.search("terraform") == []
+        assert store.count() == 2
+
+    def test_shared_project_is_stored_under_owner(self, store):
+        """Test at et projekt delt ind i en anden rod gemmes under sin ejergruppe"""
+        shared = dict(project(21, "web"), namespace={"id": 2})
+        tree = dict(TREE, subgroups=[dict(TREE["subgroups"][0], projects=[project(20, "terraform-ci"), shared])])
+        other = {"id": 5, "name": "other", "projects": [shared, project(50, "api")], "subgroups": []}
+        with store.bulk(replace=True):
+            store.add_trees([other, tree], "data")
+
+        assert store.get(21)["group_path"] == os.path.join("data", "root", "team")
+        assert store.get(50)["group_path"] == os.path.join("data", "other")
+        assert store.count() == 4
+
+    def test_failed_bulk_rolls_back(self, store):
+        """Test at en fejl under bulk-skrivning ikke efterlader halve data"""
+        with pytest.raises(RuntimeError):
+            with store.bulk(replace=True):
+                store.add_project(project(99, "half"), 1, "root")
+                raise RuntimeError("crash")
+
+        assert store.count() == 3
+        assert store.get(99) is None
+
+
+class TestQueryCli:
+
+    def test_search_command(self, store, capsys):
+        """Test at CLI'en udskriver søgeresultater"""
+        assert main([store.path, "search", "frontend"]) == 0
+        assert "web" in capsys.readouterr().out
+
+    def test_missing_database(self, tmp_path, capsys):
+        """Test at en manglende database giver en fejl"""
+        assert main([str(tmp_path / "missing.db"), "get", "1"]) == 1
+        assert "❌" in capsys.readouterr().out
+
+
+@responses.activate
+def test_index_repositories_writes_store(tmp_path):
+    """Test at index_repositories også udfylder databasen"""
+    responses.add(responses.GET, f"{BASE}/groups/100", json={"id": 100, "name": "Root"}, status=200)
+    responses.add(responses.GET, f"{BASE}/groups/100/projects?per_page=100",
+                  json=[project(1, "repo-1", "Ansible roles")], status=200)
+    responses.add(responses.GET, f"{BASE}/groups/100/subgroups?per_page=100", json=[], status=200)
+    db = str(tmp_path / "index.db")
+
+    assert index_repositories("https://gitlab.example.com", "token", "100", str(tmp_path / "repos.json"),
+                              store_path=db)
+
+    with IndexStore(db) as store:
+        assert [row["id"] for row in store.search("ansible")] == [1]
+        assert store.get(1)["group_path"] == "Root"
\ No newline at end of file
@@ -0,0 +1,78 @@
+import os
+import pytest
+import responses
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.pipeline import run_pipeline
+from module_utils.GitLab.incremental import IndexState
+from module_utils.GitLab.main import save_group_tree, stream_group_tree_to_disk
+from tests.conftest import add_gitlab_group
+
+@pytest.fixture
+def hierarchy():
+    add_gitlab_group(100, [1], [101, 102], name="Root")
+    add_gitlab_group(101, [2], [103], name="A")
+    add_gitlab_group(102, [], [], name="Empty")
+    add_gitlab_group(103, [3], [], name="C")
+
+
+def _files(root):
+    return sorted(
+        os.path.relpath(os.path.join(dirpath, name), root)
+        for dirpath, _, names in os.walk(root) for name in names
+    ) + sorted(os.path.relpath(dirpath, root) for dirpath, _, _ in os.walk(root))
+
+
+class TestStreamingCrawl:
+
+    @responses.activate
+    def test_records_carry_full_group_path(self, hierarchy):
+        """Test at hver post har hele gruppestien"""
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4)
+
+        records = list(api.iter_group_projects(100, max_depth=5))
+
+        projects = {r.project["name"]: r.group_path for r in records if r.project}
+        assert projects == {"p1": ("Root",), "p2": ("Root", "A"), "p3": ("Root", "A", "C")}
+        assert ("Root", "Empty") in {r.group_path for r in records if r.project is None}
+
+    @responses.activate
+    def test_stream_writes_same_files_as_tree(self, hierarchy, tmp_path):
+        """Test at streaming giver samme filer som save_group_tree"""
+        api = GitLabAPI("https://gitlab.example.com", "token", max_workers=4)
+        tree_root = str(tmp_path / "tree")
+        stream_root = str(tmp_path / "stream")
+
+        save_group_tree(api.get_group_tree(100, max_depth=5), tree_root)
+        state = IndexState()
+        stats = stream_group_tree_to_disk(api, 100, stream_root, state, max_depth=5, queue_size=2)
+
+        assert _files(stream_root) == _files(tree_root)
+        assert stats == {"groups": 4, "saved": 3, "failed": 0}
+        assert state.project_path("3") == os.path.join(stream_root, "Root", "A", "C", "p3.json")
+
+
+class TestRunPipeline:
+
+    def test_consumes_everything_through_small_queue(self):
+        """Test at alle poster når frem gennem en lille kø"""
+        seen = []
+
+        assert run_pipeline(iter(range(100)), seen.append, queue_size=1) == 100
+        assert seen == list(range(100))
+
+    def test_producer_errors_are_raised(self):
+        """Test at fejl i crawleren ikke forsvinder i tråden"""
+        def records():
+            yield 1
+            raise RuntimeError("crawl failed")
+
+        with pytest.raises(RuntimeError):
+            run_pipeline(records(), lambda record: None)
+
+    def test_consumer_error_stops_producer(self):
+        """Test at en fejl i writeren stopper crawleren"""
+        def consume(record):
+            raise ValueError("disk full")
+
+        with pytest.raises(ValueError):
+            run_pipeline(iter(range(10000)), consume, queue_size=1)
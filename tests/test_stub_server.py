@@ -0,0 +1,92 @@
+import pytest
+import requests
+from benchmarks import crawl_bench
+from benchmarks.stub_server import StubGitLabServer, SyntheticGitLab
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.session import GitLabSession
+from settings.upload import GitLabUploader, upload_local_directory_structure
+
+
+@pytest.fixture
+def gitlab():
+    return SyntheticGitLab(depth=2, fanout=2, projects_per_group=3)
+
+
+@pytest.fixture
+def server(gitlab):
+    with StubGitLabServer(gitlab) as server:
+        yield server
+
+
+def count_projects(tree):
+    return len(tree["projects"]) + sum(count_projects(s) for s in tree["subgroups"])
+
+
+class TestSyntheticGitLab:
+
+    def test_hierarchy_size(self, gitlab):
+        """Test at hierarkiet har det forventede antal grupper og projekter"""
+        assert len(gitlab.groups) == 1 + 2 + 4
+        assert gitlab.project_count == 21
+        assert len(gitlab.descendants(gitlab.root_id)) == 6
+
+
+class TestStubServer:
+
+    @pytest.mark.parametrize("strategy", ["recursive", "flat"])
+    def test_group_tree(self, server, gitlab, strategy):
+        """Test at crawleren finder hele hierarkiet via stand-in serveren"""
+        api = GitLabAPI(server.url, "token", max_workers=4)
+
+        tree = api.fetch_group_tree(gitlab.root_id, strategy=strategy)
+
+        assert tree["name"] == "root"
+        assert count_projects(tree) == gitlab.project_count
+
+    def test_pagination_headers(self, server, gitlab):
+        """Test at sider har GitLabs pagineringsheaders"""
+        response = requests.get(f"{server.url}/api/v4/groups/1/projects?include_subgroups=true&per_page=5&page=2")
+
+        assert response.headers["X-Page"] == "2"
+        assert response.headers["X-Total"] == "21"
+        assert response.headers["X-Total-Pages"] == "5"
+        assert "page=3" in response.links["next"]["url"]
+        assert len(response.json()) == 5
+
+    def test_keyset_pagination(self, server, gitlab):
+        """Test at keyset-paginering returnerer alle projekter én gang"""
+        api = GitLabAPI(server.url, "token", pagination="keyset")
+
+        projects = api.get_all_repositories(gitlab.root_id)
+
+        assert sorted(p["id"] for p in projects) == list(range(1, 22))
+
+    def test_injected_throttling_is_retried(self, gitlab):
+        """Test at injicerede 429-svar bliver prøvet igen"""
+        with StubGitLabServer(gitlab, throttle_every=2) as server:
+            api = GitLabAPI(server.url, "token", session=GitLabSession(sleep=lambda s: None))
+            assert api.get_group(gitlab.root_id)["name"] == "root"
+            assert api.get_group(gitlab.root_id)["name"] == "root"
+            assert server.throttled >= 1
+
+    def test_batch_upload_roundtrip(self, server, gitlab, tmp_path):
+        """Test at filer uploadet i batches lander i stand-in repositoriet"""
+        (tmp_path / "root").mkdir()
+        (tmp_path / "root" / "repo.json").write_text('{"id": 1}', encoding="utf-8")
+        uploader = GitLabUploader(server.url, "token", 1000, "main")
+
+        stats = upload_local_directory_structure(str(tmp_path), uploader, "data", batch=True)
+        again = upload_local_directory_structure(str(tmp_path), uploader, "data", batch=True)
+
+        assert stats["created"] == 1
+        assert again["skipped"] == 1
+        assert gitlab.files == {"data/root/repo.json": b'{"id": 1}'}
+
+
+def test_benchmark_suite_runs():
+    """Test at benchmark-suiten kører og rapporterer tal for alle målinger"""
+    results = crawl_bench.run(depth=1, fanout=1, projects=2, workers=2)
+
+    benchmarks = [row for row in results if row["benchmark"] != "server"]
+    assert len(benchmarks) == 13
+    assert all(row["ok"] and row["peak_mib"] >= 0 for row in benchmarks)
\ No newline at end of file
@@ -0,0 +1,215 @@
+import csv
+import os
+import responses
+from library.indexer import collect_all_repositories
+from module_utils.GitLab.main import save_group_tree
+from module_utils.GitLab.query import GitLabAPI
+from module_utils.GitLab.models import CrawlRecord
+from module_utils.GitLab.traversal import TreeVisitor, place_records, walk, walk_tree
+from settings.reports import GroupReport
+
+BASE = "https://gitlab.example.com/api/v4"
+
+
+def group(gid, name, projects=(), subgroups=()):
+    return {"id": gid, "name": name,
+            "projects": [{"id": p, "name": f"p{p}", "visibility": "private", "web_url": f"https://x/p{p}",
+                          "last_activity_at": f"2025-01-{p:02d}T00:00:00Z"} for p in projects],
+            "subgroups": list(subgroups)}
+
+
+def chain(depth, start=1):
+    last = start + depth - 1
+    tree = group(last, f"g{last}", projects=[depth])
+    for gid in range(last - 1, start - 1, -1):
+        tree = group(gid, f"g{gid}", projects=[gid - start + 1], subgroups=[tree])
+    return tree
+
+
+class Recorder(TreeVisitor):
+    def __init__(self):
+        self.events = []
+
+    def enter_group(self, group, path):
+        self.events.append(("enter", group["id"], path))
+
+    def visit_project(self, project, group, path):
+        self.events.append(("project", project["id"], group["id"]))
+
+    def leave_group(self, group, path):
+        self.events.append(("leave", group["id"], path))
+
+
+class TestWalk:
+
+    def test_depth_first_order(self):
+        """Test at grupper besøges dybde-først, og leave kommer efter hele undertræet"""
+        tree = group(1, "root", projects=[10], subgroups=[group(2, "a", projects=[20]), group(3, "b")])
+        recorder = Recorder()
+
+        stats = walk_tree(tree, [recorder])
+
+        assert recorder.events == [
+            ("enter", 1, ("root",)), ("project", 10, 1),
+            ("enter", 2, ("root", "a")), ("project", 20, 2), ("leave", 2, ("root", "a")),
+            ("enter", 3, ("root", "b")), ("leave", 3, ("root", "b")),
+            ("leave", 1, ("root",)),
+        ]
+        assert stats == {"groups": 3, "projects": 2, "duplicate_groups": 0, "duplicate_projects": 0}
+
+    def test_duplicates_are_visited_once(self):
+        """Test at delte projekter og grupper kun besøges første gang"""
+        shared = group(3, "shared", projects=[30])
+        a = group(1, "a", projects=[10, 11], subgroups=[shared])
+        b = group(2, "b", projects=[11], subgroups=[shared])
+        recorder = Recorder()
+
+        stats = walk([a, b], [recorder])
+
+        assert [e[1] for e in recorder.events if e[0] == "project"] == [10, 11, 30]
+        assert [e[1] for e in recorder.events if e[0] == "enter"] == [1, 3, 2]
+        assert stats == {"groups": 3, "projects": 3, "duplicate_groups": 1, "duplicate_projects": 1}
+
+    def test_unlimited_depth(self):
+        """Test at et dybt hierarki gennemløbes uden rekursionsgrænse"""
+        stats = walk_tree(chain(2000), [Recorder()])
+
+        assert stats["groups"] == 2000
+        assert stats["projects"] == 2000
+
+    def test_root_path_prefixes_paths(self):
+        """Test at root_path sættes foran stierne"""
+        recorder = Recorder()
+
+        walk_tree(group(1, "root"), [recorder], root_path=("top",))
+
+        assert recorder.events[0] == ("enter", 1, ("top", "root"))
+
+
+def shared(pid, owner):
+    return {"id": pid, "name": f"p{pid}", "namespace": {"id": owner}}
+
+
+class TestSharedProjects:
+
+    def test_shared_project_is_placed_under_owner(self):
+        """Test at et delt projekt besøges i ejergruppen, også når en anden gruppe besøges først"""
+        a = {"id": 2, "name": "a", "projects": [shared(7, 3)], "subgroups": []}
+        b = {"id": 3, "name": "b", "projects": [shared(7, 3)], "subgroups": []}
+        recorder = Recorder()
+
+        stats = walk_tree({"id": 1, "name": "root", "projects": [], "subgroups": [a, b]}, [recorder])
+
+        assert [e for e in recorder.events if e[0] == "project"] == [("project", 7, 3)]
+        assert stats["duplicate_projects"] == 1
+
+    def test_project_from_outside_goes_to_smallest_path(self):
+        """Test at et projekt delt ind udefra placeres deterministisk under den mindste sti"""
+        a = {"id": 2, "name": "a", "projects": [shared(7, 99)], "subgroups": []}
+        b = {"id": 3, "name": "b", "projects": [shared(7, 99)], "subgroups": []}
+        recorder = Recorder()
+
+        walk_tree({"id": 1, "name": "root", "projects": [], "subgroups": [b, a]}, [recorder])
+
+        assert [e for e in recorder.events if e[0] == "project"] == [("project", 7, 2)]
+
+    def test_stream_placement_matches_walk_in_any_order(self):
+        """Test at den strømmende placering ikke afhænger af rækkefølgen og matcher walk()"""
+        records = [
+            CrawlRecord(2, ("root", "a"), shared(7, 3)),
+            CrawlRecord(4, ("root", "c"), shared(8, 99)),
+            CrawlRecord(3, ("root", "b"), shared(7, 3)),
+            CrawlRecord(2, ("root", "a"), shared(8, 99)),
+            CrawlRecord(3, ("root", "b"), None),
+        ]
+
+        for ordering in (records, list(reversed(records))):
+            placed = {r.project["id"]: r.group_id for r in place_records(ordering) if r.project is not None}
+            assert placed == {7: 3, 8: 2}
+
+
+class TestConsumers:
+
+    def test_collect_all_repositories_skips_shared_projects(self):
+        """Test at indexeren samler hvert projekt én gang på alle niveauer"""
+        tree = group(1, "root", projects=[1], subgroups=[group(2, "a", projects=[1, 2]), chain(6, start=100)])
+
+        repos = collect_all_repositories(tree)
+
+        assert sorted(r["id"] for r in repos) == [1, 2, 3, 4, 5, 6]
+
+    def test_save_group_tree_writes_each_project_once(self, tmp_path):
+        """Test at et delt projekt kun gemmes i den første gruppe"""
+        tree = group(1, "root", projects=[5], subgroups=[group(2, "a", projects=[5, 6])])
+
+        stats = save_group_tree(tree, str(tmp_path))
+
+        assert os.path.exists(tmp_path / "root" / "p5.json")
+        assert not os.path.exists(tmp_path / "root" / "a" / "p5.json")
+        assert os.path.exists(tmp_path / "root" / "a" / "p6.json")
+        assert stats["duplicate_projects"] == 1
+
+    def test_one_pass_serves_several_visitors(self, tmp_path):
+        """Test at saver og rapport deler samme gennemløb"""
+        tree = group(1, "root", projects=[1], subgroups=[group(2, "a", projects=[2, 3])])
+        report = GroupReport()
+
+        save_group_tree(tree, str(tmp_path), visitors=[report])
+
+        assert os.path.exists(tmp_path / "root" / "a" / "p3.json")
+        assert report.totals()["projects"] == 3
+
+
+class TestGroupReport:
+
+    def test_rolls_up_subtree_totals(self, tmp_path):
+        """Test at rapporten summerer undertræer og skriver en CSV"""
+        tree = group(1, "root", projects=[1], subgroups=[group(2, "a", projects=[2, 3], subgroups=[group(4, "b")])])
+        report = GroupReport()
+        walk_tree(tree, [report])
+
+        rows = {row["group_id"]: row for row in report.rows}
+        assert rows[1]["projects"] == 1
+        assert rows[1]["total_projects"] == 3
+        assert rows[1]["subgroups"] == 1
+        assert rows[1]["last_activity_at"] == "2025-01-03T00:00:00Z"
+        assert rows[2]["path"] == "root/a"
+        assert rows[2]["private"] == 2
+        assert rows[4]["total_projects"] == 0
+
+        path = tmp_path / "report.csv"
+        report.write_csv(str(path))
+        with open(path, encoding="utf-8") as f:
+            written = list(csv.DictReader(f))
+        assert [row["path"] for row in written] == ["root", "root/a", "root/a/b"]
+        assert written[0]["total_projects"] == "3"
+
+
+class TestUnlimitedCrawl:
+
+    @responses.activate
+    def test_get_group_tree_has_no_default_depth_cap(self):
+        """Test at crawleren som standard følger hierarkiet til bunds"""
+        depth = 6
+        for gid in range(1, depth + 1):
+            responses.add(responses.GET, f"{BASE}/groups/{gid}", json={"id": gid, "name": f"g{gid}"})
+            responses.add(responses.GET, f"{BASE}/groups/{gid}/projects?per_page=100", json=[])
+            subgroups = [{"id": gid + 1, "name": f"g{gid + 1}"}] if gid < depth else []
+            responses.add(responses.GET, f"{BASE}/groups/{gid}/subgroups?per_page=100", json=subgroups)
+        api = GitLabAPI("https://gitlab.example.com", "token")
+
+        tree = api.get_group_tree(1)
+
+        assert walk_tree(tree, [])["groups"] == depth
+
+    @responses.activate
+    def test_tree_keeps_project_namespace(self):
+        """Test at træets projekter beholder namespace-id, som inkrementel sync placerer efter"""
+        responses.add(responses.GET, f"{BASE}/groups/1", json={"id": 1, "name": "g1"})
+        responses.add(responses.GET, f"{BASE}/groups/1/projects?per_page=100",
+                      json=[{"id": 5, "name": "p5", "web_url": "u", "last_activity_at": "t", "namespace": {"id": 9}}])
+        responses.add(responses.GET, f"{BASE}/groups/1/subgroups?per_page=100", json=[])
+
+        tree = GitLabAPI("https://gitlab.example.com", "token").get_group_tree(1)
+
+        assert tree["projects"][0]["namespace"] == {"id": 9}
\ No newline at end of file
@@ -0,0 +1,160 @@
+import base64
+import json
+import pytest
+import responses
+from settings.upload import GitLabUploader, RemoteManifest, upload_local_directory_structure, git_blob_sha
+
+BASE = "https://gitlab.example.com/api/v4/projects/42/repository"
+TREE_URL = f"{BASE}/tree?ref=main&recursive=true&per_page=100&path=data"
+
+
+@pytest.fixture
+def local_data(tmp_path):
+    """Lokal data-mappe med tre repository-filer"""
+    root = tmp_path / "data" / "Group"
+    (root / "Sub").mkdir(parents=True)
+    for path, name in [(root / "a.json", "a"), (root / "b.json", "b"), (root / "Sub" / "c.json", "c")]:
+        path.write_text(json.dumps({"name": name}, indent=2), encoding="utf-8")
+    return str(tmp_path / "data")
+
+
+@pytest.fixture
+def uploader():
+    return GitLabUploader("https://gitlab.example.com", "token", "42")
+
+
+def _commit_payloads():
+    return [json.loads(call.request.body) for call in responses.calls if call.request.method == "POST"]
+
+
+class TestBatchUpload:
+
+    @responses.activate
+    def test_all_files_in_one_commit(self, local_data, uploader):
+        """Test at alle filer sendes i én commit med create/update actions"""
+        responses.add(responses.GET, TREE_URL, json=[{"path": "data/Group/a.json", "type": "blob"}], status=200)
+        responses.add(responses.POST, f"{BASE}/commits", json={"id": "abc"}, status=201)
+
+        stats = upload_local_directory_structure(local_data, uploader, batch=True)
+
+        payloads = _commit_payloads()
+        assert len(payloads) == 1
+        actions = {a["file_path"]: a["action"] for a in payloads[0]["actions"]}
+        assert actions == {
+            "data/Group/a.json": "update",
+            "data/Group/b.json": "create",
+            "data/Group/Sub/c.json": "create",
+        }
+        content = next(a for a in payloads[0]["actions"] if a["file_path"] == "data/Group/a.json")["content"]
+        assert json.loads(base64.b64decode(content)) == {"name": "a"}
+        assert stats["created"] == 2 and stats["updated"] == 1 and stats["failed"] == 0
+
+    @responses.activate
+    def test_batches_split_by_payload_size(self, local_data, uploader):
+        """Test at batches deles når de overstiger størrelsesgrænsen"""
+        responses.add(responses.GET, TREE_URL, json=[], status=200)
+        responses.add(responses.POST, f"{BASE}/commits", json={"id": "abc"}, status=201)
+
+        upload_local_directory_structure(local_data, uploader, batch=True, max_batch_bytes=80)
+
+        assert len(_commit_payloads()) == 3
+
+    @responses.activate
+    def test_failed_batch_is_bisected(self, local_data, uploader):
+        """Test at en fejlende fil isoleres ved at halvere batchen"""
+        responses.add(responses.GET, TREE_URL, status=404)
+
+        def commit(request):
+            paths = [a["file_path"] for a in json.loads(request.body)["actions"]]
+            if "data/Group/b.json" in paths:
+                return 400, {}, json.dumps({"message": "bad file"})
+            return 201, {}, json.dumps({"id": "abc"})
+
+        responses.add_callback(responses.POST, f"{BASE}/commits", callback=commit)
+
+        stats = upload_local_directory_structure(local_data, uploader, batch=True)
+
+        assert stats["created"] == 2
+        assert stats["failed"] == 1
+
+
+class TestContentHashSkip:
+
+    def test_git_blob_sha_matches_git(self):
+        """Test at hashen svarer til `git hash-object`"""
+        assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+        assert git_blob_sha(b"") == "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+
+    @responses.activate
+    def test_unchanged_files_are_skipped(self, local_data, uploader):
+        """Test at filer med samme blob-hash ikke sendes igen"""
+        unchanged = json.dumps({"name": "a"}, indent=2).encode("utf-8")
+        responses.add(responses.GET, TREE_URL, json=[
+            {"path": "data/Group/a.json", "type": "blob", "id": git_blob_sha(unchanged)},
+            {"path": "data/Group/b.json", "type": "blob", "id": "0" * 40},
+        ], status=200)
+        responses.add(responses.POST, f"{BASE}/commits", json={"id": "abc"}, status=201)
+
+        stats = upload_local_directory_structure(local_data, uploader, batch=True)
+
+        actions = {a["file_path"]: a["action"] for a in _commit_payloads()[0]["actions"]}
+        assert actions == {"data/Group/b.json": "update", "data/Group/Sub/c.json": "create"}
+        assert stats["skipped"] == 1
+
+    @responses.activate
+    def test_nothing_changed_makes_no_commit(self, local_data, uploader, tmp_path):
+        """Test at en uændret upload kun koster tree-listningen"""
+        tree = []
+        for path in (tmp_path / "data").rglob("*.json"):
+            relative = path.relative_to(tmp_path).as_posix()
+            tree.append({"path": relative, "type": "blob", "id": git_blob_sha(path.read_bytes())})
+        responses.add(responses.GET, TREE_URL, json=tree, status=200)
+
+        stats = upload_local_directory_structure(local_data, uploader)
+
+        assert stats["skipped"] == 3
+        assert len(responses.calls) == 1
+
+
+class TestRemoteManifest:
+
+    def test_manifest_lookups_and_stale_paths(self):
+        """Test at manifestet holder styr på stier og forældede filer"""
+        manifest = RemoteManifest({"data/a.json": git_blob_sha(b"a"), "data/old.json": None})
+
+        assert "data/a.json" in manifest
+        assert manifest.is_unchanged("data/a.json", b"a")
+        assert not manifest.is_unchanged("data/old.json", b"a")
+
+        manifest.add("data/new.json")
+        assert manifest.stale(["data/a.json", "data/new.json"]) == ["data/old.json"]
+
+    @responses.activate
+    def test_per_file_upload_uses_manifest_instead_of_probes(self, local_data, uploader):
+        """Test at der ikke laves file_exists-kald når manifestet er indlæst"""
+        responses.add(responses.GET, TREE_URL, json=[{"path": "data/Group/a.json", "type": "blob", "id": "0" * 40}],
+                      status=200)
+        responses.add(responses.PUT, f"{BASE}/files/data%2FGroup%2Fa.json", json={}, status=200)
+        responses.add(responses.POST, f"{BASE}/files/data%2FGroup%2Fb.json", json={}, status=201)
+        responses.add(responses.POST, f"{BASE}/files/data%2FGroup%2FSub%2Fc.json", json={}, status=201)
+
+        stats = upload_local_directory_structure(local_data, uploader)
+
+        assert stats["updated"] == 1 and stats["created"] == 2
+        assert len([c for c in responses.calls if c.request.method == "GET"]) == 1
+        assert "data/Group/b.json" in uploader.manifest
+
+    @responses.activate
+    def test_stale_files_are_deleted_in_same_commit(self, local_data, uploader):
+        """Test at forældede filer slettes i samme batch-commit"""
+        responses.add(responses.GET, TREE_URL, json=[{"path": "data/Group/gone.json", "type": "blob", "id": "1" * 40}],
+                      status=200)
+        responses.add(responses.POST, f"{BASE}/commits", json={"id": "abc"}, status=201)
+
+        stats = upload_local_directory_structure(local_data, uploader, batch=True, delete_stale=True)
+
+        payloads = _commit_payloads()
+        assert len(payloads) == 1
+        assert {"action": "delete", "file_path": "data/Group/gone.json"} in payloads[0]["actions"]
+        assert stats["deleted"] == 1
+        assert "data/Group/gone.json" not in uploader.manifest
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import pytest
+from module_utils.GitLab.main import save_group_tree, save_repository
+from module_utils.writer import FileWriter
+
+
+def project(pid, name, description=None):
+    return {"id": pid, "name": name, "description": description, "visibility": "private",
+            "web_url": f"https://gitlab.example.com/{name}", "last_activity_at": "2025-11-18T10:00:00Z"}
+
+
+@pytest.fixture(params=[0, 4], ids=["sync", "pool"])
+def writer(request):
+    with FileWriter(max_workers=request.param) as writer:
+        yield writer
+
+
+class TestFileWriter:
+
+    def test_writes_atomically(self, writer, tmp_path):
+        """Test at filen skrives via en midlertidig fil, der ikke efterlades"""
+        path = str(tmp_path / "a.json")
+
+        writer.submit(path, b"{}")
+        stats = writer.flush()
+
+        assert open(path, "rb").read() == b"{}"
+        assert os.listdir(tmp_path) == ["a.json"]
+        assert stats == {"written": 1, "unchanged": 0, "failed": 0}
+
+    def test_unchanged_file_keeps_mtime(self, writer, tmp_path):
+        """Test at en fil med samme indhold ikke skrives igen"""
+        path = tmp_path / "a.json"
+        path.write_bytes(b'{"id": 1}')
+        os.utime(path, (1_000_000, 1_000_000))
+
+        writer.submit(str(path), b'{"id": 1}')
+        writer.submit(str(tmp_path / "b.json"), b"[]")
+        stats = writer.flush()
+
+        assert os.path.getmtime(path) == 1_000_000
+        assert stats == {"written": 1, "unchanged": 1, "failed": 0}
+
+    def test_changed_content_is_rewritten(self, writer, tmp_path):
+        """Test at ændret indhold med samme længde stadig skrives"""
+        path = tmp_path / "a.json"
+        path.write_bytes(b'{"id": 1}')
+
+        writer.submit(str(path), b'{"id": 2}')
+        writer.flush()
+
+        assert path.read_bytes() == b'{"id": 2}'
+
+    def test_failed_write_is_counted(self, writer, tmp_path):
+        """Test at en fejlet skrivning logges og tælles i stedet for at stoppe kørslen"""
+        (tmp_path / "blocker").write_text("")
+
+        writer.submit(str(tmp_path / "blocker" / "a.json"), b"{}")
+        stats = writer.flush()
+
+        assert stats["failed"] == 1
+
+    def test_makedirs_is_cached(self, tmp_path, monkeypatch):
+        """Test at samme mappe kun oprettes én gang"""
+        calls = []
+        real_makedirs = os.makedirs
+        monkeypatch.setattr(os, "makedirs", lambda *a, **kw: calls.append(a[0]) or real_makedirs(*a, **kw))
+        writer = FileWriter()
+
+        for _ in range(3):
+            writer.makedirs(str(tmp_path / "group"))
+
+        assert calls == [str(tmp_path / "group")]
+
+    def test_recreates_removed_cached_folder(self, tmp_path):
+        """Test at en cachet mappe, der er slettet, oprettes igen ved skrivning"""
+        writer = FileWriter()
+        folder = tmp_path / "group"
+        writer.makedirs(str(folder))
+        folder.rmdir()
+
+        writer.submit(str(folder / "a.json"), b"{}")
+
+        assert (folder / "a.json").read_bytes() == b"{}"
+
+
+class TestSaveRepository:
+
+    def test_payload_dump_is_opt_in(self, tmp_path, caplog):
+        """Test at det rå payload kun logges, når det er slået til"""
+        caplog.set_level(logging.DEBUG)
+
+        save_repository(project(1, "quiet"), str(tmp_path), FileWriter())
+        assert '"web_url"' not in caplog.text
+
+        save_repository(project(2, "loud"), str(tmp_path), FileWriter(dump_payloads=True))
+        assert '"web_url": "https://gitlab.example.com/loud"' in caplog.text
+
+    def test_rerun_only_rewrites_changed_projects(self, tmp_path):
+        """Test at en gentaget kørsel kun skriver de projekter, der har ændret sig"""
+        tree = {"id": 1, "name": "root", "projects": [project(1, "a"), project(2, "b")], "subgroups": []}
+        save_group_tree(tree, str(tmp_path))
+        for name in ("a", "b"):
+            os.utime(tmp_path / "root" / f"{name}.json", (1_000_000, 1_000_000))
+
+        tree["projects"][1] = project(2, "b", description="ny")
+        save_group_tree(tree, str(tmp_path))
+
+        assert os.path.getmtime(tmp_path / "root" / "a.json") == 1_000_000
+        assert os.path.getmtime(tmp_path / "root" / "b.json") != 1_000_000
+        assert json.loads((tmp_path / "root" / "b.json").read_text())["description"] == "ny"
+
+    def test_pool_writes_whole_tree(self, tmp_path):
+        """Test at trådpuljen skriver alle filer i et træ"""
+        subgroups = [{"id": g, "name": f"g{g}", "projects": [project(g * 100 + i, f"p{g}-{i}") for i in range(20)],
+                      "subgroups": []} for g in range(2, 6)]
+
+        with FileWriter(max_workers=4) as writer:
+            for group in subgroups:
+                for repo in group["projects"]:
+                    assert save_repository(repo, str(tmp_path / "root" / group["name"]), writer)
+            stats = writer.flush()
+
+        assert stats == {"written": 80, "unchanged": 0, "failed": 0}
+        assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 80
\ No newline at end of file